@@ -0,0 +1,479 @@
+"""HardSubForge - Conversor em lote pela linha de comando (sem interface grafica).
+
+Este modulo nao importa o Qt: usa apenas FFmpegWrapper, ConversionOptions,
+StreamingPresets e ConfigManager. O progresso e emitido em stdout como JSON
+Lines (um objeto por linha) e o log do FFmpeg vai para stderr com --verbose.
+
+Exemplo:
+    python cli.py convert videos/*.mkv -p "Equilibrado" -o saida/ --burn --jobs 4
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+
+from config.config_manager import ConfigManager
+from config.history import HistoryStore
+from ffmpeg.wrapper import FFmpegWrapper, ConversionOptions, Rendition
+from ffmpeg.probe_cache import configure_probe_cache
+from ffmpeg.output import OUTPUT_STRATEGIES
+from ffmpeg.sampler import TrialSampler, combine_estimates
+from ffmpeg.readahead import configure_readahead, shared_readahead
+from ffmpeg.result_cache import configure_result_cache
+from ffmpeg.staging import configure_staging, shared_staging
+from ffmpeg.file_cache import configure_file_cache
+from ffmpeg.subtitle_cache import SubtitleCache
+from ffmpeg.watermark import WatermarkCache
+from presets.definitions import StreamingPresets
+from utils.helpers import (VIDEO_EXTENSIONS, default_batch_concurrency, encoder_threads,
+                           find_external_subtitle, sanitize_filename, unique_output_path)
+
+
+class JsonEmitter:
+    """Escreve eventos JSON Lines em stdout de forma thread-safe."""
+
+    def __init__(self, stream=None):
+        self._stream = stream or sys.stdout
+        self._lock = threading.Lock()
+
+    def emit(self, event: str, **fields) -> None:
+        record = {"event": event, "ts": round(time.time(), 3), **fields}
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self._stream.write(line + "\n")
+            self._stream.flush()
+
+
+def _preset_key(name: str) -> str:
+    """Nome sem acentos e sem caixa ("Máxima Qualidade" == "maxima qualidade")."""
+    decomposed = unicodedata.normalize("NFKD", name.strip().lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def _find_preset(config: ConfigManager, name: str):
+    wanted = _preset_key(name)
+    for preset in list(StreamingPresets.get_all()) + config.get_custom_presets():
+        if _preset_key(preset.name) == wanted:
+            return preset
+    return None
+
+
+def _configure_caches(config: ConfigManager) -> None:
+    """Abre os caches em disco (so para os comandos que chamam o FFmpeg)."""
+    if config.get("probe_cache_persistent", True):
+        configure_probe_cache(config.get("probe_cache_db") or str(config.data_path("probe_cache.db")))
+    configure_file_cache(SubtitleCache,
+                         config.get("subtitle_cache_dir") or str(config.data_path("subtitle_cache")))
+    configure_file_cache(WatermarkCache,
+                         config.get("watermark_cache_dir") or str(config.data_path("watermark_cache")))
+
+
+def _expand_inputs(paths: List[str]) -> List[str]:
+    files = []
+    for p in paths:
+        path = Path(p)
+        if path.is_dir():
+            files.extend(str(f) for f in sorted(path.iterdir())
+                         if f.is_file() and f.suffix.lower() in VIDEO_EXTENSIONS)
+        elif path.is_file():
+            files.append(str(path))
+        else:
+            print(f"Aviso: arquivo nao encontrado: {p}", file=sys.stderr)
+    return files
+
+
+class BatchRunner:
+    """Executa as conversoes com ate N processos FFmpeg simultaneos."""
+
+    def __init__(self, args: argparse.Namespace, config: ConfigManager, emitter: JsonEmitter,
+                 history: Optional[HistoryStore] = None):
+        self.args = args
+        self.config = config
+        self.emitter = emitter
+        self.history = history
+        self._lock = threading.Lock()
+        self._reserved: set = set()
+        self._wrappers: List[FFmpegWrapper] = []
+        self._queue: List[str] = []
+        self._jobs = 1
+        self._halted = False
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def build_options(self, input_path: str, output_paths: List[str], presets) -> ConversionOptions:
+        """Opcoes do job; presets alem do primeiro viram renditions (decodificacao unica)."""
+        args = self.args
+        subtitle_path = args.subtitle or ""
+        if not subtitle_path and not args.no_auto_subtitle:
+            subtitle_path = find_external_subtitle(input_path)
+        use_hw = not args.no_hwaccel and self.config.get("use_hardware_accel", True)
+        return ConversionOptions(
+            input_path=input_path,
+            output_path=output_paths[0],
+            preset=presets[0],
+            subtitle_path=subtitle_path or None,
+            subtitle_stream_index=args.subtitle_stream,
+            subtitle_burn=args.burn,
+            custom_bitrate=args.bitrate,
+            watermark_text=args.watermark,
+            watermark_position=args.watermark_position,
+            watermark_size=args.watermark_size,
+            audio_track_index=args.audio_track,
+            use_hardware_accel=use_hw,
+            copy_audio=args.copy_audio,
+            stream_copy="off" if args.no_stream_copy else self.config.get("stream_copy", "auto"),
+            preserve_metadata=not args.no_metadata,
+            segment_workers=args.segments,
+            output_strategy=args.output_strategy or self.config.get("output_strategy", "auto"),
+            threads=encoder_threads(self._jobs),
+            parallel_jobs=max(1, min(self._jobs, len(self._queue))),
+            renditions=[Rendition(preset, path) for preset, path in zip(presets[1:], output_paths[1:])]
+        )
+
+    def _desired_outputs(self, input_path: str, presets) -> List[str]:
+        """Um caminho por preset; com varios, o nome do preset entra no nome."""
+        output_dir = self.args.output_dir or str(Path(input_path).parent)
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+        name = Path(input_path).stem + self.args.suffix
+        return [str(Path(output_dir) / f"{name}_{sanitize_filename(preset.name)}.mp4" if len(presets) > 1
+                    else Path(output_dir) / f"{name}.mp4") for preset in presets]
+
+    def _reserve_outputs(self, desired: List[str], reuse: bool = False) -> List[str]:
+        """Caminhos livres para as saidas; com ``reuse``, os proprios caminhos pedidos
+        (a saida identica ja esta la e o cache de resultados a reaproveita)."""
+        with self._lock:
+            if reuse and not self._reserved.intersection(desired):
+                self._reserved.update(desired)
+                return list(desired)
+            outputs = []
+            for path in desired:
+                output = unique_output_path(str(Path(path).parent), Path(path).stem, self._reserved)
+                self._reserved.add(output)
+                outputs.append(output)
+        return outputs
+
+    def run_one(self, input_path: str, presets) -> int:
+        if self._halted:
+            self.emitter.emit("skipped", input=input_path, reason="halted")
+            return -2
+
+        desired = self._desired_outputs(input_path, presets)
+        options = self.build_options(input_path, desired, presets)
+        wrapper = FFmpegWrapper(self.args.ffmpeg or self.config.get("ffmpeg_path") or None)
+        missing = wrapper.prepare_job(options)
+        if missing:
+            self.emitter.emit("error", input=input_path, output=desired[0], returncode=-1,
+                              missing=missing, elapsed=0.0)
+            if self.args.on_error == "stop":
+                self._halted = True
+            return -1
+        reuse = wrapper.cached_outputs(options) == [os.path.abspath(path) for path in desired]
+        output_paths = self._reserve_outputs(desired, reuse)
+        output_path = output_paths[0]
+        options = self.build_options(input_path, output_paths, presets)
+        with self._lock:
+            self._wrappers.append(wrapper)
+        readahead = shared_readahead()
+        if readahead is not None:
+            readahead.forget(input_path)
+        self._prefetch_after(input_path)
+
+        self.emitter.emit("start", input=input_path, output=output_path, preset=presets[0].name,
+                          **({"outputs": output_paths} if len(presets) > 1 else {}))
+        started = time.monotonic()
+
+        percent_box = [0]
+
+        def on_progress(percent: int) -> None:
+            percent_box[0] = percent
+
+        def on_stats(info) -> None:
+            self.emitter.emit("progress", input=input_path, percent=percent_box[0],
+                              out_time=round(info.out_time, 2), frame=info.frame, fps=info.fps,
+                              speed=info.speed, realtime=round(info.realtime, 3),
+                              eta=round(info.eta, 1) if info.eta is not None else None,
+                              bitrate_kbps=info.bitrate_kbps, total_size=info.total_size)
+
+        def on_output(index: int, percent: int, size: int) -> None:
+            self.emitter.emit("output_progress", input=input_path, output=output_paths[index],
+                              preset=presets[index].name, percent=percent, total_size=size)
+
+        def on_log(message: str) -> None:
+            if self.args.verbose and message:
+                print(f"[{Path(input_path).name}] {message}", file=sys.stderr)
+
+        returncode = wrapper.convert(options, progress_callback=on_progress, log_callback=on_log,
+                                     stats_callback=on_stats,
+                                     output_callback=on_output if len(presets) > 1 else None)
+        with self._lock:
+            self._wrappers.remove(wrapper)
+        elapsed = round(time.monotonic() - started, 2)
+        self._record(wrapper)
+        if returncode == 0 and wrapper.cache_hit is not None:
+            with self._lock:
+                if wrapper.cache_hit:
+                    self.cache_hits += 1
+                else:
+                    self.cache_misses += 1
+
+        if returncode == 0:
+            telemetry = wrapper.telemetry
+            self.emitter.emit("done", input=input_path, output=output_path, elapsed=elapsed,
+                              **({"cached": True} if wrapper.cache_hit else {}),
+                              **({"outputs": output_paths} if len(presets) > 1 else {}),
+                              **({"telemetry": telemetry.to_dict()} if telemetry else {}))
+        else:
+            self.emitter.emit("error", input=input_path, output=output_path,
+                              returncode=returncode, elapsed=elapsed)
+            if returncode != -2 and self.args.on_error == "stop":
+                self._halted = True
+        return returncode
+
+    def _prefetch_after(self, input_path: str) -> None:
+        """Adianta a leitura do arquivo que ocupara a proxima vaga livre."""
+        if self._halted:
+            return
+        try:
+            position = self._queue.index(input_path) + self._jobs
+        except ValueError:
+            return
+        if position >= len(self._queue):
+            return
+        path = self._queue[position]
+        staging = shared_staging()
+        if staging is not None and staging.wants(path):
+            staging.prefetch(path)
+            return
+        readahead = shared_readahead()
+        if readahead is not None:
+            readahead.warm(path)
+
+    def _record(self, wrapper: FFmpegWrapper) -> None:
+        if self.history is None or wrapper.telemetry is None:
+            return
+        try:
+            self.history.record(wrapper.telemetry)
+        except Exception as e:
+            print(f"Erro ao gravar historico: {e}", file=sys.stderr)
+
+    def stop(self) -> None:
+        self._halted = True
+        with self._lock:
+            wrappers = list(self._wrappers)
+        for wrapper in wrappers:
+            wrapper.stop()
+
+    def estimate(self, inputs: List[str], presets) -> int:
+        """Mede cada arquivo por amostras, em sequencia, sem converter nada."""
+        wrapper = FFmpegWrapper(self.args.ffmpeg or self.config.get("ffmpeg_path") or None)
+        sampler = TrialSampler(wrapper)
+        estimates = []
+        try:
+            for path in inputs:
+                options = self.build_options(path, [""] * len(presets), presets)
+                estimate = sampler.estimate(options)
+                estimates.append(estimate)
+                if estimate is None:
+                    self.emitter.emit("estimate_error", input=path)
+                else:
+                    self.emitter.emit("estimate", input=path, preset=presets[0].name,
+                                      **{k: round(v, 2) if isinstance(v, float) else v
+                                         for k, v in estimate.to_dict().items()})
+        except KeyboardInterrupt:
+            sampler.stop()
+            self.emitter.emit("batch_cancelled")
+            return 130
+        total = combine_estimates(estimates)
+        measured = sum(1 for e in estimates if e is not None)
+        self.emitter.emit("estimate_done", files=len(inputs), measured=measured, size_bytes=total.size_bytes,
+                          encode_seconds=round(total.encode_seconds, 2),
+                          media_seconds=round(total.media_seconds, 2))
+        return 0 if measured == len(inputs) else 1
+
+    def run(self, inputs: List[str], presets) -> int:
+        ffmpeg_path = self.args.ffmpeg or self.config.get("ffmpeg_path") or None
+        jobs = self.args.jobs if self.args.jobs > 0 else default_batch_concurrency(
+            not self.args.no_hwaccel and FFmpegWrapper(ffmpeg_path).capabilities.nvenc)
+        self.emitter.emit("batch_start", total=len(inputs), jobs=jobs,
+                          preset=", ".join(preset.name for preset in presets))
+        self._queue, self._jobs = list(inputs), jobs
+        started = time.monotonic()
+        results = []
+        executor = ThreadPoolExecutor(max_workers=jobs)
+        try:
+            futures = [executor.submit(self.run_one, path, presets) for path in inputs]
+            for future in futures:
+                results.append(future.result())
+        except KeyboardInterrupt:
+            self.stop()
+            executor.shutdown(wait=True, cancel_futures=True)
+            self.emitter.emit("batch_cancelled")
+            return 130
+        executor.shutdown(wait=True)
+
+        ok = sum(1 for r in results if r == 0)
+        self.emitter.emit("batch_done", ok=ok, errors=len(results) - ok, total=len(inputs),
+                          elapsed=round(time.monotonic() - started, 2),
+                          cache_hits=self.cache_hits, cache_misses=self.cache_misses)
+        return 0 if ok == len(inputs) else 1
+
+
+def cmd_convert(args: argparse.Namespace, config: ConfigManager) -> int:
+    if args.preset:
+        presets = [_find_preset(config, name) for name in args.preset]
+        unknown = [name for name, preset in zip(args.preset, presets) if preset is None]
+        if unknown:
+            print(f"ERRO: preset desconhecido: {', '.join(unknown)} (veja o comando presets)",
+                  file=sys.stderr)
+            return 2
+    else:
+        presets = [_find_preset(config, config.get("last_preset", "")) or StreamingPresets.STREAMING]
+    inputs = _expand_inputs(args.inputs)
+    if not inputs:
+        print("ERRO: nenhum arquivo de entrada", file=sys.stderr)
+        return 2
+    if args.subtitle and len(inputs) > 1:
+        print("Aviso: --subtitle sera aplicada a todos os arquivos", file=sys.stderr)
+    if args.on_error is None:
+        args.on_error = config.get("batch_on_error", "continue")
+
+    if not FFmpegWrapper(args.ffmpeg or config.get("ffmpeg_path") or None).ffmpeg_path:
+        print("ERRO: FFmpeg nao encontrado", file=sys.stderr)
+        return 2
+
+    _configure_caches(config)
+    if args.estimate:
+        return BatchRunner(args, config, JsonEmitter()).estimate(inputs, presets)
+    configure_staging(args.scratch_dir or config.get("scratch_dir"),
+                      args.scratch_max_gb or config.get("scratch_max_gb", 50),
+                      config.get("scratch_network_only", True))
+    configure_readahead(args.readahead_mb if args.readahead_mb is not None
+                        else config.get("readahead_mb", 256))
+    configure_result_cache(config.get("result_cache_db") or str(config.data_path("results.db")),
+                           config.get("result_cache", True) and not args.no_result_cache)
+    return BatchRunner(args, config, JsonEmitter(), _open_history(config)).run(inputs, presets)
+
+
+def _open_history(config: ConfigManager) -> Optional[HistoryStore]:
+    try:
+        return HistoryStore(config.get("history_db") or str(config.data_path("history.db")))
+    except Exception as e:
+        print(f"Aviso: historico indisponivel: {e}", file=sys.stderr)
+        return None
+
+
+def cmd_history(args: argparse.Namespace, config: ConfigManager) -> int:
+    history = _open_history(config)
+    if history is None:
+        return 1
+    if args.summary:
+        rows = history.summary()
+    else:
+        rows = [t.to_dict() for t in history.recent(args.limit)]
+    for row in rows:
+        print(json.dumps(row, ensure_ascii=False))
+    history.close()
+    return 0
+
+
+def cmd_capabilities(args: argparse.Namespace, config: ConfigManager) -> int:
+    _configure_caches(config)
+    wrapper = FFmpegWrapper(args.ffmpeg or config.get("ffmpeg_path") or None)
+    caps = wrapper.capabilities
+    print(json.dumps({"ffmpeg": wrapper.ffmpeg_path, "nvenc": caps.nvenc, **caps.to_dict()},
+                     ensure_ascii=False))
+    return 0 if wrapper.ffmpeg_path else 2
+
+
+def cmd_presets(args: argparse.Namespace, config: ConfigManager) -> int:
+    for preset in list(StreamingPresets.get_all()) + config.get_custom_presets():
+        print(json.dumps({
+            "name": preset.name,
+            "resolution": preset.resolution,
+            "bitrate": preset.bitrate,
+            "audio_bitrate": preset.audio_bitrate
+        }, ensure_ascii=False))
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="hardsubforge-cli",
+                                     description="HardSubForge em modo headless (sem Qt).")
+    parser.add_argument("--config", default="config.json", help="Arquivo de configuracao")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    conv = sub.add_parser("convert", help="Converte um ou mais videos")
+    conv.add_argument("inputs", nargs="+", help="Arquivos de video ou pastas")
+    conv.add_argument("-p", "--preset", action="append",
+                      help="Nome do preset (padrao: ultimo usado); repetido, gera uma saida por "
+                           "preset com uma unica decodificacao (--bitrate vale so para o primeiro)")
+    conv.add_argument("-o", "--output-dir", help="Pasta de saida (padrao: pasta do video)")
+    conv.add_argument("--suffix", default="_converted", help="Sufixo do nome de saida")
+    conv.add_argument("-j", "--jobs", type=int, default=0, help="Conversoes simultaneas (0 = automatico)")
+    conv.add_argument("--segments", type=int, default=0,
+                      help="Trechos paralelos por video (0 = desligado)")
+    conv.add_argument("--on-error", choices=["continue", "stop"], help="Politica de erro do lote")
+    conv.add_argument("--ffmpeg", help="Caminho do executavel do FFmpeg")
+    conv.add_argument("--bitrate", help="Bitrate de video customizado (ex.: 3000k)")
+    conv.add_argument("--subtitle", help="Legenda externa (.srt/.ass/.ssa)")
+    conv.add_argument("--subtitle-stream", type=int, help="Indice da legenda embutida")
+    conv.add_argument("--no-auto-subtitle", action="store_true", help="Nao detectar legenda externa")
+    conv.add_argument("--burn", action="store_true", help="Queimar a legenda no video")
+    conv.add_argument("--watermark", default="", help="Texto do watermark")
+    conv.add_argument("--watermark-position", choices=["top", "center", "bottom"], default="top")
+    conv.add_argument("--watermark-size", type=int, default=22)
+    conv.add_argument("--audio-track", type=int, help="Indice da faixa de audio")
+    conv.add_argument("--copy-audio", action="store_true", help="Copiar audio sem reencode")
+    conv.add_argument("--no-stream-copy", action="store_true",
+                      help="Sempre reencodar o video (desativa a copia direta automatica)")
+    conv.add_argument("--no-metadata", action="store_true", help="Nao preservar metadados")
+    conv.add_argument("--output-strategy", choices=list(OUTPUT_STRATEGIES),
+                      help="Gravacao do MP4: auto (faststart local, fragmented em rede), faststart, "
+                           "fragmented ou reserve (padrao: configuracao)")
+    conv.add_argument("--scratch-dir",
+                      help="Pasta local de rascunho: entradas e saidas em rede sao copiadas para la "
+                           "e codificadas localmente (padrao: configuracao; vazio = desligado)")
+    conv.add_argument("--scratch-max-gb", type=float,
+                      help="Espaco maximo do rascunho em GB (padrao: configuracao)")
+    conv.add_argument("--readahead-mb", type=float,
+                      help="MB do proximo video lidos antecipadamente para o cache do sistema "
+                           "(0 = desligado; padrao: configuracao)")
+    conv.add_argument("--no-result-cache", action="store_true",
+                      help="Sempre codificar, sem reaproveitar saidas de conversoes identicas")
+    conv.add_argument("--no-hwaccel", action="store_true", help="Nao usar NVENC")
+    conv.add_argument("-v", "--verbose", action="store_true", help="Log do FFmpeg em stderr")
+    conv.add_argument("--estimate", action="store_true",
+                      help="Nao converte: codifica amostras e preve tamanho e tempo de cada arquivo")
+    conv.set_defaults(func=cmd_convert)
+
+    presets = sub.add_parser("presets", help="Lista os presets disponiveis")
+    presets.set_defaults(func=cmd_presets)
+
+    caps = sub.add_parser("capabilities", help="Lista encoders, filtros e hwaccels do FFmpeg")
+    caps.add_argument("--ffmpeg", help="Caminho do executavel do FFmpeg")
+    caps.set_defaults(func=cmd_capabilities)
+
+    history = sub.add_parser("history", help="Consulta o historico de conversoes")
+    history.add_argument("-n", "--limit", type=int, default=20, help="Quantidade de registros")
+    history.add_argument("--summary", action="store_true",
+                         help="Medias por preset/encoder em vez dos registros")
+    history.set_defaults(func=cmd_history)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Ponto de entrada da linha de comando."""
+    args = build_parser().parse_args(argv)
+    config = ConfigManager(args.config)
+    return args.func(args, config)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
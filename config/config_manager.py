@@ -19,7 +19,8 @@ class ConfigManager:
         return {
             "last_video_dir": "",
             "last_output_dir": "",
-            "last_preset": "Máxima Qualidade",
+            "last_preset": "Maxima Qualidade",
+            "extra_preset": "",
             "last_watermark_text": "",
             "watermark_position": "top",
             "watermark_size": 22,
@@ -27,10 +28,31 @@ class ConfigManager:
             "use_hardware_accel": True,
             "copy_audio": False,
             "preserve_metadata": True,
+            "stream_copy": "auto",
             "custom_presets": [],
             "auto_detect_subtitle": True,
             "audio_track": "all",
-            "batch_on_error": "continue"
+            "batch_on_error": "continue",
+            "batch_concurrency": 0,
+            "batch_prepare_ahead": 2,
+            "batch_prepare_workers": 2,
+            "batch_finalize_workers": 1,
+            "segment_workers": 0,
+            "job_queue_db": "",
+            "job_queue_retention_days": 30,
+            "probe_cache_db": "",
+            "probe_cache_persistent": True,
+            "history_db": "",
+            "subtitle_cache_dir": "",
+            "watermark_cache_dir": "",
+            "preview_cache_dir": "",
+            "output_strategy": "auto",
+            "scratch_dir": "",
+            "scratch_max_gb": 50,
+            "scratch_network_only": True,
+            "readahead_mb": 256,
+            "result_cache": True,
+            "result_cache_db": ""
         }
     
     def load(self):
@@ -51,6 +73,10 @@ class ConfigManager:
         except Exception as e:
             print(f"Erro ao salvar config: {e}")
     
+    def data_path(self, filename: str) -> Path:
+        """Retorna o caminho de um arquivo de dados ao lado do config."""
+        return self.config_path.with_name(filename)
+
     def get(self, key: str, default=None):
         """Retorna um valor de configuração."""
         return self.data.get(key, default)
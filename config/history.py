@@ -0,0 +1,104 @@
+"""Historico de conversoes (telemetria por job) em SQLite."""
+
+import sqlite3
+import threading
+from dataclasses import fields
+from pathlib import Path
+from typing import Any, Dict, List
+
+from ffmpeg.telemetry import JobTelemetry
+
+
+HISTORY_FIELDS = tuple(f.name for f in fields(JobTelemetry))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    input_path TEXT NOT NULL,
+    output_path TEXT NOT NULL,
+    preset TEXT NOT NULL DEFAULT '',
+    encoder TEXT NOT NULL DEFAULT '',
+    filters TEXT NOT NULL DEFAULT '',
+    returncode INTEGER NOT NULL DEFAULT 0,
+    started_at REAL NOT NULL,
+    wall_time REAL NOT NULL DEFAULT 0,
+    media_duration REAL NOT NULL DEFAULT 0,
+    frames INTEGER NOT NULL DEFAULT 0,
+    output_size INTEGER NOT NULL DEFAULT 0,
+    estimated_size INTEGER NOT NULL DEFAULT 0,
+    cpu_user REAL NOT NULL DEFAULT 0,
+    cpu_system REAL NOT NULL DEFAULT 0,
+    peak_rss_kb INTEGER NOT NULL DEFAULT 0,
+    output_strategy TEXT NOT NULL DEFAULT '',
+    tail_time REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_conversions_started ON conversions(started_at);
+"""
+
+# Colunas acrescentadas depois da primeira versao (bancos antigos recebem ALTER TABLE)
+_ADDED_COLUMNS = {
+    "output_strategy": "TEXT NOT NULL DEFAULT ''",
+    "tail_time": "REAL NOT NULL DEFAULT 0",
+}
+
+
+class HistoryStore:
+    """Guarda um registro por conversao para consulta e planejamento de capacidade.
+
+    Conversoes com erro tambem sao gravadas (``returncode`` != 0); o resumo
+    por preset/encoder considera apenas as concluidas.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(conversions)")}
+            for name, ddl in _ADDED_COLUMNS.items():
+                if name not in columns:
+                    self._conn.execute(f"ALTER TABLE conversions ADD COLUMN {name} {ddl}")
+
+    def record(self, telemetry: JobTelemetry) -> None:
+        """Grava a telemetria de uma conversao."""
+        values = [getattr(telemetry, name) for name in HISTORY_FIELDS]
+        placeholders = ", ".join("?" for _ in HISTORY_FIELDS)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT INTO conversions ({', '.join(HISTORY_FIELDS)}) VALUES ({placeholders})", values)
+
+    def recent(self, limit: int = 50) -> List[JobTelemetry]:
+        """Ultimas conversoes, da mais recente para a mais antiga."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM conversions ORDER BY started_at DESC LIMIT ?", (limit,)).fetchall()
+        return [JobTelemetry(**{name: row[name] for name in HISTORY_FIELDS}) for row in rows]
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Medias por preset, encoder e estrategia de gravacao das conversoes concluidas."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT preset, encoder, output_strategy, COUNT(*) AS jobs,"
+                " SUM(media_duration) AS media_seconds, SUM(wall_time) AS wall_seconds,"
+                " SUM(media_duration) / NULLIF(SUM(wall_time), 0) AS realtime_factor,"
+                " SUM(frames) / NULLIF(SUM(wall_time), 0) AS avg_fps,"
+                " SUM(cpu_user + cpu_system) / NULLIF(SUM(media_duration), 0) AS cpu_per_media_second,"
+                " AVG(CASE WHEN estimated_size > 0 THEN 1.0 * output_size / estimated_size END) AS size_ratio,"
+                " MAX(peak_rss_kb) AS peak_rss_kb,"
+                " SUM(output_size) / NULLIF(SUM(wall_time), 0) AS write_throughput,"
+                " AVG(tail_time) AS avg_tail_time"
+                " FROM conversions WHERE returncode = 0"
+                " GROUP BY preset, encoder, output_strategy ORDER BY jobs DESC").fetchall()
+        return [dict(row) for row in rows]
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM conversions")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,157 @@
+"""Fila de processamento persistente em SQLite."""
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+JOB_FIELDS = (
+    "path", "status", "output_path", "output_name", "error_msg", "subtitle_path",
+    "subtitle_stream_index", "subtitle_burn", "audio_track_index", "detected_external",
+    "partial_paths"
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    output_path TEXT NOT NULL DEFAULT '',
+    output_name TEXT NOT NULL DEFAULT '',
+    error_msg TEXT NOT NULL DEFAULT '',
+    subtitle_path TEXT NOT NULL DEFAULT '',
+    subtitle_stream_index INTEGER,
+    subtitle_burn INTEGER NOT NULL DEFAULT 0,
+    audio_track_index INTEGER,
+    detected_external TEXT NOT NULL DEFAULT '',
+    partial_paths TEXT NOT NULL DEFAULT '[]',
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status);
+CREATE INDEX IF NOT EXISTS idx_jobs_path ON jobs(path);
+"""
+
+# Colunas acrescentadas depois da primeira versao (bancos antigos recebem ALTER TABLE)
+_ADDED_COLUMNS = {
+    "partial_paths": "TEXT NOT NULL DEFAULT '[]'",
+}
+
+
+class JobStore:
+    """Guarda os itens da fila para sobreviver a crashes e reinicios.
+
+    Cada mudanca de status e gravada em uma transacao com fsync no commit
+    (``synchronous=FULL``): com o NORMAL do WAL, uma queda de energia pode
+    desfazer o ultimo "done" e a retomada apagaria como parcial uma saida ja
+    completa. Ao reabrir, os itens concluidos sao ignorados e os que estavam
+    em conversao voltam para 'pending'. Os itens sao lidos/escritos por atributo (BatchItem), com o id
+    da linha guardado em ``item.job_id``. Itens concluidos ou com erro ha
+    mais de ``retention_days`` dias sao apagados ao abrir (0 mantem todos).
+    """
+
+    def __init__(self, db_path: str, retention_days: float = 30):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=FULL")
+            self._conn.executescript(_SCHEMA)
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            for name, ddl in _ADDED_COLUMNS.items():
+                if name not in columns:
+                    self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {ddl}")
+        if retention_days > 0:
+            self.purge(retention_days)
+
+    def _values(self, item: Any) -> Dict[str, Any]:
+        values = {name: getattr(item, name, None) for name in JOB_FIELDS}
+        values["subtitle_burn"] = int(bool(values["subtitle_burn"]))
+        for name in ("output_path", "output_name", "error_msg", "subtitle_path", "detected_external"):
+            values[name] = values[name] or ""
+        values["status"] = values["status"] or "pending"
+        values["partial_paths"] = json.dumps(list(values["partial_paths"] or []), ensure_ascii=False)
+        return values
+
+    def add(self, item: Any) -> int:
+        """Insere o item na fila e retorna o id da linha."""
+        values = self._values(item)
+        now = time.time()
+        columns = ", ".join(JOB_FIELDS)
+        placeholders = ", ".join(f":{name}" for name in JOB_FIELDS)
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                f"INSERT INTO jobs ({columns}, created_at, updated_at) "
+                f"VALUES ({placeholders}, :now, :now)", {**values, "now": now})
+        item.job_id = cur.lastrowid
+        return item.job_id
+
+    def update(self, item: Any) -> None:
+        """Grava o estado atual do item (status, saida, legenda, audio)."""
+        job_id = getattr(item, "job_id", None)
+        if job_id is None:
+            return
+        values = self._values(item)
+        assignments = ", ".join(f"{name} = :{name}" for name in JOB_FIELDS)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE jobs SET {assignments}, updated_at = :now WHERE id = :id",
+                {**values, "now": time.time(), "id": job_id})
+
+    def remove(self, job_id: Optional[int]) -> None:
+        if job_id is None:
+            return
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def clear(self) -> None:
+        """Remove todos os itens que ainda nao foram concluidos."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM jobs WHERE status != 'done'")
+
+    def purge(self, older_than_days: float) -> int:
+        """Apaga itens concluidos ou com erro sem mudanca ha mais de ``older_than_days`` dias."""
+        cutoff = time.time() - older_than_days * 86400
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'error') AND updated_at < ?", (cutoff,))
+        return cur.rowcount
+
+    def load_unfinished(self) -> List[Dict[str, Any]]:
+        """Retorna os itens a retomar, re-enfileirando os que foram interrompidos.
+
+        Itens com status 'converting' sao de uma sessao que caiu no meio da
+        conversao: voltam para 'pending' e as saidas parciais sao descartadas.
+        So sao apagados os arquivos que o job criou (``partial_paths``, os que
+        ainda nao existiam quando ele comecou), nunca um ``output_path`` que
+        ja estava la antes.
+        """
+        with self._lock, self._conn:
+            interrupted = self._conn.execute(
+                "SELECT id, partial_paths FROM jobs WHERE status = 'converting'").fetchall()
+            for row in interrupted:
+                try:
+                    partials = json.loads(row["partial_paths"] or "[]")
+                except ValueError:
+                    partials = []
+                for path in partials:
+                    try:
+                        Path(path).unlink(missing_ok=True)
+                    except OSError:
+                        pass
+            self._conn.execute(
+                "UPDATE jobs SET status = 'pending', output_path = '', partial_paths = '[]', "
+                "updated_at = ? WHERE status = 'converting'", (time.time(),))
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE status = 'pending' ORDER BY id").fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
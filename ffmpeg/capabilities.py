@@ -0,0 +1,133 @@
+"""Recursos do binario do FFmpeg (encoders, filtros e hwaccels), com cache em disco."""
+
+import platform
+import subprocess
+import threading
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from ffmpeg.probe_cache import ProbeCache, shared_probe_cache
+from utils.helpers import check_nvidia_gpu, file_identity
+
+
+# Chave no ProbeCache: o cache ja invalida por (caminho, tamanho, mtime_ns) do binario.
+CAPABILITIES_CACHE_KIND = "capabilities.v1"
+
+
+def _run(ffmpeg_path: str, flag: str) -> str:
+    creation_flags = subprocess.CREATE_NO_WINDOW if platform.system() == "Windows" else 0
+    try:
+        result = subprocess.run([ffmpeg_path, "-hide_banner", flag], capture_output=True, text=True,
+                                encoding="utf-8", errors="replace", timeout=10,
+                                creationflags=creation_flags)
+        return result.stdout if result.returncode == 0 else ""
+    except (OSError, subprocess.TimeoutExpired):
+        return ""
+
+
+def parse_encoders(output: str) -> List[str]:
+    """Nomes da listagem ``-encoders`` (linhas apos o separador ``------``)."""
+    names, started = [], False
+    for line in output.splitlines():
+        if not started:
+            started = line.strip().startswith("---")
+            continue
+        parts = line.split()
+        if len(parts) >= 2:
+            names.append(parts[1])
+    return names
+
+
+def parse_filters(output: str) -> List[str]:
+    """Nomes da listagem ``-filters`` (linhas com ``entrada->saida``)."""
+    names = []
+    for line in output.splitlines():
+        parts = line.split()
+        if len(parts) >= 3 and "->" in parts[2]:
+            names.append(parts[1])
+    return names
+
+
+def parse_hwaccels(output: str) -> List[str]:
+    """Metodos da listagem ``-hwaccels``."""
+    lines = [line.strip() for line in output.splitlines() if line.strip()]
+    if lines and lines[0].endswith(":"):
+        lines = lines[1:]
+    return lines
+
+
+class Capabilities:
+    """O que o binario do FFmpeg suporta, para consultas rapidas."""
+
+    __slots__ = ("encoders", "filters", "hwaccels", "nvidia_gpu")
+
+    def __init__(self, encoders: Iterable[str] = (), filters: Iterable[str] = (),
+                 hwaccels: Iterable[str] = (), nvidia_gpu: bool = False):
+        self.encoders: FrozenSet[str] = frozenset(encoders)
+        self.filters: FrozenSet[str] = frozenset(filters)
+        self.hwaccels: FrozenSet[str] = frozenset(hwaccels)
+        self.nvidia_gpu = nvidia_gpu
+
+    @property
+    def known(self) -> bool:
+        """False quando a listagem falhou (nao da para afirmar que algo falta)."""
+        return bool(self.encoders and self.filters)
+
+    def has_encoder(self, name: str) -> bool:
+        return not self.known or name in self.encoders
+
+    def has_filter(self, name: str) -> bool:
+        return not self.known or name in self.filters
+
+    def has_hwaccel(self, name: str) -> bool:
+        return name in self.hwaccels
+
+    @property
+    def nvenc(self) -> bool:
+        """GPU NVIDIA presente e FFmpeg compilado com h264_nvenc."""
+        return self.nvidia_gpu and self.has_encoder("h264_nvenc")
+
+    @property
+    def cuda_decode(self) -> bool:
+        return self.nvenc and self.has_hwaccel("cuda")
+
+    def missing_filters(self, names: Iterable[str]) -> List[str]:
+        return sorted({name for name in names if not self.has_filter(name)})
+
+    def to_dict(self) -> Dict[str, List[str]]:
+        return {"encoders": sorted(self.encoders), "filters": sorted(self.filters),
+                "hwaccels": sorted(self.hwaccels)}
+
+
+_memo: Dict[Tuple, Capabilities] = {}
+_memo_lock = threading.Lock()
+
+
+def get_capabilities(ffmpeg_path: Optional[str], cache: Optional[ProbeCache] = None) -> Capabilities:
+    """Capacidades do binario, consultadas uma unica vez por versao do arquivo.
+
+    A listagem fica no ProbeCache (persistente entre sessoes); a deteccao da
+    GPU (nvidia-smi) roda uma vez por processo.
+    """
+    if not ffmpeg_path:
+        return Capabilities()
+    identity = file_identity(ffmpeg_path)
+    with _memo_lock:
+        if identity is not None and identity in _memo:
+            return _memo[identity]
+
+    cache = cache or shared_probe_cache()
+    data = cache.get(ffmpeg_path, CAPABILITIES_CACHE_KIND)
+    if data is None:
+        data = {
+            "encoders": parse_encoders(_run(ffmpeg_path, "-encoders")),
+            "filters": parse_filters(_run(ffmpeg_path, "-filters")),
+            "hwaccels": parse_hwaccels(_run(ffmpeg_path, "-hwaccels")),
+        }
+        if data["encoders"] and data["filters"]:
+            cache.put(ffmpeg_path, CAPABILITIES_CACHE_KIND, data)
+
+    caps = Capabilities(data["encoders"], data["filters"], data["hwaccels"], check_nvidia_gpu())
+    if identity is not None:
+        with _memo_lock:
+            _memo[identity] = caps
+    return caps
@@ -0,0 +1,119 @@
+"""Base dos caches de arquivos gerados pelo FFmpeg (legendas, watermarks, previews)."""
+
+import hashlib
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Hashable, List, Optional, Type, TypeVar
+
+
+class FileCache:
+    """Um arquivo por chave em ``directory``, gerado uma vez e reaproveitado.
+
+    O nome do arquivo e o SHA-1 da chave, entao tudo que muda o resultado
+    precisa estar nela. Geracoes simultaneas da mesma chave esperam a
+    primeira terminar; o arquivo e gravado em ``.part`` e so entra no cache
+    (``os.replace``) se o comando terminar bem. Cada uso atualiza o mtime e,
+    acima de ``max_files``, os usados ha mais tempo sao removidos.
+
+    Subclasses definem ``suffix``, a pasta e o limite padrao do cache
+    compartilhado e a mensagem de erro, e montam a chave e o comando.
+    """
+
+    suffix = ""
+    default_dirname = "hardsubforge_cache"
+    default_max_files = 100
+    error_message = "Erro ao gerar arquivo do cache"
+
+    def __init__(self, directory: str, max_files: Optional[int] = None):
+        self.directory = Path(directory)
+        self.max_files = self.default_max_files if max_files is None else max_files
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _path_for(self, key: Optional[Hashable]) -> Optional[Path]:
+        if key is None:
+            return None
+        return self.directory / f"{hashlib.sha1(repr(key).encode('utf-8')).hexdigest()}{self.suffix}"
+
+    def _cached(self, key: Optional[Hashable]) -> Optional[str]:
+        """Caminho do arquivo da chave, ou None (marca como usado recentemente)."""
+        path = self._path_for(key)
+        if path is None or not path.exists():
+            return None
+        try:
+            os.utime(path)  # LRU por mtime
+        except OSError:
+            pass
+        return str(path)
+
+    def _produce(self, key: Optional[Hashable], build_command: Callable[[str], List[str]],
+                 run: Callable[[List[str]], int]) -> Optional[str]:
+        """Gera o arquivo da chave (se ainda nao existir) e retorna o caminho.
+
+        ``build_command`` recebe o caminho temporario de saida e retorna o
+        comando do FFmpeg; ``run`` o executa e retorna o returncode, para o
+        chamador poder cancelar o processo.
+        """
+        path = self._path_for(key)
+        if path is None:
+            return None
+        with self._locks_guard:
+            lock = self._locks.setdefault(path.name, threading.Lock())
+        with lock:
+            cached = self._cached(key)
+            if cached:
+                return cached
+            self.directory.mkdir(parents=True, exist_ok=True)
+            partial = path.with_suffix(".part")
+            try:
+                if run(build_command(str(partial))) != 0 or not partial.exists():
+                    return None
+                os.replace(partial, path)
+            except Exception as e:
+                print(f"{self.error_message}: {e}")
+                return None
+            finally:
+                partial.unlink(missing_ok=True)
+        self.prune()
+        return str(path)
+
+    def prune(self) -> None:
+        """Remove os arquivos usados ha mais tempo acima do limite."""
+        try:
+            files = sorted(self.directory.glob(f"*{self.suffix}"), key=lambda p: p.stat().st_mtime)
+        except OSError:
+            return
+        for old in files[:max(len(files) - self.max_files, 0)]:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+
+
+CacheT = TypeVar("CacheT", bound=FileCache)
+
+_shared_caches: Dict[type, FileCache] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_file_cache(cls: Type[CacheT]) -> CacheT:
+    """Cache ``cls`` compartilhado por todos os FFmpegWrapper do processo.
+
+    Sem ``configure_file_cache``, usa a pasta padrao da classe no temporario.
+    """
+    with _shared_lock:
+        cache = _shared_caches.get(cls)
+        if cache is None:
+            cache = cls(os.path.join(tempfile.gettempdir(), cls.default_dirname))
+            _shared_caches[cls] = cache
+        return cache
+
+
+def configure_file_cache(cls: Type[CacheT], directory: str, max_files: Optional[int] = None) -> CacheT:
+    """Recria o cache compartilhado ``cls`` na pasta indicada."""
+    with _shared_lock:
+        cache = cls(directory, max_files=max_files)
+        _shared_caches[cls] = cache
+        return cache
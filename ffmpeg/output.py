@@ -0,0 +1,78 @@
+"""Estrategias de gravacao do MP4 (posicao do indice ``moov``)."""
+
+import time
+from typing import List, Optional, Tuple
+
+from ffmpeg.probe import ProbeResult
+from utils.helpers import is_network_path
+
+
+# Valores de ConversionOptions.output_strategy
+OUTPUT_AUTO = "auto"
+OUTPUT_FASTSTART = "faststart"
+OUTPUT_FRAGMENTED = "fragmented"
+OUTPUT_RESERVE = "reserve"
+OUTPUT_STRATEGIES = (OUTPUT_AUTO, OUTPUT_FASTSTART, OUTPUT_FRAGMENTED, OUTPUT_RESERVE)
+
+# Bytes de indice por amostra no pior caso (stsz + stts + ctts + stco) e folga
+_VIDEO_SAMPLE_BYTES = 24
+_AUDIO_SAMPLE_BYTES = 16
+_MOOV_BASE_BYTES = 256 * 1024
+
+
+def resolve_strategy(strategy: str, output_path: str) -> Tuple[str, str]:
+    """Estrategia efetiva e o motivo; ``auto`` so usa faststart em disco local.
+
+    O faststart regrava o arquivo inteiro no fim para mover o ``moov`` para o
+    inicio; em compartilhamentos de rede isso dobra a escrita, entao ``auto``
+    grava fragmentado, que nao depende de estimativa nem de segunda passada.
+    O ``reserve`` so vale quando escolhido: se a estimativa do ``moov`` ficar
+    curta, o FFmpeg so falha no fim do job.
+    """
+    if strategy not in OUTPUT_STRATEGIES or strategy == OUTPUT_AUTO:
+        if is_network_path(output_path):
+            return OUTPUT_FRAGMENTED, "auto, destino em rede"
+        return OUTPUT_FASTSTART, "auto, disco local"
+    return strategy, "escolhida"
+
+
+def estimate_moov_size(probe: ProbeResult, audio_tracks: int) -> int:
+    """Espaco a reservar para o ``moov`` (com folga; se faltar, o FFmpeg falha no fim)."""
+    fps = probe.fps if probe.fps > 0 else 60.0
+    video_samples = probe.duration * fps
+    # AAC: 1024 amostras por quadro a ate 48 kHz
+    audio_samples = probe.duration * 48000 / 1024 * max(audio_tracks, 0)
+    size = video_samples * _VIDEO_SAMPLE_BYTES + audio_samples * _AUDIO_SAMPLE_BYTES
+    return int(size * 1.25) + _MOOV_BASE_BYTES
+
+
+def movflags_args(strategy: str, probe: ProbeResult, audio_tracks: int) -> List[str]:
+    """Argumentos do muxer MP4 para a estrategia (ja resolvida)."""
+    if strategy == OUTPUT_FRAGMENTED:
+        return ["-movflags", "+frag_keyframe+empty_moov+default_base_moof"]
+    if strategy == OUTPUT_RESERVE and probe.duration > 0:
+        return ["-moov_size", str(estimate_moov_size(probe, audio_tracks))]
+    return ["-movflags", "+faststart"]
+
+
+class TailTimer:
+    """Mede o tempo entre o ultimo progresso e o fim do processo.
+
+    O bloco final do ``-progress`` so chega depois do trailer; o que sobra
+    depois do ultimo bloco intermediario e a finalizacao do arquivo (com
+    faststart, a regravacao inteira do MP4).
+    """
+
+    __slots__ = ("_last", "seconds")
+
+    def __init__(self):
+        self._last: Optional[float] = None
+        self.seconds = 0.0
+
+    def mark(self) -> None:
+        self._last = time.monotonic()
+
+    def finish(self) -> float:
+        """Chamado quando o processo termina; guarda e retorna o tempo de cauda."""
+        self.seconds = time.monotonic() - self._last if self._last is not None else 0.0
+        return self.seconds
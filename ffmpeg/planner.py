@@ -0,0 +1,94 @@
+"""Planejamento da conversao: copia direta do video e geometria dos filtros."""
+
+from typing import List, Tuple
+
+from ffmpeg.probe import ProbeResult
+from utils.helpers import parse_bitrate_kbps
+
+
+# Valores de ConversionOptions.stream_copy
+STREAM_COPY_AUTO = "auto"
+STREAM_COPY_OFF = "off"
+
+# Formatos que tocam em qualquer player com o perfil high do H.264
+_COPY_PIX_FMTS = ("yuv420p", "yuvj420p")
+_COPY_PROFILES = ("constrained baseline", "baseline", "main", "high")
+
+
+class VideoPlan:
+    """Decisao para o stream de video: copiar (remux) ou reencodar."""
+
+    __slots__ = ("copy", "reason")
+
+    def __init__(self, copy: bool, reason: str):
+        self.copy = copy
+        self.reason = reason
+
+    def describe(self) -> str:
+        action = "copia direta (sem reencode)" if self.copy else "reencode"
+        return f"Video: {action} - {self.reason}"
+
+
+def parse_resolution(resolution: str) -> Tuple[int, int]:
+    """Converte "1280:720" em (1280, 720); (0, 0) se invalida."""
+    width, _, height = resolution.partition(":")
+    try:
+        return int(width), int(height)
+    except ValueError:
+        return 0, 0
+
+
+def plan_geometry(probe: ProbeResult, resolution: str) -> List[str]:
+    """Filtros de escala e pad (nessa ordem) para levar a origem a ``resolution``.
+
+    Vem antes de qualquer desenho (watermark e legenda), que assim sempre
+    enxergam o quadro final. So o que e identidade sai da cadeia: origem ja
+    no tamanho final (nada) ou na mesma proporcao (o pad nao acrescentaria
+    borda). Sem probe, usa a cadeia completa.
+    """
+    width, height = parse_resolution(resolution)
+    if probe.has_video and (probe.width, probe.height) == (width, height):
+        return []
+    if probe.has_video and probe.width * height == probe.height * width:
+        # Mesma proporcao: a escala ja chega exatamente no tamanho final
+        return [f"scale={width}:{height}"]
+    return [f"scale={resolution}:force_original_aspect_ratio=decrease",
+            f"pad={resolution}:(ow-iw)/2:(oh-ih)/2"]
+
+
+def plan_video(options, probe: ProbeResult) -> VideoPlan:
+    """Verifica se a origem ja atende o preset e nada precisa ser desenhado no video.
+
+    A copia exige: nenhum filtro (legenda queimada ou watermark), H.264 8 bits
+    4:2:0 com perfil comum, resolucao e bitrate dentro do alvo do preset.
+    """
+    if options.stream_copy == STREAM_COPY_OFF:
+        return VideoPlan(False, "copia direta desativada")
+    if options.renditions:
+        return VideoPlan(False, f"{len(options.renditions) + 1} saidas com decodificacao unica")
+    if options.subtitle_burn and (options.subtitle_path or options.subtitle_stream_index is not None):
+        return VideoPlan(False, "legenda queimada")
+    if options.watermark_text:
+        return VideoPlan(False, "watermark")
+    if not probe.has_video:
+        return VideoPlan(False, "origem nao sondada")
+    if probe.video_codec != "h264":
+        return VideoPlan(False, f"codec de origem {probe.video_codec or 'desconhecido'}")
+    if probe.pix_fmt not in _COPY_PIX_FMTS:
+        return VideoPlan(False, f"formato de pixel {probe.pix_fmt or 'desconhecido'}")
+    if probe.video_profile and probe.video_profile.lower() not in _COPY_PROFILES:
+        return VideoPlan(False, f"perfil H.264 {probe.video_profile}")
+
+    max_width, max_height = parse_resolution(options.preset.resolution)
+    if probe.width > max_width or probe.height > max_height:
+        return VideoPlan(False, f"{probe.width}x{probe.height} acima de {max_width}x{max_height}")
+
+    target_kbps = parse_bitrate_kbps(options.custom_bitrate or options.preset.bitrate)
+    # Sem bitrate do stream (comum em MKV), usa o total do arquivo como teto
+    source_kbps = (probe.video_bitrate or probe.bitrate) // 1000
+    if not source_kbps:
+        return VideoPlan(False, "bitrate de origem desconhecido")
+    if source_kbps > target_kbps:
+        return VideoPlan(False, f"{source_kbps}kbps acima de {target_kbps}kbps")
+
+    return VideoPlan(True, f"H.264 {probe.width}x{probe.height} @ {source_kbps}kbps ja atende o preset")
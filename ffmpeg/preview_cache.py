@@ -0,0 +1,32 @@
+"""Cache de previews (quadro unico ou folha de contato) em JPEG."""
+
+from typing import Callable, Hashable, List, Optional
+
+from ffmpeg.file_cache import FileCache
+
+
+class PreviewCache(FileCache):
+    """Guarda os previews ja gerados, um JPEG por chave.
+
+    A chave vem do ``FFmpegWrapper`` e reune tudo que muda a imagem: a
+    identidade do video (caminho, tamanho, mtime_ns), as opcoes que entram no
+    grafo de filtros e os instantes capturados. Voltar a um texto de
+    watermark ou legenda ja visto reabre o arquivo sem chamar o FFmpeg.
+    """
+
+    suffix = ".jpg"
+    default_dirname = "hardsubforge_previews"
+    error_message = "Erro ao gerar preview"
+
+    def lookup(self, key: Hashable) -> Optional[str]:
+        """Caminho do preview ja gerado, ou None."""
+        return self._cached(key)
+
+    def render(self, key: Hashable, build_command: Callable[[str], List[str]],
+               run: Callable[[List[str]], int]) -> Optional[str]:
+        """Gera o preview (se ainda nao existir) e retorna o caminho.
+
+        ``build_command`` recebe o caminho temporario de saida e retorna o
+        comando do FFmpeg; o arquivo so entra no cache se o comando terminar bem.
+        """
+        return self._produce(key, build_command, run)
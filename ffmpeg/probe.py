@@ -0,0 +1,181 @@
+"""Resultado tipado de uma sondagem unica do ffprobe."""
+
+from typing import Any, Dict, List, Optional
+
+from utils.helpers import get_language_name, is_text_subtitle
+
+
+# Apenas os campos usados pela aplicacao: um unico ffprobe por arquivo, JSON enxuto.
+PROBE_ENTRIES = (
+    "format=duration,bit_rate"
+    ":stream=index,codec_type,codec_name,profile,pix_fmt,width,height,avg_frame_rate,r_frame_rate,bit_rate,channels"
+    ":stream_tags=language,title"
+    ":stream_disposition=default,forced,hearing_impaired,visual_impaired"
+)
+
+# Chave do ProbeResult no ProbeCache; mude ao adicionar campos para invalidar o cache antigo.
+PROBE_CACHE_KIND = "probe.v2"
+
+
+def _parse_rate(rate: str) -> float:
+    """Converte '24000/1001' em 23.976..."""
+    if not rate:
+        return 0.0
+    num, _, den = rate.partition("/")
+    try:
+        num_f = float(num)
+        den_f = float(den) if den else 1.0
+    except ValueError:
+        return 0.0
+    return num_f / den_f if den_f else 0.0
+
+
+def _to_int(value: Any) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+class AudioTrack:
+    """Faixa de audio."""
+
+    __slots__ = ("index", "codec", "language", "channels", "title")
+
+    def __init__(self, index: int, codec: str, language: str, channels: int, title: str):
+        self.index = index
+        self.codec = codec
+        self.language = language
+        self.channels = channels
+        self.title = title
+
+
+class SubtitleTrack:
+    """Faixa de legenda."""
+
+    __slots__ = ("index", "codec", "language", "kind", "title")
+
+    def __init__(self, index: int, codec: str, language: str, kind: str, title: str):
+        self.index = index
+        self.codec = codec
+        self.language = language
+        self.kind = kind
+        self.title = title
+
+    @property
+    def is_text(self) -> bool:
+        return is_text_subtitle(self.codec)
+
+
+class ProbeResult:
+    """Metadados de um arquivo de video obtidos em uma unica chamada ao ffprobe."""
+
+    __slots__ = ("duration", "width", "height", "fps", "video_codec", "video_profile", "pix_fmt",
+                 "video_bitrate", "bitrate", "audio", "subtitles")
+
+    def __init__(self, duration: float = 0.0, width: int = 0, height: int = 0, fps: float = 0.0,
+                 video_codec: str = "", video_profile: str = "", pix_fmt: str = "",
+                 video_bitrate: int = 0, bitrate: int = 0,
+                 audio: Optional[List[AudioTrack]] = None,
+                 subtitles: Optional[List[SubtitleTrack]] = None):
+        self.duration = duration
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.video_codec = video_codec
+        self.video_profile = video_profile
+        self.pix_fmt = pix_fmt
+        self.video_bitrate = video_bitrate
+        self.bitrate = bitrate
+        self.audio = audio or []
+        self.subtitles = subtitles or []
+
+    @property
+    def has_video(self) -> bool:
+        return self.width > 0 and self.height > 0
+
+    @property
+    def text_subtitles(self) -> List[SubtitleTrack]:
+        """Legendas de texto (queimaveis pelo filtro subtitles)."""
+        return [s for s in self.subtitles if s.is_text]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Converte para dicionario (para o cache persistente)."""
+        return {
+            "duration": self.duration, "width": self.width, "height": self.height,
+            "fps": self.fps, "video_codec": self.video_codec,
+            "video_profile": self.video_profile, "pix_fmt": self.pix_fmt,
+            "video_bitrate": self.video_bitrate, "bitrate": self.bitrate,
+            "audio": [[a.index, a.codec, a.language, a.channels, a.title] for a in self.audio],
+            "subtitles": [[s.index, s.codec, s.language, s.kind, s.title] for s in self.subtitles],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ProbeResult':
+        """Cria um resultado a partir de um dicionario."""
+        return cls(
+            duration=data.get("duration", 0.0), width=data.get("width", 0),
+            height=data.get("height", 0), fps=data.get("fps", 0.0),
+            video_codec=data.get("video_codec", ""), video_profile=data.get("video_profile", ""),
+            pix_fmt=data.get("pix_fmt", ""), video_bitrate=data.get("video_bitrate", 0),
+            bitrate=data.get("bitrate", 0),
+            audio=[AudioTrack(*a) for a in data.get("audio", [])],
+            subtitles=[SubtitleTrack(*s) for s in data.get("subtitles", [])],
+        )
+
+
+def _subtitle_kind(disposition: Dict[str, int], title_tag: str) -> str:
+    if disposition.get("forced", 0) == 1 or "forced" in title_tag:
+        return "Forcada"
+    if disposition.get("visual_impaired", 0) == 1 or "descriptive" in title_tag:
+        return "AD"
+    if disposition.get("hearing_impaired", 0) == 1 or "sdh" in title_tag:
+        return "SDH"
+    if disposition.get("default", 0) == 1:
+        return "Padrao"
+    return "Normal"
+
+
+def parse_probe(data: Dict[str, Any]) -> ProbeResult:
+    """Monta um ProbeResult a partir do JSON do ffprobe."""
+    fmt = data.get("format", {})
+    result = ProbeResult(
+        duration=float(fmt.get("duration", 0) or 0),
+        bitrate=_to_int(fmt.get("bit_rate"))
+    )
+
+    for s in data.get("streams", []):
+        codec_type = s.get("codec_type", "")
+        index = s.get("index", 0)
+        codec = s.get("codec_name", "unk").upper()
+        tags = s.get("tags", {})
+
+        if codec_type == "video" and not result.has_video:
+            result.width = _to_int(s.get("width"))
+            result.height = _to_int(s.get("height"))
+            result.fps = _parse_rate(s.get("avg_frame_rate", "")) or _parse_rate(s.get("r_frame_rate", ""))
+            result.video_codec = codec.lower()
+            result.video_profile = s.get("profile", "")
+            result.pix_fmt = s.get("pix_fmt", "")
+            result.video_bitrate = _to_int(s.get("bit_rate"))
+            continue
+
+        lang_code = tags.get("language") or tags.get("title") or ""
+        lang_name = get_language_name(lang_code) if lang_code else ""
+
+        if codec_type == "audio":
+            channels = _to_int(s.get("channels"))
+            if not lang_name:
+                lang_name = f"{channels or 'unknown'} Canais"
+            result.audio.append(AudioTrack(
+                index, codec, lang_name, channels, f"Track {index}: {lang_name} ({codec})"))
+
+        elif codec_type == "subtitle":
+            if not lang_name:
+                lang_name = codec
+            kind = _subtitle_kind(s.get("disposition", {}), tags.get("title", "").lower())
+            result.subtitles.append(SubtitleTrack(
+                index, codec.lower(), lang_name, kind,
+                f"Track {index}: {lang_name} ({codec}) [{kind}]"))
+
+    return result
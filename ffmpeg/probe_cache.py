@@ -0,0 +1,149 @@
+"""Cache de resultados do ffprobe por identidade de arquivo."""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional, Tuple
+
+from utils.helpers import file_identity
+
+
+class ProbeCache:
+    """Cache LRU em memoria com persistencia opcional em SQLite.
+
+    A chave e (caminho, tamanho, mtime_ns): qualquer alteracao no arquivo
+    invalida a entrada sem precisar de verificacao explicita. ``kind``
+    separa os tipos de resultado guardados para o mesmo arquivo.
+
+    Ao abrir o banco, linhas sem uso ha mais de ``max_age_days`` dias saem e
+    a tabela fica com no maximo ``max_rows`` linhas (as usadas por ultimo),
+    ja que arquivos apagados ou movidos nunca invalidam a propria entrada.
+    """
+
+    def __init__(self, max_entries: int = 4096, db_path: Optional[str] = None,
+                 max_rows: int = 50000, max_age_days: float = 90):
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.max_age_days = max_age_days
+        self._entries: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self.hits = 0
+        self.misses = 0
+        if db_path:
+            self._open_db(db_path)
+
+    def _open_db(self, db_path: str) -> None:
+        try:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            with self._conn:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS probes ("
+                    " path TEXT NOT NULL, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL,"
+                    " kind TEXT NOT NULL, data TEXT NOT NULL, accessed_at REAL NOT NULL,"
+                    " PRIMARY KEY (path, size, mtime_ns, kind))")
+                self._conn.execute("CREATE INDEX IF NOT EXISTS idx_probes_accessed ON probes(accessed_at)")
+            self._prune()
+        except sqlite3.Error as e:
+            print(f"Erro ao abrir cache de probe: {e}")
+            self._conn = None
+
+    def _prune(self) -> None:
+        with self._conn:
+            if self.max_age_days > 0:
+                self._conn.execute("DELETE FROM probes WHERE accessed_at < ?",
+                                   (time.time() - self.max_age_days * 86400,))
+            if self.max_rows > 0:
+                self._conn.execute(
+                    "DELETE FROM probes WHERE rowid NOT IN "
+                    "(SELECT rowid FROM probes ORDER BY accessed_at DESC LIMIT ?)", (self.max_rows,))
+
+    def get(self, path: str, kind: str) -> Optional[Any]:
+        """Retorna o resultado guardado ou None se o arquivo mudou/nao existe."""
+        identity = file_identity(path)
+        if identity is None:
+            return None
+        key = identity + (kind,)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT data FROM probes WHERE path = ? AND size = ? AND mtime_ns = ? AND kind = ?",
+                    key).fetchone()
+                if row is not None:
+                    value = json.loads(row[0])
+                    self._remember(key, value)
+                    # Uma vez por sessao (depois fica na memoria): mantem a linha viva na limpeza
+                    try:
+                        with self._conn:
+                            self._conn.execute(
+                                "UPDATE probes SET accessed_at = ? "
+                                "WHERE path = ? AND size = ? AND mtime_ns = ? AND kind = ?",
+                                (time.time(),) + key)
+                    except sqlite3.Error:
+                        pass
+                    self.hits += 1
+                    return value
+            self.misses += 1
+        return None
+
+    def put(self, path: str, kind: str, value: Any) -> None:
+        """Guarda um resultado (precisa ser serializavel em JSON)."""
+        identity = file_identity(path)
+        if identity is None:
+            return
+        key = identity + (kind,)
+        with self._lock:
+            self._remember(key, value)
+            if self._conn is not None:
+                try:
+                    with self._conn:
+                        self._conn.execute("DELETE FROM probes WHERE path = ? AND kind = ?", (key[0], kind))
+                        self._conn.execute(
+                            "INSERT INTO probes (path, size, mtime_ns, kind, data, accessed_at) "
+                            "VALUES (?, ?, ?, ?, ?, ?)",
+                            key + (json.dumps(value, ensure_ascii=False), time.time()))
+                except sqlite3.Error as e:
+                    print(f"Erro ao gravar cache de probe: {e}")
+
+    def _remember(self, key: Tuple, value: Any) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute("DELETE FROM probes")
+
+
+_shared_cache: Optional[ProbeCache] = None
+_shared_lock = threading.Lock()
+
+
+def shared_probe_cache() -> ProbeCache:
+    """Retorna o cache compartilhado por todos os FFmpegWrapper do processo."""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = ProbeCache()
+        return _shared_cache
+
+
+def configure_probe_cache(db_path: Optional[str] = None, max_entries: int = 4096) -> ProbeCache:
+    """Recria o cache compartilhado, opcionalmente persistido em ``db_path``."""
+    global _shared_cache
+    with _shared_lock:
+        _shared_cache = ProbeCache(max_entries=max_entries, db_path=db_path)
+        return _shared_cache
@@ -0,0 +1,154 @@
+"""Progresso estruturado do FFmpeg via ``-progress pipe:1``."""
+
+import threading
+import time
+from typing import Callable, Iterable, List, Optional
+
+
+# Progresso em key=value no stdout; stderr fica so com avisos e erros.
+PROGRESS_ARGS = ["-hide_banner", "-nostats", "-loglevel", "warning", "-progress", "pipe:1"]
+
+
+def with_progress_args(cmd: List[str]) -> List[str]:
+    """Insere os argumentos de progresso logo apos o executavel."""
+    return cmd[:1] + PROGRESS_ARGS + cmd[1:]
+
+
+class ProgressInfo:
+    """Um bloco de progresso do FFmpeg (emitido a cada ~0,5 s)."""
+
+    __slots__ = ("frame", "fps", "bitrate_kbps", "total_size", "out_time_us", "speed", "done",
+                 "realtime", "eta")
+
+    def __init__(self):
+        self.frame = 0
+        self.fps = 0.0
+        self.bitrate_kbps = 0.0
+        self.total_size = 0
+        self.out_time_us = 0
+        self.speed = 0.0
+        self.done = False
+        # Preenchidos pelo ThroughputEstimator do job (velocidade suavizada e ETA em s)
+        self.realtime = 0.0
+        self.eta: Optional[float] = None
+
+    @property
+    def out_time(self) -> float:
+        """Tempo de midia ja codificado, em segundos."""
+        return self.out_time_us / 1_000_000
+
+
+def _to_float(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        return 0.0
+
+
+class ProgressParser:
+    """Acumula as linhas key=value e devolve um ProgressInfo a cada bloco."""
+
+    def __init__(self):
+        self._current = ProgressInfo()
+
+    def feed(self, line: str) -> Optional[ProgressInfo]:
+        key, sep, value = line.partition("=")
+        if not sep:
+            return None
+        value = value.strip()
+        info = self._current
+        if key == "out_time_us" or key == "out_time_ms":
+            # out_time_ms tambem vem em microssegundos (nome historico do FFmpeg)
+            info.out_time_us = max(int(_to_float(value)), 0)
+        elif key == "frame":
+            info.frame = int(_to_float(value))
+        elif key == "fps":
+            info.fps = _to_float(value)
+        elif key == "bitrate":
+            info.bitrate_kbps = _to_float(value.replace("kbits/s", ""))
+        elif key == "total_size":
+            info.total_size = int(_to_float(value))
+        elif key == "speed":
+            info.speed = _to_float(value.rstrip("x"))
+        elif key == "progress":
+            info.done = value == "end"
+            self._current = ProgressInfo()
+            return info
+        return None
+
+
+class ThroughputEstimator:
+    """Velocidade suavizada (segundos de midia por segundo de relogio) e ETA.
+
+    Usa media movel exponencial (EWMA) sobre a velocidade instantanea entre
+    amostras, o que absorve os picos de cenas faceis/dificeis sem reagir
+    devagar demais a mudancas reais de ritmo.
+    """
+
+    def __init__(self, total_duration: float, alpha: float = 0.15):
+        self.total_duration = total_duration
+        self.alpha = alpha
+        self.speed = 0.0
+        self.media_time = 0.0
+        self._last_media: Optional[float] = None
+        self._last_wall = 0.0
+
+    def update(self, media_time: float, now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        if self._last_media is not None:
+            dt_wall = now - self._last_wall
+            dt_media = media_time - self._last_media
+            if dt_wall <= 0 or dt_media < 0:
+                return
+            instant = dt_media / dt_wall
+            self.speed = instant if self.speed <= 0 else self.alpha * instant + (1 - self.alpha) * self.speed
+        self._last_media = media_time
+        self._last_wall = now
+        self.media_time = media_time
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Segundos restantes, ou None enquanto nao ha velocidade medida."""
+        if self.speed <= 0 or self.total_duration <= 0:
+            return None
+        return max(self.total_duration - self.media_time, 0.0) / self.speed
+
+    def annotate(self, info: ProgressInfo) -> ProgressInfo:
+        """Atualiza com o bloco de progresso e preenche realtime/eta nele."""
+        self.update(info.out_time)
+        info.realtime = self.speed
+        info.eta = self.eta
+        return info
+
+
+def estimate_batch_eta(remaining_media: float, speeds: Iterable[float]) -> Optional[float]:
+    """ETA do lote: midia restante dividida pela vazao somada dos jobs ativos."""
+    throughput = sum(s for s in speeds if s > 0)
+    if throughput <= 0:
+        return None
+    return remaining_media / throughput
+
+
+def _pump_stderr(stream, log_callback: Optional[Callable[[str], None]]) -> None:
+    for line in stream:
+        line = line.strip()
+        if line and log_callback:
+            log_callback(line)
+
+
+def read_progress(process, on_progress: Optional[Callable[[ProgressInfo], None]],
+                  log_callback: Optional[Callable[[str], None]]) -> None:
+    """Consome stdout (progresso) e stderr (diagnostico) de um processo FFmpeg.
+
+    O stderr e lido em uma thread propria para que nenhum dos pipes encha e
+    trave o processo. Retorna quando ambos os pipes forem fechados.
+    """
+    stderr_thread = threading.Thread(target=_pump_stderr, args=(process.stderr, log_callback),
+                                     daemon=True)
+    stderr_thread.start()
+    parser = ProgressParser()
+    for line in process.stdout:
+        info = parser.feed(line)
+        if info is not None and on_progress:
+            on_progress(info)
+    stderr_thread.join()
@@ -0,0 +1,119 @@
+"""Aquecimento do cache de paginas para o proximo video do lote."""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+# Fim do arquivo tambem e lido na abertura (Cues do MKV, moov de MP4 sem faststart)
+_TAIL_BYTES = 1024 * 1024
+_CHUNK_BYTES = 1024 * 1024
+
+
+class ReadAhead:
+    """Traz para a memoria o inicio do proximo arquivo enquanto o atual codifica.
+
+    Sem isso, os primeiros segundos do proximo job sao leituras frias (em HD,
+    buscas de varios ms cada). Com ``posix_fadvise(WILLNEED)`` o proprio kernel
+    le em segundo plano; onde nao existe (Windows, macOS), uma thread le o
+    arquivo em blocos limitada a ``rate_bytes`` por segundo, para nao
+    disputar o disco com a conversao em andamento. Sao aquecidos os primeiros
+    ``budget_bytes`` e o ultimo 1 MiB; um novo pedido interrompe o anterior.
+    Pedidos repetidos do mesmo arquivo sao ignorados ate ele comecar a
+    codificar (``forget``); depois disso, um novo pedido aquece de novo (um
+    lote repetido ou um item reenfileirado volta a ser lido do disco).
+    """
+
+    def __init__(self, budget_bytes: int, rate_bytes: int = 64 * 1024 * 1024):
+        self.budget_bytes = budget_bytes
+        self.rate_bytes = rate_bytes
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="readahead")
+        self._lock = threading.Lock()
+        self._token = 0
+        self._last_path = ""
+
+    def warm(self, path: str) -> None:
+        """Agenda o aquecimento (ignora o arquivo que ja foi o ultimo pedido)."""
+        if self.budget_bytes <= 0 or not path:
+            return
+        with self._lock:
+            if path == self._last_path:
+                return
+            self._last_path = path
+            self._token += 1
+            token = self._token
+        self._executor.submit(self._warm, path, token)
+
+    def forget(self, path: str) -> None:
+        """O job de ``path`` comecou: um proximo pedido do mesmo arquivo volta a aquecer."""
+        with self._lock:
+            if path == self._last_path:
+                self._last_path = ""
+
+    def _current(self, token: int) -> bool:
+        with self._lock:
+            return token == self._token
+
+    def _warm(self, path: str, token: int) -> None:
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        head = min(size, self.budget_bytes)
+        tail_start = max(size - _TAIL_BYTES, head)
+        try:
+            if hasattr(os, "posix_fadvise"):
+                fd = os.open(path, os.O_RDONLY)
+                try:
+                    os.posix_fadvise(fd, 0, head, os.POSIX_FADV_WILLNEED)
+                    if tail_start < size:
+                        os.posix_fadvise(fd, tail_start, size - tail_start, os.POSIX_FADV_WILLNEED)
+                finally:
+                    os.close(fd)
+                return
+            with open(path, "rb", buffering=0) as f:
+                self._read_range(f, 0, head, token)
+                if tail_start < size:
+                    self._read_range(f, tail_start, size - tail_start, token)
+        except OSError as e:
+            print(f"Erro ao pre-carregar {path}: {e}")
+
+    def _read_range(self, f, start: int, length: int, token: int) -> None:
+        f.seek(start)
+        started = time.monotonic()
+        done = 0
+        while done < length and self._current(token):
+            data = f.read(min(_CHUNK_BYTES, length - done))
+            if not data:
+                break
+            done += len(data)
+            # Limita a vazao: dorme ate o tempo que o volume lido "deveria" levar
+            ahead = done / self.rate_bytes - (time.monotonic() - started)
+            if ahead > 0:
+                time.sleep(ahead)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._token += 1
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_shared_readahead: Optional[ReadAhead] = None
+_shared_lock = threading.Lock()
+
+
+def shared_readahead() -> Optional[ReadAhead]:
+    """ReadAhead do processo (None = desligado)."""
+    with _shared_lock:
+        return _shared_readahead
+
+
+def configure_readahead(budget_mb: float = 256) -> Optional[ReadAhead]:
+    """Liga o aquecimento com o orcamento em MB por arquivo (0 desliga)."""
+    global _shared_readahead
+    with _shared_lock:
+        if _shared_readahead is not None:
+            _shared_readahead.shutdown()
+        _shared_readahead = ReadAhead(int(budget_mb * 1024 * 1024)) if budget_mb and budget_mb > 0 else None
+        return _shared_readahead
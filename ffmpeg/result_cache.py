@@ -0,0 +1,175 @@
+"""Cache de resultados de conversao enderecado pelo conteudo."""
+
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from utils.helpers import file_identity
+
+# Chave no ProbeCache (por arquivo) da impressao digital do conteudo
+FINGERPRINT_CACHE_KIND = "fingerprint.v1"
+_FINGERPRINT_CHUNK = 1024 * 1024
+
+
+def fast_fingerprint(path: str, probe_cache=None) -> Optional[str]:
+    """Hash do tamanho e de 1 MiB do inicio, do meio e do fim do arquivo.
+
+    Nao depende do caminho nem do mtime: a mesma midia copiada ou renomeada
+    gera a mesma impressao. Com ``probe_cache``, o resultado fica guardado
+    por identidade do arquivo e so e recalculado se ele mudar.
+    """
+    if probe_cache is not None:
+        cached = probe_cache.get(path, FINGERPRINT_CACHE_KIND)
+        if cached is not None:
+            return cached
+    try:
+        size = os.path.getsize(path)
+        digest = hashlib.sha1(str(size).encode("ascii"))
+        with open(path, "rb") as f:
+            for offset in sorted({0, max(size // 2 - _FINGERPRINT_CHUNK // 2, 0),
+                                  max(size - _FINGERPRINT_CHUNK, 0)}):
+                f.seek(offset)
+                digest.update(f.read(_FINGERPRINT_CHUNK))
+    except OSError:
+        return None
+    fingerprint = digest.hexdigest()
+    if probe_cache is not None:
+        probe_cache.put(path, FINGERPRINT_CACHE_KIND, fingerprint)
+    return fingerprint
+
+
+def link_or_copy(source: str, target: str) -> None:
+    """Cria ``target`` com o conteudo de ``source``: hardlink se possivel, senao copia.
+
+    O nome final so aparece completo (``.part`` + ``os.replace``).
+    """
+    final = Path(target)
+    partial = final.with_name(f".{final.name}.part")
+    partial.unlink(missing_ok=True)
+    try:
+        try:
+            os.link(source, partial)
+        except OSError:
+            shutil.copyfile(source, partial)
+        os.replace(partial, final)
+    finally:
+        partial.unlink(missing_ok=True)
+
+
+class ResultCache:
+    """Saidas ja geradas por (impressao da entrada, hash do comando efetivo).
+
+    Cada entrada guarda os caminhos das saidas com tamanho e mtime_ns na hora
+    da gravacao; se algum arquivo sumiu ou mudou, a entrada e descartada. Um
+    job com a mesma chave e atendido criando as saidas por hardlink (ou copia,
+    entre discos) a partir das existentes, sem codificar de novo.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._conn = None
+        if db_path:
+            self._open_db(db_path)
+
+    def _open_db(self, db_path: str) -> None:
+        try:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            with self._conn:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS results ("
+                    " key TEXT PRIMARY KEY, outputs TEXT NOT NULL,"
+                    " created_at REAL NOT NULL, accessed_at REAL NOT NULL)")
+        except sqlite3.Error as e:
+            print(f"Erro ao abrir cache de resultados: {e}")
+            self._conn = None
+
+    def lookup(self, key: str) -> Optional[List[str]]:
+        """Caminhos das saidas validas da chave, ou None."""
+        with self._lock:
+            outputs = self._entries.get(key)
+            if outputs is None and self._conn is not None:
+                row = self._conn.execute("SELECT outputs FROM results WHERE key = ?", (key,)).fetchone()
+                outputs = json.loads(row[0]) if row is not None else None
+            if outputs is None:
+                return None
+            if any(file_identity(path) != (os.path.abspath(path), size, mtime_ns)
+                   for path, size, mtime_ns in outputs):
+                self._forget(key)
+                return None
+            self._entries[key] = outputs
+            if self._conn is not None:
+                try:
+                    with self._conn:
+                        self._conn.execute("UPDATE results SET accessed_at = ? WHERE key = ?",
+                                           (time.time(), key))
+                except sqlite3.Error:
+                    pass
+        return [path for path, _, _ in outputs]
+
+    def store(self, key: str, paths: List[str]) -> None:
+        """Registra as saidas (ja completas) geradas para a chave."""
+        identities = [file_identity(path) for path in paths]
+        if any(identity is None for identity in identities):
+            return
+        outputs = [list(identity) for identity in identities]
+        with self._lock:
+            self._entries[key] = outputs
+            if self._conn is not None:
+                try:
+                    with self._conn:
+                        now = time.time()
+                        self._conn.execute(
+                            "INSERT OR REPLACE INTO results (key, outputs, created_at, accessed_at) "
+                            "VALUES (?, ?, ?, ?)", (key, json.dumps(outputs, ensure_ascii=False), now, now))
+                except sqlite3.Error as e:
+                    print(f"Erro ao gravar cache de resultados: {e}")
+
+    def satisfy(self, key: str, targets: List[str]) -> bool:
+        """Cria as saidas pedidas a partir de um resultado anterior; False se nao houver."""
+        sources = self.lookup(key)
+        if sources is None or len(sources) != len(targets):
+            return False
+        try:
+            for source, target in zip(sources, targets):
+                if os.path.abspath(source) != os.path.abspath(target):
+                    link_or_copy(source, target)
+        except OSError as e:
+            print(f"Erro ao reaproveitar resultado: {e}")
+            return False
+        return True
+
+    def _forget(self, key: str) -> None:
+        self._entries.pop(key, None)
+        if self._conn is not None:
+            try:
+                with self._conn:
+                    self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+            except sqlite3.Error:
+                pass
+
+
+_shared_cache: Optional[ResultCache] = None
+_shared_lock = threading.Lock()
+
+
+def shared_result_cache() -> Optional[ResultCache]:
+    """Cache de resultados do processo (None = desligado)."""
+    with _shared_lock:
+        return _shared_cache
+
+
+def configure_result_cache(db_path: Optional[str], enabled: bool = True) -> Optional[ResultCache]:
+    """Liga o cache de resultados persistido em ``db_path`` (ou desliga)."""
+    global _shared_cache
+    with _shared_lock:
+        _shared_cache = ResultCache(db_path) if enabled else None
+        return _shared_cache
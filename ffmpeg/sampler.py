@@ -0,0 +1,216 @@
+"""Estimativa de tamanho e tempo por codificacao de amostras."""
+
+import hashlib
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from dataclasses import replace
+from typing import Iterable, List, Optional
+
+from ffmpeg.output import OUTPUT_FASTSTART
+from ffmpeg.progress import ProgressInfo, read_progress, with_progress_args
+
+
+# Chave no ProbeCache (por arquivo); o sufixo e o hash do comando amostrado
+SAMPLE_CACHE_KIND = "sample.v2"
+
+
+class SampleEstimate:
+    """Previsao extrapolada das amostras: bytes de saida e segundos de codificacao."""
+
+    __slots__ = ("size_bytes", "encode_seconds", "media_seconds", "slices")
+
+    def __init__(self, size_bytes: int = 0, encode_seconds: float = 0.0,
+                 media_seconds: float = 0.0, slices: int = 0):
+        self.size_bytes = size_bytes
+        self.encode_seconds = encode_seconds
+        self.media_seconds = media_seconds
+        self.slices = slices
+
+    @property
+    def realtime_factor(self) -> float:
+        return self.media_seconds / self.encode_seconds if self.encode_seconds > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SampleEstimate":
+        return cls(**{name: data.get(name, 0) for name in cls.__slots__})
+
+
+def combine_estimates(estimates: Iterable[Optional[SampleEstimate]]) -> SampleEstimate:
+    """Soma as previsoes de um lote (itens sem previsao sao ignorados)."""
+    total = SampleEstimate()
+    for estimate in estimates:
+        if estimate is None:
+            continue
+        total.size_bytes += estimate.size_bytes
+        total.encode_seconds += estimate.encode_seconds
+        total.media_seconds += estimate.media_seconds
+        total.slices += estimate.slices
+    return total
+
+
+class TrialSampler:
+    """Codifica alguns trechos curtos com o comando real e extrapola para o video.
+
+    Os trechos ficam espacados pelo video (inicio, meio e fim tem complexidade
+    diferente). O tamanho vem dos bytes gerados por segundo de midia e o tempo
+    da velocidade informada pelo proprio FFmpeg (``speed``), que nao inclui a
+    partida do processo nem a busca. O resultado fica no ProbeCache do
+    wrapper, por arquivo e por hash do comando, entao so mudar o bitrate, o
+    preset ou os filtros gera uma nova amostragem.
+
+    A previsao de tempo e para um processo; a codificacao segmentada e os jobs
+    simultaneos do lote dividem esse tempo conforme a maquina.
+    """
+
+    def __init__(self, wrapper, slices: int = 3, slice_seconds: float = 4.0):
+        self.wrapper = wrapper
+        self.slices = slices
+        self.slice_seconds = slice_seconds
+        self.process = None
+        self._is_cancelled = False
+
+    @property
+    def cancelled(self) -> bool:
+        return self._is_cancelled
+
+    def _positions(self, duration: float) -> List[float]:
+        if duration <= self.slice_seconds * self.slices:
+            return [0.0]
+        return [max(duration * (k + 1) / (self.slices + 1) - self.slice_seconds / 2, 0.0)
+                for k in range(self.slices)]
+
+    def _slice_command(self, cmd: List[str], input_path: str, start: float, length: float,
+                       output_path: str) -> List[str]:
+        """O comando do job com busca antes do ``-i`` e saida temporaria.
+
+        Com grafo de filtros, ``-copyts`` mantem os tempos originais para a
+        legenda queimada mostrar as falas do trecho (como na codificacao
+        segmentada) e ``setpts=PTS-STARTPTS`` faz o video comecar em zero.
+        """
+        cmd = list(cmd)
+        position = cmd.index(input_path) - 1
+        seek = ["-ss", f"{start:.3f}", "-t", f"{length:.3f}"]
+        if "-filter_complex" in cmd:
+            graph_at = cmd.index("-filter_complex") + 1
+            if cmd[graph_at].endswith("[vout]"):
+                cmd[graph_at] = cmd[graph_at][:-len("[vout]")] + ",setpts=PTS-STARTPTS[vout]"
+                seek.append("-copyts")
+        return cmd[:position] + seek + cmd[position:-1] + [output_path]
+
+    def _cache_kind(self, cmd: List[str], input_path: str) -> str:
+        canonical = [arg for arg in cmd[:-1] if arg != input_path]
+        canonical += [str(self.slices), str(self.slice_seconds)]
+        digest = hashlib.sha1(json.dumps(canonical).encode("utf-8")).hexdigest()[:16]
+        return f"{SAMPLE_CACHE_KIND}:{digest}"
+
+    def _job_options(self, options):
+        # Com varias saidas, a amostra mede a principal; o moov reservado para o
+        # video inteiro inflaria o tamanho de um trecho de poucos segundos
+        return replace(options, renditions=[], output_strategy=OUTPUT_FASTSTART)
+
+    def cached(self, options) -> Optional[SampleEstimate]:
+        """Previsao ja medida para estas opcoes, sem codificar nada."""
+        options = self._job_options(options)
+        if not self.wrapper.ffmpeg_path:
+            return None
+        kind = self._cache_kind(self.wrapper.build_command(options), options.input_path)
+        data = self.wrapper.probe_cache.get(options.input_path, kind)
+        return SampleEstimate.from_dict(data) if data is not None else None
+
+    def estimate(self, options, log_callback=None) -> Optional[SampleEstimate]:
+        """Mede (ou busca no cache) a previsao de tamanho e tempo do job."""
+        options = self._job_options(options)
+        wrapper = self.wrapper
+        if not wrapper.ffmpeg_path:
+            return None
+        duration = wrapper.probe(options.input_path).duration
+        if duration <= 0:
+            return None
+
+        # O comando amostrado precisa ser o mesmo do job (legenda e watermark ja em cache)
+        wrapper.prepare_subtitle(options, tracked=False)
+        wrapper.prepare_watermark(options, tracked=False)
+        cmd = wrapper.build_command(options)
+        kind = self._cache_kind(cmd, options.input_path)
+        cached = wrapper.probe_cache.get(options.input_path, kind)
+        if cached is not None:
+            return SampleEstimate.from_dict(cached)
+
+        length = min(self.slice_seconds, duration)
+        sampled_media = sampled_bytes = 0
+        encode_time = 0.0
+        fd, output = tempfile.mkstemp(suffix=".mp4", prefix="hardsubforge_sample_")
+        os.close(fd)
+        try:
+            for start in self._positions(duration):
+                if self._is_cancelled:
+                    return None
+                result = self._run_slice(self._slice_command(cmd, options.input_path, start, length, output))
+                if result is None:
+                    if log_callback:
+                        log_callback(f"Falha ao codificar a amostra em {start:.0f}s")
+                    return None
+                media, speed = result
+                try:
+                    size = os.path.getsize(output)
+                except OSError:
+                    size = 0
+                if media <= 0 or speed <= 0 or not size:
+                    continue
+                sampled_media += media
+                sampled_bytes += size
+                encode_time += media / speed
+        finally:
+            try:
+                os.remove(output)
+            except OSError:
+                pass
+
+        if sampled_media <= 0:
+            return None
+        estimate = SampleEstimate(
+            size_bytes=int(sampled_bytes / sampled_media * duration),
+            encode_seconds=encode_time / sampled_media * duration,
+            media_seconds=duration,
+            slices=len(self._positions(duration))
+        )
+        wrapper.probe_cache.put(options.input_path, kind, estimate.to_dict())
+        return estimate
+
+    def _run_slice(self, cmd: List[str]):
+        """Executa um trecho; retorna (segundos de midia, velocidade) ou None."""
+        creation_flags = subprocess.CREATE_NO_WINDOW if platform.system() == "Windows" else 0
+        last: List[ProgressInfo] = []
+        started = time.monotonic()
+        self.process = subprocess.Popen(
+            with_progress_args(cmd), stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+            encoding="utf-8", errors="replace", creationflags=creation_flags
+        )
+
+        def on_progress(info: ProgressInfo) -> None:
+            last[:] = [info]
+
+        read_progress(self.process, on_progress, None)
+        returncode = self.process.wait()
+        self.process = None
+        if returncode != 0 or not last:
+            return None
+        info = last[0]
+        speed = info.speed or (info.out_time / max(time.monotonic() - started, 1e-6))
+        return info.out_time, speed
+
+    def stop(self) -> None:
+        self._is_cancelled = True
+        process = self.process
+        if process:
+            try:
+                process.terminate()
+            except Exception:
+                pass
@@ -0,0 +1,273 @@
+"""Codificacao paralela por segmentos de um unico video longo."""
+
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple, TYPE_CHECKING
+
+from ffmpeg.progress import ProgressInfo, ThroughputEstimator, read_progress, with_progress_args
+from ffmpeg.telemetry import wait_process
+
+if TYPE_CHECKING:
+    from ffmpeg.wrapper import FFmpegWrapper, ConversionOptions
+
+
+MIN_SEGMENT_SECONDS = 30.0
+# Sessoes simultaneas do NVENC que os drivers GeForce mais antigos aceitam
+NVENC_SESSION_LIMIT = 3
+# Menos que isso por trecho e o libx264 perde mais do que ganha com a divisao
+MIN_SEGMENT_THREADS = 2
+
+
+def plan_segments(duration: float, keyframes: List[float], count: int) -> List[Tuple[float, float]]:
+    """Divide [0, duration) em ate ``count`` trechos iniciando em keyframes.
+
+    Retorna pares (inicio, duracao). Trechos menores que MIN_SEGMENT_SECONDS
+    sao fundidos com o anterior.
+    """
+    if duration <= 0 or count < 2:
+        return [(0.0, duration)]
+    count = max(1, min(count, int(duration // MIN_SEGMENT_SECONDS)))
+    starts = [0.0]
+    keyframes = sorted(k for k in keyframes if 0 < k < duration)
+    for i in range(1, count):
+        target = duration * i / count
+        candidate = next((k for k in keyframes if k >= target), None)
+        if candidate is None:
+            break
+        if candidate - starts[-1] >= MIN_SEGMENT_SECONDS and duration - candidate >= MIN_SEGMENT_SECONDS:
+            starts.append(candidate)
+    bounds = starts + [duration]
+    return [(bounds[i], bounds[i + 1] - bounds[i]) for i in range(len(starts))]
+
+
+def segment_worker_budget(options: "ConversionOptions", use_nvenc: bool) -> int:
+    """Trechos simultaneos que cabem no job, limitados pelo que o lote ja ocupa.
+
+    Com NVENC, cada trecho abre uma sessao do encoder e os outros
+    ``parallel_jobs`` do lote tambem seguram as suas; com libx264, os trechos
+    dividem as threads do job (``options.threads``, a fatia dele nos nucleos).
+    Abaixo de 2, a codificacao segmentada nao compensa.
+    """
+    if options.segment_workers < 2:
+        return 0
+    if use_nvenc:
+        budget = NVENC_SESSION_LIMIT // max(options.parallel_jobs, 1)
+    else:
+        budget = (options.threads or os.cpu_count() or 1) // MIN_SEGMENT_THREADS
+    return min(options.segment_workers, budget)
+
+
+def segment_budget_note(options: "ConversionOptions", use_nvenc: bool) -> str:
+    """Por que os trechos paralelos pedidos nao vao rodar ("" se vao rodar ou nao foram pedidos)."""
+    if options.segment_workers < 2 or segment_worker_budget(options, use_nvenc) >= 2:
+        return ""
+    if use_nvenc:
+        return (f"Trechos paralelos desativados: {NVENC_SESSION_LIMIT} sessoes do NVENC para "
+                f"{options.parallel_jobs} conversao(oes) simultanea(s) no lote")
+    return (f"Trechos paralelos desativados: {options.threads or os.cpu_count() or 1} thread(s) "
+            f"no job, minimo de {MIN_SEGMENT_THREADS} por trecho")
+
+
+class SegmentedEncoder:
+    """Codifica um video em trechos paralelos e junta com o concat demuxer.
+
+    O video e dividido em keyframes e cada trecho e codificado (so video) por
+    um processo FFmpeg proprio, com o mesmo grafo de filtros da conversao
+    normal. Os trechos usam ``-copyts`` para que legendas queimadas fiquem
+    no tempo original do arquivo e ``setpts=PTS-STARTPTS`` para comecarem em
+    zero. No final, os trechos sao concatenados sem reencode e o audio e
+    codificado uma unica vez a partir do arquivo original.
+    """
+
+    def __init__(self, wrapper: "FFmpegWrapper", workers: int):
+        self.wrapper = wrapper
+        self.workers = max(2, workers)
+        self._processes: List[subprocess.Popen] = []
+        self._lock = threading.Lock()
+        self._cancelled = False
+
+    def find_keyframes(self, video_path: str) -> List[float]:
+        """Lista os tempos (s) dos keyframes do primeiro stream de video."""
+        if not self.wrapper.ffprobe_path:
+            return []
+        cmd = [
+            self.wrapper.ffprobe_path, "-v", "quiet",
+            "-select_streams", "v:0",
+            "-show_entries", "packet=pts_time,flags",
+            "-of", "csv=p=0",
+            video_path
+        ]
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=600,
+                                    creationflags=self._creation_flags())
+        except Exception:
+            return []
+        keyframes = []
+        for line in result.stdout.splitlines():
+            pts, _, flags = line.partition(",")
+            if "K" in flags:
+                try:
+                    keyframes.append(float(pts))
+                except ValueError:
+                    pass
+        return keyframes
+
+    @staticmethod
+    def _creation_flags() -> int:
+        return subprocess.CREATE_NO_WINDOW if platform.system() == "Windows" else 0
+
+    def _segment_command(self, options: "ConversionOptions", start: float, length: float,
+                         output: str, use_nvenc: bool, threads: int) -> List[str]:
+        wrapper = self.wrapper
+        cmd = [wrapper.ffmpeg_path, "-y", "-nostdin", "-err_detect", "ignore_err", "-fflags", "+genpts"]
+        if use_nvenc and wrapper.capabilities.cuda_decode:
+            cmd.extend(["-hwaccel", "cuda"])
+        cmd.extend(["-ss", f"{start:.6f}", "-t", f"{length:.6f}", "-copyts", "-i", options.input_path])
+        filter_graph = wrapper.build_filter_graph(options, extra=["setpts=PTS-STARTPTS"])
+        cmd.extend(["-filter_complex", filter_graph, "-map", "[vout]", "-an", "-sn"])
+        cmd.extend(wrapper.video_encoder_args(replace(options, threads=threads), use_nvenc))
+        cmd.append(output)
+        return cmd
+
+    def _concat_command(self, options: "ConversionOptions", list_file: str) -> List[str]:
+        wrapper = self.wrapper
+        cmd = [wrapper.ffmpeg_path, "-y", "-nostdin",
+               "-f", "concat", "-safe", "0", "-i", list_file,
+               "-i", options.input_path,
+               "-map", "0:v"]
+        cmd.extend(wrapper.audio_map_args(options, input_index=1))
+        cmd.extend(["-c:v", "copy"])
+        cmd.extend(wrapper.audio_encoder_args(options))
+        if options.preserve_metadata:
+            cmd.extend(["-map_metadata", "1"])
+        cmd.extend(wrapper.output_args(options))
+        cmd.append(options.output_path)
+        return cmd
+
+    def _run_process(self, cmd: List[str], on_time: Optional[Callable[[float], None]],
+                     log_callback: Optional[Callable[[str], None]]) -> int:
+        with self._lock:
+            if self._cancelled:
+                return -2
+            process = subprocess.Popen(
+                with_progress_args(cmd), stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                text=True, encoding='utf-8', errors='replace',
+                creationflags=self._creation_flags()
+            )
+            self._processes.append(process)
+        def on_progress(info: ProgressInfo) -> None:
+            # O bloco final chega depois do trailer; os trechos reportam o total ao terminar
+            if on_time and not info.done:
+                on_time(info.out_time)
+
+        try:
+            read_progress(process, on_progress, log_callback)
+            return wait_process(process, self.wrapper._usage)
+        finally:
+            with self._lock:
+                self._processes.remove(process)
+
+    def run(self, options: "ConversionOptions", duration: float,
+            progress_callback=None, log_callback=None, stats_callback=None) -> Optional[int]:
+        """Executa a conversao segmentada e retorna o returncode final.
+
+        Retorna None quando o video nao pode ser dividido (curto demais, sem
+        keyframes ou sem sessoes/threads livres), para o chamador seguir com
+        a conversao normal.
+        """
+        use_nvenc = options.use_hardware_accel and self.wrapper._has_nvidia_gpu()
+        workers = min(self.workers, segment_worker_budget(options, use_nvenc))
+        if workers < 2:
+            if log_callback:
+                log_callback(f"{segment_budget_note(options, use_nvenc)}.")
+            return None
+        self.workers = workers
+
+        keyframes = self.find_keyframes(options.input_path)
+        segments = plan_segments(duration, keyframes, self.workers * 2)
+        if len(segments) < 2:
+            if log_callback:
+                log_callback("Video curto demais para dividir.")
+            return None
+
+        # Os trechos dividem as threads do job (no lote, a fatia dele nos nucleos)
+        threads = max(1, (options.threads or os.cpu_count() or 2) // self.workers)
+        workdir = tempfile.mkdtemp(prefix=".hsf_segments_", dir=str(Path(options.output_path).parent))
+        if log_callback:
+            log_callback(f"Codificacao segmentada: {len(segments)} trechos, {self.workers} em paralelo")
+
+        done = [0.0] * len(segments)
+        last_percent = [-1]
+        progress_lock = threading.Lock()
+        estimator = ThroughputEstimator(duration)
+
+        def report(index: int, seconds: float) -> None:
+            with progress_lock:
+                done[index] = min(seconds, segments[index][1])
+                media_done = sum(done)
+                if stats_callback:
+                    info = ProgressInfo()
+                    info.out_time_us = int(media_done * 1_000_000)
+                    stats_callback(estimator.annotate(info))
+                percent = min(int(media_done / duration * 95), 95)
+                if percent != last_percent[0]:
+                    last_percent[0] = percent
+                    if progress_callback:
+                        progress_callback(percent)
+
+        def encode(index: int) -> int:
+            start, length = segments[index]
+            output = str(Path(workdir) / f"seg_{index:04d}.mkv")
+            cmd = self._segment_command(options, start, length, output, use_nvenc, threads)
+            returncode = self._run_process(cmd, lambda t: report(index, t), log_callback)
+            if returncode == 0:
+                report(index, length)
+            return returncode
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                results = list(pool.map(encode, range(len(segments))))
+            if self._cancelled:
+                return -2
+            failed = next((r for r in results if r != 0), 0)
+            if failed:
+                if log_callback:
+                    log_callback(f"ERRO: falha ao codificar trecho (codigo {failed})")
+                return failed
+
+            list_file = Path(workdir) / "segments.txt"
+            with open(list_file, "w", encoding="utf-8") as f:
+                for index in range(len(segments)):
+                    seg_path = str(Path(workdir) / f"seg_{index:04d}.mkv").replace("\\", "/")
+                    f.write("file '" + seg_path.replace("'", "'\\''") + "'\n")
+            if log_callback:
+                log_callback("Juntando trechos (concat, sem reencode)...")
+            tail = self.wrapper._tail
+            returncode = self._run_process(self._concat_command(options, str(list_file)),
+                                           lambda t: tail.mark(), log_callback)
+            tail.finish()
+            return -2 if self._cancelled else returncode
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def stop(self) -> None:
+        """Interrompe todos os processos de trechos em andamento."""
+        with self._lock:
+            self._cancelled = True
+            processes = list(self._processes)
+        for process in processes:
+            try:
+                process.terminate()
+                process.wait(timeout=5)
+            except Exception:
+                try:
+                    process.kill()
+                except Exception:
+                    pass
@@ -0,0 +1,269 @@
+"""Area de rascunho local para jobs com origem ou destino em rede."""
+
+import hashlib
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from utils.helpers import file_identity, is_network_path
+
+# Saidas no rascunho sem escrita ha mais que isso sao de uma sessao que caiu
+_STALE_OUTPUT_SECONDS = 3600
+
+
+class ScratchStaging:
+    """Copia entradas de SMB/NFS para um disco local e codifica la.
+
+    A leitura do video pela rede limita a velocidade da codificacao (latencia
+    e variacao do compartilhamento); com a copia local o FFmpeg le do disco.
+    ``prefetch`` copia o proximo arquivo enquanto o job atual codifica. A
+    saida tambem e gravada no rascunho e movida para a pasta final so no fim,
+    de forma atomica (``os.replace``; entre discos, copia para ``.part`` no
+    destino e renomeia), entao o destino nunca tem um MP4 pela metade.
+
+    O espaco usado (entradas copiadas e saidas em andamento) fica abaixo de
+    ``max_bytes``: as entradas usadas ha mais tempo sao removidas primeiro e
+    as que estao em uso por um job nunca sao removidas. Copias e saidas em
+    andamento reservam o tamanho esperado na hora em que cabem, entao jobs
+    simultaneos nao contam com o mesmo espaco livre. Com ``network_only``
+    (padrao), arquivos locais nao passam pelo rascunho. Saidas abandonadas
+    por uma sessao anterior sao apagadas ao criar o rascunho.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, network_only: bool = True):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.network_only = network_only
+        self._inputs = self.directory / "inputs"
+        self._outputs = self.directory / "outputs"
+        self._lock = threading.Lock()
+        self._file_locks: Dict[str, threading.Lock] = {}
+        self._in_use: Dict[str, int] = {}
+        self._reserved: Dict[str, int] = {}
+        self._prefetcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scratch-prefetch")
+        self._prefetching: Dict[str, Future] = {}
+        self._sweep()
+
+    def _sweep(self) -> None:
+        """Apaga saidas e copias parciais de sessoes anteriores (paradas ha mais de 1 h)."""
+        cutoff = time.time() - _STALE_OUTPUT_SECONDS
+        stale = []
+        for folder, pattern in ((self._outputs, "*"), (self._inputs, "*.part")):
+            try:
+                stale.extend(f for f in folder.glob(pattern) if f.is_file() and f.stat().st_mtime < cutoff)
+            except OSError:
+                pass
+        for old in stale:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+
+    def wants(self, path: str) -> bool:
+        """Se o caminho deve passar pelo rascunho."""
+        return bool(path) and (not self.network_only or is_network_path(path))
+
+    def _staged_path(self, path: str) -> Optional[Path]:
+        identity = file_identity(path)
+        if identity is None:
+            return None
+        digest = hashlib.sha1(repr(identity).encode("utf-8")).hexdigest()[:20]
+        return self._inputs / f"{digest}{Path(path).suffix}"
+
+    def stage_input(self, path: str, log_callback: Optional[Callable[[str], None]] = None,
+                    pin: bool = True) -> str:
+        """Caminho local do video (copiando se preciso); o original se nao couber ou falhar.
+
+        Com ``pin`` o arquivo fica protegido da limpeza ate ``release``.
+        """
+        if not self.wants(path):
+            return path
+        target = self._staged_path(path)
+        if target is None:
+            return path
+        try:
+            size = os.path.getsize(path)
+        except OSError as e:
+            print(f"Erro ao ler a entrada para o rascunho: {e}")
+            return path
+        if size > self.max_bytes:
+            return path
+        with self._lock:
+            lock = self._file_locks.setdefault(target.name, threading.Lock())
+        with lock:
+            if not target.exists():
+                started = time.monotonic()
+                partial = target.with_suffix(target.suffix + ".part")
+                if not self._make_room(size, str(partial)):
+                    return path
+                self._inputs.mkdir(parents=True, exist_ok=True)
+                try:
+                    shutil.copyfile(path, partial)
+                    os.replace(partial, target)
+                except OSError as e:
+                    print(f"Erro ao copiar para o rascunho: {e}")
+                    partial.unlink(missing_ok=True)
+                    return path
+                finally:
+                    self.release(str(partial))
+                if log_callback:
+                    elapsed = max(time.monotonic() - started, 1e-6)
+                    log_callback(f"Rascunho: {Path(path).name} copiado em {elapsed:.1f}s "
+                                 f"({size / 1048576 / elapsed:.0f} MB/s)")
+            try:
+                os.utime(target)  # LRU por mtime
+            except OSError:
+                pass
+            if pin:
+                with self._lock:
+                    self._in_use[str(target)] = self._in_use.get(str(target), 0) + 1
+        return str(target)
+
+    def prefetch(self, path: str) -> Optional[Future]:
+        """Copia o video em segundo plano (para o proximo job da fila)."""
+        if not self.wants(path):
+            return None
+        with self._lock:
+            future = self._prefetching.get(path)
+            if future is not None and not future.done():
+                return future
+            future = self._prefetcher.submit(self.stage_input, path, None, False)
+            self._prefetching[path] = future
+        return future
+
+    def output_path(self, final_path: str, expected_bytes: int = 0) -> str:
+        """Caminho no rascunho para gravar a saida; o final se nao houver espaco.
+
+        O espaco de ``expected_bytes`` fica reservado ate ``commit_output`` ou
+        ``discard_output``.
+        """
+        if not self.wants(final_path):
+            return final_path
+        scratch = self._outputs / f"{uuid.uuid4().hex[:12]}_{Path(final_path).name}"
+        if not self._make_room(expected_bytes, str(scratch)):
+            return final_path
+        self._outputs.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            self._in_use[str(scratch)] = 1
+        return str(scratch)
+
+    def commit_output(self, scratch_path: str, final_path: str) -> None:
+        """Move a saida do rascunho para o destino; o nome final so aparece completo."""
+        if scratch_path == final_path:
+            return
+        try:
+            try:
+                os.replace(scratch_path, final_path)
+            except OSError:
+                # Outro disco: copia com nome temporario na pasta final e renomeia la
+                final = Path(final_path)
+                partial = final.with_name(f".{final.name}.part")
+                try:
+                    shutil.copyfile(scratch_path, partial)
+                    os.replace(partial, final)
+                finally:
+                    partial.unlink(missing_ok=True)
+                os.remove(scratch_path)
+        finally:
+            self.release(scratch_path)
+
+    def discard_output(self, scratch_path: str, final_path: str) -> None:
+        if scratch_path == final_path:
+            return
+        try:
+            os.remove(scratch_path)
+        except OSError:
+            pass
+        self.release(scratch_path)
+
+    def release(self, path: str) -> None:
+        """Libera um arquivo do rascunho para a limpeza LRU (e a reserva de espaco dele)."""
+        with self._lock:
+            self._reserved.pop(path, None)
+            count = self._in_use.get(path, 0) - 1
+            if count > 0:
+                self._in_use[path] = count
+            else:
+                self._in_use.pop(path, None)
+
+    def usage(self) -> int:
+        """Bytes ocupados no rascunho."""
+        total = 0
+        for folder in (self._inputs, self._outputs):
+            try:
+                total += sum(f.stat().st_size for f in folder.iterdir() if f.is_file())
+            except OSError:
+                pass
+        return total
+
+    def _pending_bytes(self) -> int:
+        """Bytes reservados que ainda nao estao no disco (copias e saidas em andamento)."""
+        pending = 0
+        for path, size in self._reserved.items():
+            try:
+                pending += max(size - os.path.getsize(path), 0)
+            except OSError:
+                pending += size
+        return pending
+
+    def _make_room(self, needed: int, reserve_for: str = "") -> bool:
+        """Remove entradas antigas ate caber ``needed``; False se nao for possivel.
+
+        Com ``reserve_for``, o espaco fica reservado para esse caminho (ate
+        ``release``) na mesma operacao que confirmou que ele cabe.
+        """
+        if needed > self.max_bytes:
+            return False
+        with self._lock:
+            try:
+                staged = sorted((f for f in self._inputs.iterdir() if f.is_file()),
+                                key=lambda f: f.stat().st_mtime)
+            except OSError:
+                staged = []
+            used = self.usage() + self._pending_bytes()
+            for old in staged:
+                if used + needed <= self.max_bytes:
+                    break
+                if str(old) in self._in_use or old.suffix == ".part":
+                    continue
+                try:
+                    size = old.stat().st_size
+                    old.unlink()
+                    used -= size
+                except OSError:
+                    pass
+            if used + needed > self.max_bytes:
+                return False
+            if reserve_for:
+                self._reserved[reserve_for] = needed
+            return True
+
+    def shutdown(self) -> None:
+        self._prefetcher.shutdown(wait=False, cancel_futures=True)
+
+
+_shared_staging: Optional[ScratchStaging] = None
+_shared_lock = threading.Lock()
+
+
+def shared_staging() -> Optional[ScratchStaging]:
+    """Rascunho compartilhado pelos FFmpegWrapper do processo (None = desligado)."""
+    with _shared_lock:
+        return _shared_staging
+
+
+def configure_staging(directory: Optional[str], max_gb: float = 50.0,
+                      network_only: bool = True) -> Optional[ScratchStaging]:
+    """Liga o rascunho na pasta indicada (ou desliga, sem pasta)."""
+    global _shared_staging
+    with _shared_lock:
+        if _shared_staging is not None:
+            _shared_staging.shutdown()
+        _shared_staging = (ScratchStaging(directory, int(max_gb * 1024 ** 3), network_only)
+                           if directory else None)
+        return _shared_staging
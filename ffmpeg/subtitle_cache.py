@@ -0,0 +1,44 @@
+"""Cache de legendas embutidas extraidas para arquivos .ass."""
+
+from typing import Callable, Hashable, List, Optional
+
+from ffmpeg.file_cache import FileCache
+from utils.helpers import file_identity
+
+
+class SubtitleCache(FileCache):
+    """Guarda as faixas de legenda de texto extraidas dos videos.
+
+    O filtro ``subtitles='video':si=N`` faz o libass abrir e demuxar o video
+    inteiro de novo, em paralelo com a decodificacao principal (e uma vez por
+    trecho na codificacao segmentada). Extraindo a faixa uma unica vez para um
+    .ass pequeno, conversoes e previews passam a ler so esse arquivo.
+
+    A chave e (caminho, tamanho, mtime_ns, indice do stream), entao qualquer
+    alteracao no video gera uma nova extracao.
+    """
+
+    suffix = ".ass"
+    default_dirname = "hardsubforge_subtitles"
+    default_max_files = 200
+    error_message = "Erro ao extrair legenda"
+
+    @staticmethod
+    def _key(input_path: str, stream_index: int) -> Optional[Hashable]:
+        identity = file_identity(input_path)
+        return None if identity is None else identity + (stream_index,)
+
+    def lookup(self, input_path: str, stream_index: int) -> Optional[str]:
+        """Caminho da legenda ja extraida, ou None."""
+        return self._cached(self._key(input_path, stream_index))
+
+    def extract(self, ffmpeg_path: str, input_path: str, stream_index: int,
+                run: Callable[[List[str]], int]) -> Optional[str]:
+        """Extrai a faixa (se ainda nao estiver no cache) e retorna o caminho do .ass.
+
+        ``run`` executa o comando e retorna o returncode, para o chamador poder
+        cancelar o processo.
+        """
+        return self._produce(self._key(input_path, stream_index), lambda partial: [
+            ffmpeg_path, "-y", "-nostdin", "-v", "error", "-i", input_path,
+            "-map", f"0:{stream_index}", "-c:s", "ass", "-f", "ass", partial], run)
@@ -0,0 +1,123 @@
+"""Telemetria por conversao (tempo, vazao, CPU e memoria do FFmpeg)."""
+
+import os
+import re
+import sys
+import threading
+from dataclasses import dataclass, asdict
+from typing import Any, Dict
+
+
+_FILTER_NAME = re.compile(r"(?:^|[,;\]])([a-z_0-9]+)(?=[=,;\[]|$)")
+# Caracteres escapados e trechos entre aspas (caminhos, texto do drawtext) nao tem nomes de filtro
+_QUOTED = re.compile(r"\\.|'[^']*'")
+
+
+def filter_names(filter_graph: str) -> str:
+    """Nomes dos filtros do grafo, ex.: 'scale,overlay,subtitles,pad'."""
+    return ",".join(_FILTER_NAME.findall(_QUOTED.sub("", filter_graph)))
+
+
+class ChildUsage:
+    """Soma o uso de recursos dos processos FFmpeg de uma conversao.
+
+    Os valores vem do ``os.wait4`` de cada processo (o mesmo rusage do
+    ``getrusage(RUSAGE_CHILDREN)``, porem isolado por processo, o que importa
+    quando varias conversoes rodam em paralelo no mesmo programa).
+    """
+
+    def __init__(self):
+        self.cpu_user = 0.0
+        self.cpu_system = 0.0
+        self.peak_rss_kb = 0
+        self._lock = threading.Lock()
+
+    def add(self, rusage) -> None:
+        # ru_maxrss e em KiB no Linux e em bytes no macOS
+        rss_kb = rusage.ru_maxrss // 1024 if sys.platform == "darwin" else rusage.ru_maxrss
+        with self._lock:
+            self.cpu_user += rusage.ru_utime
+            self.cpu_system += rusage.ru_stime
+            self.peak_rss_kb = max(self.peak_rss_kb, rss_kb)
+
+
+def wait_process(process, usage: ChildUsage = None) -> int:
+    """Espera o processo terminar e soma o uso de recursos dele em ``usage``.
+
+    Sem ``os.wait4`` (Windows) ou se o processo ja foi coletado por outra
+    thread (ex.: ``stop``), cai no ``process.wait()`` sem telemetria de CPU.
+    """
+    if usage is None or not hasattr(os, "wait4") or process.returncode is not None:
+        return process.wait()
+    try:
+        _, status, rusage = os.wait4(process.pid, 0)
+    except ChildProcessError:
+        return process.wait()
+    process.returncode = os.waitstatus_to_exitcode(status)
+    usage.add(rusage)
+    return process.returncode
+
+
+@dataclass
+class JobTelemetry:
+    """Registro de uma conversao para o historico."""
+
+    input_path: str
+    output_path: str
+    preset: str = ""
+    encoder: str = ""
+    filters: str = ""
+    returncode: int = 0
+    started_at: float = 0.0
+    wall_time: float = 0.0
+    media_duration: float = 0.0
+    frames: int = 0
+    output_size: int = 0
+    estimated_size: int = 0
+    cpu_user: float = 0.0
+    cpu_system: float = 0.0
+    peak_rss_kb: int = 0
+    output_strategy: str = ""
+    tail_time: float = 0.0
+
+    @property
+    def realtime_factor(self) -> float:
+        """Segundos de midia por segundo de relogio."""
+        return self.media_duration / self.wall_time if self.wall_time > 0 else 0.0
+
+    @property
+    def avg_fps(self) -> float:
+        return self.frames / self.wall_time if self.wall_time > 0 else 0.0
+
+    @property
+    def write_throughput(self) -> float:
+        """Bytes de saida por segundo de relogio."""
+        return self.output_size / self.wall_time if self.wall_time > 0 else 0.0
+
+    @property
+    def cpu_time(self) -> float:
+        return self.cpu_user + self.cpu_system
+
+    @property
+    def size_ratio(self) -> float:
+        """Tamanho real dividido pelo estimado (1.0 = estimativa exata)."""
+        return self.output_size / self.estimated_size if self.estimated_size > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data.update(realtime_factor=round(self.realtime_factor, 3), avg_fps=round(self.avg_fps, 2),
+                    cpu_time=round(self.cpu_time, 2), size_ratio=round(self.size_ratio, 3),
+                    write_throughput=round(self.write_throughput))
+        return data
+
+    def summary(self) -> str:
+        """Resumo de uma linha para o log."""
+        text = (f"{self.wall_time:.0f}s, {self.realtime_factor:.2f}x tempo real, "
+                f"{self.avg_fps:.0f} fps, {self.output_size / 1048576:.0f} MB")
+        if self.estimated_size > 0:
+            text += f" ({self.size_ratio * 100:.0f}% do estimado)"
+        if self.cpu_time > 0:
+            text += f", CPU {self.cpu_time:.0f}s, pico {self.peak_rss_kb // 1024} MB"
+        if self.output_strategy:
+            text += f", {self.output_strategy} (finalizacao {self.tail_time:.1f}s)"
+        return text
@@ -0,0 +1,96 @@
+"""Watermark pre-renderizado em PNG (RGBA) e aplicado com ``overlay``."""
+
+import math
+import os
+from typing import Callable, Hashable, List, Optional
+
+from ffmpeg.file_cache import FileCache
+from utils.helpers import escape_filter_text, escape_path_for_filter
+
+
+# Posicao vertical do texto dentro do quadro (mesmas expressoes do drawtext original)
+_TEXT_Y = {
+    "top": "y=20",
+    "center": "y=(h-text_h)/2",
+    "bottom": "y=h-text_h-20"
+}
+
+# Posicao da faixa renderizada no quadro do video
+_OVERLAY_Y = {
+    "top": "0",
+    "center": "(main_h-overlay_h)/2",
+    "bottom": "main_h-overlay_h"
+}
+
+_BOX_BORDER = 10
+
+
+def drawtext_filter(text: str, font_path: str, size: int, position: str) -> str:
+    """Filtro drawtext do watermark (texto branco sobre caixa semitransparente)."""
+    y_pos = _TEXT_Y.get(position, "y=20")
+    return (f"drawtext=fontfile='{escape_path_for_filter(font_path)}':text='{escape_filter_text(text)}'"
+            f":fontcolor=white@0.9:fontsize={size}:box=1:boxcolor=black@0.4:boxborderw={_BOX_BORDER}"
+            f":x=(w-text_w)/2:{y_pos}")
+
+
+def band_height(size: int, frame_height: int = 0) -> int:
+    """Altura da faixa que contem o texto, a caixa e a margem de 20 px.
+
+    Com ``frame_height``, a faixa tem a mesma paridade do quadro (assim a
+    posicao centralizada cai no mesmo pixel do drawtext) e nunca passa dele.
+    """
+    height = math.ceil(size * 1.6) + 2 * _BOX_BORDER + 24
+    height += height % 2
+    if frame_height > 0:
+        height = min(height + frame_height % 2, frame_height)
+    return height
+
+
+def overlay_filter(position: str) -> str:
+    """Filtro overlay que posiciona a faixa como o drawtext faria no quadro inteiro."""
+    return f"overlay=x=(main_w-overlay_w)/2:y={_OVERLAY_Y.get(position, '0')}"
+
+
+class WatermarkCache(FileCache):
+    """Renderiza o watermark uma vez por (texto, tamanho, posicao, fonte, largura x altura).
+
+    O ``drawtext`` rasteriza os glifos e desenha a caixa em todo quadro de
+    todo job; como o texto e fixo, ele e desenhado uma unica vez em uma faixa
+    transparente da largura do video e composto com ``overlay`` depois do
+    pad, no quadro final, como o drawtext era aplicado.
+
+    Para sair igual ao drawtext, o texto e desenhado sobre fundo preto e sobre
+    fundo branco: a diferenca entre os dois da a opacidade de cada pixel e o
+    fundo preto da a cor ja multiplicada pela opacidade, que o
+    ``unpremultiply`` converte para alpha direto (o que o overlay espera).
+    """
+
+    suffix = ".png"
+    default_dirname = "hardsubforge_watermarks"
+    error_message = "Erro ao renderizar watermark"
+
+    @staticmethod
+    def _key(text: str, font_path: str, size: int, position: str, width: int, height: int) -> Hashable:
+        try:
+            font_mtime = os.stat(font_path).st_mtime_ns
+        except OSError:
+            font_mtime = 0
+        return (text, font_path, font_mtime, size, position, width, height)
+
+    def lookup(self, text: str, font_path: str, size: int, position: str,
+               width: int, height: int) -> Optional[str]:
+        """Caminho do PNG ja renderizado, ou None."""
+        return self._cached(self._key(text, font_path, size, position, width, height))
+
+    def render(self, ffmpeg_path: str, text: str, font_path: str, size: int, position: str,
+               width: int, height: int, run: Callable[[List[str]], int]) -> Optional[str]:
+        """Renderiza o PNG (se ainda nao existir) e retorna o caminho."""
+        canvas = f"s={width}x{band_height(size, height)}:d=1"
+        draw = drawtext_filter(text, font_path, size, position)
+        graph = (f"color=c=black:{canvas},format=rgb24,{draw},split[b1][b2];"
+                 f"color=c=white:{canvas},format=rgb24,{draw}[w];"
+                 f"[w][b1]blend=all_expr='255-(A-B)',extractplanes=g[a];"
+                 f"[b2][a]alphamerge,unpremultiply=inplace=1,format=rgba[out]")
+        return self._produce(self._key(text, font_path, size, position, width, height), lambda partial: [
+            ffmpeg_path, "-y", "-nostdin", "-v", "error", "-filter_complex", graph,
+            "-map", "[out]", "-frames:v", "1", "-c:v", "png", "-f", "image2", "-update", "1", partial], run)
@@ -1,18 +1,42 @@
 """Wrapper para FFmpeg - usando a lógica do código original."""
 
-import re
+import hashlib
+import json
+import math
+import os
 import subprocess
 import platform
+import time
 from pathlib import Path
 from typing import Optional, List, Dict
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
 
 from presets.definitions import QualityPreset, CustomPreset
-from utils.helpers import get_ffmpeg_binary, get_ffprobe_binary, escape_filter_text, escape_path_for_filter, check_nvidia_gpu
+from ffmpeg.probe import ProbeResult, PROBE_ENTRIES, PROBE_CACHE_KIND, parse_probe
+from ffmpeg.probe_cache import ProbeCache, shared_probe_cache
+from ffmpeg.capabilities import Capabilities, get_capabilities
+from ffmpeg.output import OUTPUT_AUTO, TailTimer, movflags_args, resolve_strategy
+from ffmpeg.planner import STREAM_COPY_AUTO, VideoPlan, parse_resolution, plan_geometry, plan_video
+from ffmpeg.file_cache import shared_file_cache
+from ffmpeg.subtitle_cache import SubtitleCache
+from ffmpeg.preview_cache import PreviewCache
+from ffmpeg.staging import ScratchStaging, shared_staging
+from ffmpeg.result_cache import ResultCache, fast_fingerprint, shared_result_cache
+from ffmpeg.watermark import WatermarkCache, drawtext_filter, overlay_filter
+from ffmpeg.progress import ProgressInfo, ThroughputEstimator, read_progress, with_progress_args
+from ffmpeg.segmenter import segment_worker_budget
+from ffmpeg.telemetry import ChildUsage, JobTelemetry, filter_names, wait_process
+from utils.helpers import (get_ffmpeg_binary, get_ffprobe_binary, escape_path_for_filter, file_identity,
+                           parse_bitrate_kbps)
 
 
-TIME_PATTERN = re.compile(r'time=(\d{2}):(\d{2}):(\d{2}\.\d{2})')
-DURATION_PATTERN = re.compile(r'Duration: (\d{2}):(\d{2}):(\d{2}\.\d{2})')
+@dataclass
+class Rendition:
+    """Saida extra de um job: o mesmo video em outro preset."""
+    
+    preset: QualityPreset | CustomPreset
+    output_path: str
+    custom_bitrate: Optional[str] = None
 
 
 @dataclass
@@ -33,128 +57,123 @@ class ConversionOptions:
     use_hardware_accel: bool = True
     copy_audio: bool = False
     preserve_metadata: bool = True
+    segment_workers: int = 0
+    stream_copy: str = STREAM_COPY_AUTO
+    renditions: List[Rendition] = field(default_factory=list)
+    output_strategy: str = OUTPUT_AUTO
+    threads: int = 0
+    parallel_jobs: int = 1
 
 
 class FFmpegWrapper:
     """Wrapper para FFmpeg com suporte a legendas e watermark."""
     
-    def __init__(self, ffmpeg_path: Optional[str] = None):
+    def __init__(self, ffmpeg_path: Optional[str] = None, probe_cache: Optional[ProbeCache] = None,
+                 subtitle_cache: Optional[SubtitleCache] = None,
+                 watermark_cache: Optional[WatermarkCache] = None,
+                 preview_cache: Optional[PreviewCache] = None,
+                 staging: Optional[ScratchStaging] = None,
+                 result_cache: Optional[ResultCache] = None):
         self.ffmpeg_path = ffmpeg_path or get_ffmpeg_binary()
         self.ffprobe_path = get_ffprobe_binary(self.ffmpeg_path)
+        self.probe_cache = probe_cache or shared_probe_cache()
+        self.subtitle_cache = subtitle_cache or shared_file_cache(SubtitleCache)
+        self.watermark_cache = watermark_cache or shared_file_cache(WatermarkCache)
+        self.preview_cache = preview_cache or shared_file_cache(PreviewCache)
+        self.staging = staging
+        self.result_cache = result_cache
         self.font_path = self._get_font_path()
         self._is_cancelled = False
         self.process = None
+        self._segmenter = None
+        self._usage: Optional[ChildUsage] = None
+        self._tail = TailTimer()
+        self._pending_commit = None
+        self._pending_result = None
+        self.cache_hit: Optional[bool] = None
         self.output_path = ""
+        self.telemetry: Optional[JobTelemetry] = None
+        # Entrada copiada para o rascunho -> caminho original (chave dos caches de probe e legenda)
+        self._staged_sources: Dict[str, str] = {}
     
     def _get_font_path(self) -> Optional[str]:
         """Retorna o caminho da fonte."""
         from utils.helpers import get_font_path
         return get_font_path()
     
+    @property
+    def capabilities(self) -> Capabilities:
+        """Encoders/filtros/hwaccels do binario atual (consultados uma vez, com cache em disco)."""
+        return get_capabilities(self.ffmpeg_path, self.probe_cache)
+    
     def _has_nvidia_gpu(self) -> bool:
-        """Verifica se há GPU NVIDIA."""
-        return check_nvidia_gpu()
+        """Verifica se há GPU NVIDIA e se o FFmpeg tem o h264_nvenc."""
+        return self.capabilities.nvenc
     
-    def get_audio_streams(self, video_path: str) -> List[Dict]:
-        """Retorna as faixas de audio do video (compatibilidade)."""
-        return self.get_streams(video_path).get("audio", [])
-
-    def get_streams(self, video_path: str) -> Dict[str, List[Dict]]:
-        """Retorna faixas de audio e legendas do video."""
-        result = {"audio": [], "subtitles": []}
+    def check_requirements(self, options: ConversionOptions) -> List[str]:
+        """Lista o que falta no FFmpeg para esta conversao (vazio se estiver tudo ok)."""
+        caps = self.capabilities
+        problems = []
+        if not self.plan_video(options).copy:
+            encoder = "h264_nvenc" if options.use_hardware_accel and caps.nvenc else "libx264"
+            if not caps.has_encoder(encoder):
+                problems.append(f"encoder {encoder}")
+            names = filter_names(self.build_output_graph(options)).split(",")
+            problems.extend(f"filtro {name}" for name in caps.missing_filters(n for n in names if n))
+        if not options.copy_audio and not caps.has_encoder("aac"):
+            problems.append("encoder aac")
+        return problems
+    
+    def probe(self, video_path: str) -> ProbeResult:
+        """Sonda o arquivo uma unica vez (formato + streams) e retorna um ProbeResult."""
         if not self.ffprobe_path:
-            return result
-        
+            return ProbeResult()
+        if video_path in self._staged_sources:
+            # A copia no rascunho tem o mesmo conteudo: reaproveita o probe do original
+            return self.probe(self._staged_sources[video_path])
+
+        cached = self.probe_cache.get(video_path, PROBE_CACHE_KIND)
+        if cached is not None:
+            return ProbeResult.from_dict(cached)
+
         cmd = [
             self.ffprobe_path,
             "-v", "quiet",
             "-print_format", "json",
-            "-show_streams",
+            "-show_entries", PROBE_ENTRIES,
             video_path
         ]
-        
+
         try:
-            proc_result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+            creation_flags = subprocess.CREATE_NO_WINDOW if platform.system() == "Windows" else 0
+            proc_result = subprocess.run(cmd, capture_output=True, text=True, timeout=30,
+                                         creationflags=creation_flags)
             if proc_result.returncode == 0:
-                import json
-                data = json.loads(proc_result.stdout)
-                
-                for s in data.get("streams", []):
-                    codec_type = s.get("codec_type", "")
-                    index = s.get("index", 0)
-                    codec = s.get("codec_name", "unk").upper()
-                    tags = s.get("tags", {})
-                    
-                    lang_code = tags.get("language") or tags.get("title") or ""
-                    from utils.helpers import get_language_name
-                    lang_name = get_language_name(lang_code) if lang_code else ""
-                    
-                    if codec_type == "audio":
-                        if not lang_name:
-                            channels = s.get("channels", "unknown")
-                            lang_name = f"{channels} Canais"
-                        result["audio"].append({
-                            "index": index,
-                            "title": f"Track {index}: {lang_name} ({codec})",
-                            "codec": codec,
-                            "language": lang_name
-                        })
-                    
-                    elif codec_type == "subtitle":
-                        if not lang_name:
-                            lang_name = codec
-
-                        disposition = s.get("disposition", {})
-                        title_tag = tags.get("title", "").lower()
-
-                        if disposition.get("forced", 0) == 1 or "forced" in title_tag:
-                            sub_type = "Forcada"
-                        elif disposition.get("visual_impaired", 0) == 1 or "descriptive" in title_tag:
-                            sub_type = "AD"
-                        elif disposition.get("hearing_impaired", 0) == 1 or "sdh" in title_tag:
-                            sub_type = "SDH"
-                        elif disposition.get("default", 0) == 1:
-                            sub_type = "Padrao"
-                        else:
-                            sub_type = "Normal"
-
-                        result["subtitles"].append({
-                            "index": index,
-                            "title": f"Track {index}: {lang_name} ({codec}) [{sub_type}]",
-                            "codec": codec.lower(),
-                            "language": lang_name
-                        })
-                
+                result = parse_probe(json.loads(proc_result.stdout))
+                self.probe_cache.put(video_path, PROBE_CACHE_KIND, result.to_dict())
+                return result
         except Exception as e:
-            print(f"Erro ao obter streams: {e}")
-            import traceback
-            traceback.print_exc()
-        
-        return result
+            print(f"Erro ao sondar video: {e}")
 
-    def get_duration(self, video_path: str) -> float:
-        """Retorna a duracao do video em segundos."""
-        if not self.ffprobe_path:
-            return 0.0
+        return ProbeResult()
 
-        cmd = [
-            self.ffprobe_path,
-            "-v", "quiet",
-            "-print_format", "json",
-            "-show_format",
-            video_path
-        ]
+    def get_audio_streams(self, video_path: str) -> List[Dict]:
+        """Retorna as faixas de audio do video (compatibilidade)."""
+        return self.get_streams(video_path).get("audio", [])
 
-        try:
-            proc_result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-            if proc_result.returncode == 0:
-                import json
-                data = json.loads(proc_result.stdout)
-                return float(data.get("format", {}).get("duration", 0))
-        except Exception:
-            pass
+    def get_streams(self, video_path: str) -> Dict[str, List[Dict]]:
+        """Retorna faixas de audio e legendas do video (compatibilidade, ver probe())."""
+        result = self.probe(video_path)
+        return {
+            "audio": [{"index": a.index, "title": a.title, "codec": a.codec, "language": a.language}
+                      for a in result.audio],
+            "subtitles": [{"index": s.index, "title": s.title, "codec": s.codec, "language": s.language}
+                          for s in result.subtitles]
+        }
 
-        return 0.0
+    def get_duration(self, video_path: str) -> float:
+        """Retorna a duracao do video em segundos."""
+        return self.probe(video_path).duration
 
     def generate_preview(self, options: ConversionOptions, output_path: str,
                          seek_seconds: float = 10.0) -> bool:
@@ -162,115 +181,262 @@ class FFmpegWrapper:
         if not self.ffmpeg_path:
             return False
 
-        cmd = self.build_command(options)
-        preview_cmd = [
-            self.ffmpeg_path, "-y",
-            "-ss", str(seek_seconds),
-            "-i", options.input_path,
-            "-vframes", "1",
-            "-q:v", "2"
-        ]
-
-        filter_complex = None
-        filter_parts = []
-
-        scale_filter = f"scale={options.preset.resolution}:force_original_aspect_ratio=decrease,pad={options.preset.resolution}:(ow-iw)/2:(oh-ih)/2"
-        filter_parts.append(scale_filter)
-
-        if options.watermark_text and self.font_path:
-            safe_text = escape_filter_text(options.watermark_text)
-            pos_map = {"top": "y=20", "center": "y=(h-text_h)/2", "bottom": "y=h-text_h-20"}
-            y_pos = pos_map.get(options.watermark_position, "y=20")
-            safe_font = escape_path_for_filter(self.font_path)
-            drawtext = (f"drawtext=fontfile='{safe_font}':text='{safe_text}':fontcolor=white@0.9:fontsize={options.watermark_size}:box=1:boxcolor=black@0.4:boxborderw=10:x=(w-text_w)/2:{y_pos}")
-            filter_parts.append(drawtext)
-
+        # O preview pode rodar durante uma conversao: a extracao nao usa self.process
+        self.prepare_subtitle(options, tracked=False)
+        self.prepare_watermark(options, tracked=False)
+        try:
+            returncode = self._run_quiet(self.build_preview_command(options, [seek_seconds], output_path))
+            return returncode == 0 and Path(output_path).exists()
+        except Exception:
+            return False
+    
+    def preview_timestamps(self, input_path: str, frames: int = 1) -> List[float]:
+        """Instantes do preview: um quadro no inicio do video ou ``frames`` espacados."""
+        duration = self.probe(input_path).duration
+        if frames <= 1:
+            return [min(duration * 0.15, 30) if duration > 0 else 10.0]
+        if duration <= 0:
+            return [10.0 * (k + 1) for k in range(frames)]
+        return [round(duration * (k + 1) / (frames + 1), 3) for k in range(frames)]
+    
+    def _preview_key(self, options: ConversionOptions, timestamps: List[float]):
+        """Tudo que muda a imagem do preview (None se o video nao existir)."""
+        source = file_identity(options.input_path)
+        if source is None:
+            return None
+        subtitle = None
         if options.subtitle_burn:
             if options.subtitle_path and Path(options.subtitle_path).exists():
-                safe_sub = escape_path_for_filter(options.subtitle_path)
-                filter_parts.append(f"subtitles='{safe_sub}'")
+                subtitle = file_identity(options.subtitle_path)
             elif options.subtitle_stream_index is not None:
-                safe_input = escape_path_for_filter(options.input_path)
-                filter_parts.append(f"subtitles='{safe_input}':si={options.subtitle_stream_index}")
+                subtitle = options.subtitle_stream_index
+        watermark = self._watermark_key(options) if options.watermark_text else None
+        return (source, options.preset.resolution, subtitle, watermark, tuple(timestamps))
+    
+    def render_preview(self, options: ConversionOptions, frames: int = 1) -> Optional[str]:
+        """Preview em cache (um quadro ou folha de contato com ``frames`` quadros).
 
-        if filter_parts:
-            preview_cmd.extend(["-vf", ",".join(filter_parts)])
+        Roda fora da thread da GUI: pode sondar o video, extrair a legenda e
+        renderizar o watermark na primeira vez. Retorna o caminho do JPEG.
+        """
+        if not self.ffmpeg_path:
+            return None
+        timestamps = self.preview_timestamps(options.input_path, frames)
+        key = self._preview_key(options, timestamps)
+        if key is None:
+            return None
+        cached = self.preview_cache.lookup(key)
+        if cached:
+            return cached
+        self.prepare_subtitle(options, tracked=False)
+        self.prepare_watermark(options, tracked=False)
+        return self.preview_cache.render(
+            key, lambda output: self.build_preview_command(options, timestamps, output), self._run_quiet)
+    
+    def build_preview_command(self, options: ConversionOptions, timestamps: List[float],
+                              output_path: str) -> List[str]:
+        """Comando que captura um quadro por instante, com os filtros da conversao.
 
-        preview_cmd.append(output_path)
+        Cada instante e uma entrada com busca por keyframe (``-noaccurate_seek``
+        e so keyframes decodificados), entao a folha inteira sai em uma chamada
+        sem decodificar o video ate o ponto. ``-copyts`` mantem os tempos
+        originais para o filtro ``subtitles`` mostrar a fala daquele trecho.
+        Com mais de um quadro, as miniaturas sao montadas em grade com ``xstack``.
+        """
+        count = len(timestamps)
+        cols = math.ceil(math.sqrt(count))
+        rows = math.ceil(count / cols)
+        cmd = [self.ffmpeg_path, "-y", "-nostdin", "-v", "error", "-copyts"]
+        for seconds in timestamps:
+            cmd.extend(["-skip_frame", "nokey", "-noaccurate_seek", "-ss", str(seconds),
+                        "-i", options.input_path])
 
-        try:
-            creation_flags = subprocess.CREATE_NO_WINDOW if platform.system() == "Windows" else 0
-            result = subprocess.run(preview_cmd, capture_output=True, timeout=30,
-                                     creationflags=creation_flags)
-            return result.returncode == 0 and Path(output_path).exists()
-        except Exception:
-            return False
+        extra = ["trim=end_frame=1", "setpts=PTS-STARTPTS"]
+        if count == 1:
+            graph = self.build_filter_graph(options, extra=extra)
+        else:
+            width = parse_resolution(options.preset.resolution)[0]
+            extra.append(f"scale={(width // cols) & ~1}:-2")
+            chains = [self.build_filter_graph(options, extra=extra, output=f"[t{i}]", source=f"[{i}:v]")
+                      for i in range(count)]
+            layout = "|".join(f"{'+'.join(['w0'] * (i % cols)) or '0'}_{'+'.join(['h0'] * (i // cols)) or '0'}"
+                              for i in range(count))
+            fill = ":fill=black" if count < cols * rows else ""
+            graph = (";".join(chains) + ";" + "".join(f"[t{i}]" for i in range(count))
+                     + f"xstack=inputs={count}:layout={layout}{fill}[vout]")
+
+        cmd.extend(["-filter_complex", graph, "-map", "[vout]", "-frames:v", "1",
+                    "-c:v", "mjpeg", "-q:v", "2", "-f", "image2", "-update", "1", output_path])
+        return cmd
     
-    def build_command(self, options: ConversionOptions) -> List[str]:
-        """Constrói o comando FFmpeg usando a lógica original."""
-        cmd = [self.ffmpeg_path, "-y", "-err_detect", "ignore_err", "-fflags", "+genpts"]
-        
-        if options.use_hardware_accel and self._has_nvidia_gpu():
-            cmd.extend(["-hwaccel", "cuda"])
-        
-        cmd.extend(["-i", options.input_path])
-        
-        filter_parts = []
-        
-        # Adiciona filtro de escala
-        scale_filter = f"scale={options.preset.resolution}:force_original_aspect_ratio=decrease,pad={options.preset.resolution}:(ow-iw)/2:(oh-ih)/2"
-        filter_parts.append(scale_filter)
+    def build_filter_graph(self, options: ConversionOptions, extra: List[str] = (),
+                           output: str = "[vout]", source: str = "[0:v]") -> str:
+        """Monta o grafo de video ``[0:v]...[vout]`` (escala, pad, watermark e legenda).
+
+        A geometria vem do probe: escala/pad que nao mudariam o quadro sao
+        omitidos (ver ``plan_geometry``). O watermark ja renderizado entra por
+        ``overlay`` no quadro final; sem o PNG, cai no drawtext.
+        ``extra`` sao filtros acrescentados no fim, ``output`` o(s) rotulo(s)
+        de saida e ``source`` o stream de entrada. Retorna "" sem filtros.
+        """
+        geometry = plan_geometry(self.probe(options.input_path), options.preset.resolution)
+        post_parts = []
+        overlay_png = None
         
         # Adiciona watermark se houver
         if options.watermark_text and self.font_path:
-            safe_text = escape_filter_text(options.watermark_text)
-            pos_map = {
-                "top": "y=20",
-                "center": "y=(h-text_h)/2",
-                "bottom": "y=h-text_h-20"
-            }
-            y_pos = pos_map.get(options.watermark_position, "y=20")
-            safe_font = escape_path_for_filter(self.font_path)
-            drawtext = (f"drawtext=fontfile='{safe_font}':text='{safe_text}':fontcolor=white@0.9:fontsize={options.watermark_size}:box=1:boxcolor=black@0.4:boxborderw=10:x=(w-text_w)/2:{y_pos}")
-            filter_parts.append(drawtext)
+            overlay_png = self.watermark_cache.lookup(*self._watermark_key(options))
+            if not overlay_png:
+                post_parts.append(drawtext_filter(options.watermark_text, self.font_path,
+                                                  options.watermark_size, options.watermark_position))
         
         # Adiciona legenda (externa ou embutida)
         if options.subtitle_burn:
             if options.subtitle_path and Path(options.subtitle_path).exists():
                 safe_sub = escape_path_for_filter(options.subtitle_path)
-                filter_parts.append(f"subtitles='{safe_sub}'")
+                post_parts.append(f"subtitles='{safe_sub}'")
             elif options.subtitle_stream_index is not None:
-                safe_input = escape_path_for_filter(options.input_path)
-                filter_parts.append(f"subtitles='{safe_input}':si={options.subtitle_stream_index}")
+                extracted = self.subtitle_cache.lookup(self._source_path(options.input_path),
+                                                       options.subtitle_stream_index)
+                if extracted:
+                    post_parts.append(f"subtitles='{escape_path_for_filter(extracted)}'")
+                else:
+                    safe_input = escape_path_for_filter(options.input_path)
+                    post_parts.append(f"subtitles='{safe_input}':si={self._subtitle_relative_index(options)}")
         
-        # Aplica filtros se houver
-        if filter_parts:
-            filter_complex = f"[0:v]{','.join(filter_parts)}[vout]"
-            cmd.extend(["-filter_complex", filter_complex, "-map", "[vout]"])
-        else:
-            cmd.extend(["-map", "0:v"])
+        post_parts.extend(extra)
         
-        # Mapeamento de áudio - exatamente como no código original
-        if options.audio_track_index is not None:
-            cmd.extend(["-map", f"0:{options.audio_track_index}"])
-        else:
-            cmd.extend(["-map", "0:a?"])
+        if not overlay_png:
+            chain = geometry + post_parts
+            return f"{source}{','.join(chain)}{output}" if chain else ""
         
-        # Encoder de vídeo
-        if options.use_hardware_accel and self._has_nvidia_gpu():
-            cmd.extend(["-c:v", "h264_nvenc", "-preset", options.preset.preset])
-        else:
-            cmd.extend(["-c:v", "libx264", "-preset", "medium"])
-        
-        # Encoder de áudio
-        if options.copy_audio:
-            cmd.extend(["-c:a", "copy"])
+        # Rotulos derivados da entrada, para varias cadeias caberem no mesmo grafo
+        suffix = "".join(c for c in source if c.isalnum())
+        suffix = "" if suffix == "0v" else suffix
+        base = source
+        graph = f"movie='{escape_path_for_filter(overlay_png)}'[wm{suffix}];"
+        if geometry:
+            graph += f"{source}{','.join(geometry)}[base{suffix}];"
+            base = f"[base{suffix}]"
+        graph += f"{base}[wm{suffix}]{overlay_filter(options.watermark_position)}"
+        if post_parts:
+            graph += "," + ",".join(post_parts)
+        return graph + output
+    
+    def output_options(self, options: ConversionOptions) -> List[ConversionOptions]:
+        """Opcoes de cada saida do job: a principal e uma por rendition."""
+        return [options] + [replace(options, preset=r.preset, output_path=r.output_path,
+                                    custom_bitrate=r.custom_bitrate, renditions=[])
+                            for r in options.renditions]
+    
+    def _shared_options(self, options: ConversionOptions) -> ConversionOptions:
+        """Saida de maior resolucao: legenda e watermark sao desenhados nesse tamanho."""
+        def pixels(opts: ConversionOptions) -> int:
+            width, height = parse_resolution(opts.preset.resolution)
+            return width * height
+        return max(self.output_options(options), key=pixels)
+    
+    def build_output_graph(self, options: ConversionOptions) -> str:
+        """Grafo completo do job; com renditions, decodifica e desenha uma vez e divide.
+
+        O trecho comum (escala e pad para a maior saida, watermark e legenda)
+        termina em ``split``; cada ramo ``[sN]`` so reescala para o seu preset
+        e sai em ``[vN]``. Sem renditions e o mesmo que ``build_filter_graph``.
+        """
+        if not options.renditions:
+            return self.build_filter_graph(options)
+        outputs = self.output_options(options)
+        shared = self._shared_options(options)
+        labels = "".join(f"[s{i}]" for i in range(len(outputs)))
+        graph = self.build_filter_graph(shared, extra=[f"split={len(outputs)}"], output=labels)
+        width, height = parse_resolution(shared.preset.resolution)
+        base = ProbeResult(width=width, height=height)
+        for i, output in enumerate(outputs):
+            geometry = plan_geometry(base, output.preset.resolution)
+            graph += f";[s{i}]{','.join(geometry) or 'null'}[v{i}]"
+        return graph
+    
+    def _watermark_key(self, options: ConversionOptions):
+        width, height = parse_resolution(options.preset.resolution)
+        return (options.watermark_text, self.font_path, options.watermark_size,
+                options.watermark_position, width, height)
+    
+    def prepare_watermark(self, options: ConversionOptions, log_callback=None, tracked: bool = True) -> bool:
+        """Renderiza o watermark em PNG para o cache, se ainda nao estiver la.
+
+        Se a renderizacao falhar, o grafo usa o drawtext como antes.
+        """
+        if not options.watermark_text or not self.font_path:
+            return True
+        key = self._watermark_key(options)
+        if self.watermark_cache.lookup(*key):
+            return True
+        rendered = self.watermark_cache.render(self.ffmpeg_path, *key,
+                                               run=self._run_tracked if tracked else self._run_quiet)
+        if not rendered and log_callback and not self._is_cancelled:
+            log_callback("Falha ao pre-renderizar o watermark; usando drawtext.")
+        return rendered is not None
+    
+    def _subtitle_relative_index(self, options: ConversionOptions) -> int:
+        """Converte o indice absoluto do stream no indice entre as legendas (``si``)."""
+        for position, track in enumerate(self.probe(options.input_path).subtitles):
+            if track.index == options.subtitle_stream_index:
+                return position
+        return 0
+    
+    def prepare_subtitle(self, options: ConversionOptions, log_callback=None, tracked: bool = True) -> bool:
+        """Extrai a legenda embutida a queimar para o cache, se ainda nao estiver la.
+
+        Retorna False apenas se a extracao falhar; nesse caso o filtro cai no
+        ``subtitles='video':si=N``, que le a faixa direto do video. Com
+        ``tracked`` o processo de extracao pode ser cancelado por ``stop``.
+        """
+        if not options.subtitle_burn or options.subtitle_stream_index is None:
+            return True
+        if options.subtitle_path and Path(options.subtitle_path).exists():
+            return True
+        source = self._source_path(options.input_path)
+        if self.subtitle_cache.lookup(source, options.subtitle_stream_index):
+            return True
+        if log_callback:
+            log_callback(f"Extraindo legenda embutida (stream {options.subtitle_stream_index})...")
+        extracted = self.subtitle_cache.extract(self.ffmpeg_path, source,
+                                                options.subtitle_stream_index,
+                                                self._run_tracked if tracked else self._run_quiet)
+        if not extracted and log_callback and not self._is_cancelled:
+            log_callback("Falha ao extrair a legenda; lendo a faixa direto do video.")
+        return extracted is not None
+    
+    def _source_path(self, path: str) -> str:
+        """Caminho original de uma entrada copiada para o rascunho (ou o proprio caminho)."""
+        return self._staged_sources.get(path, path)
+
+    def _run_tracked(self, cmd: List[str]) -> int:
+        """Executa um comando auxiliar em ``self.process`` (cancelavel por ``stop``)."""
+        if self._is_cancelled:
+            return -2
+        creation_flags = subprocess.CREATE_NO_WINDOW if platform.system() == "Windows" else 0
+        self.process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                        creationflags=creation_flags)
+        self.process.communicate()
+        return self.process.returncode
+    
+    def _run_quiet(self, cmd: List[str]) -> int:
+        creation_flags = subprocess.CREATE_NO_WINDOW if platform.system() == "Windows" else 0
+        return subprocess.run(cmd, capture_output=True, creationflags=creation_flags).returncode
+    
+    def video_encoder_args(self, options: ConversionOptions, use_nvenc: bool) -> List[str]:
+        """Retorna os argumentos do encoder de video e de bitrate."""
+        if use_nvenc:
+            args = ["-c:v", "h264_nvenc", "-preset", options.preset.preset]
         else:
-            cmd.extend(["-c:a", "aac", "-b:a", options.preset.audio_bitrate])
+            args = ["-c:v", "libx264", "-preset", "medium"]
+            if options.threads > 0:
+                # Jobs simultaneos dividem os nucleos em vez de cada um usar todos
+                args.extend(["-threads", str(options.threads)])
         
-        # Parâmetros de bitrate
         bitrate_val = options.custom_bitrate if options.custom_bitrate else options.preset.bitrate
-        cmd.extend([
+        args.extend([
             "-rc", "vbr",
             "-b:v", bitrate_val,
             "-maxrate", options.preset.maxrate,
@@ -278,17 +444,350 @@ class FFmpegWrapper:
             "-profile:v", "high",
             "-pix_fmt", "yuv420p"
         ])
+        return args
+    
+    def audio_encoder_args(self, options: ConversionOptions) -> List[str]:
+        """Retorna os argumentos do encoder de audio."""
+        if options.copy_audio:
+            return ["-c:a", "copy"]
+        return ["-c:a", "aac", "-b:a", options.preset.audio_bitrate]
+    
+    def audio_map_args(self, options: ConversionOptions, input_index: int = 0) -> List[str]:
+        """Retorna o mapeamento da faixa de audio escolhida (ou de todas)."""
+        if options.audio_track_index is not None:
+            return ["-map", f"{input_index}:{options.audio_track_index}"]
+        return ["-map", f"{input_index}:a?"]
+    
+    def output_args(self, options: ConversionOptions) -> List[str]:
+        """Argumentos do muxer conforme a estrategia de gravacao (ver ``ffmpeg.output``)."""
+        strategy, _ = resolve_strategy(options.output_strategy, options.output_path)
+        probe = self.probe(options.input_path)
+        audio_tracks = 1 if options.audio_track_index is not None else len(probe.audio)
+        return movflags_args(strategy, probe, audio_tracks)
+    
+    def plan_video(self, options: ConversionOptions) -> VideoPlan:
+        """Decide entre copiar o video (remux) e reencodar, pelos dados do probe."""
+        return plan_video(options, self.probe(options.input_path))
+    
+    def build_command(self, options: ConversionOptions) -> List[str]:
+        """Constrói o comando FFmpeg usando a lógica original."""
+        cmd = [self.ffmpeg_path, "-y", "-err_detect", "ignore_err", "-fflags", "+genpts"]
+        
+        if self.plan_video(options).copy:
+            # Origem ja atende o preset: so remux do video, audio segue as opcoes
+            cmd.extend(["-i", options.input_path, "-map", "0:v:0"])
+            cmd.extend(self.audio_map_args(options))
+            cmd.extend(["-c:v", "copy"])
+            cmd.extend(self.audio_encoder_args(options))
+            if options.preserve_metadata:
+                cmd.extend(["-map_metadata", "0"])
+            cmd.extend(self.output_args(options))
+            cmd.append(options.output_path)
+            return cmd
+        
+        use_nvenc = options.use_hardware_accel and self._has_nvidia_gpu()
+        
+        if use_nvenc and self.capabilities.cuda_decode:
+            cmd.extend(["-hwaccel", "cuda"])
+        
+        cmd.extend(["-i", options.input_path])
+        
+        if options.renditions:
+            # Uma saida por ramo do split, cada uma com seu encoder e bitrate
+            cmd.extend(["-filter_complex", self.build_output_graph(options)])
+            for i, output in enumerate(self.output_options(options)):
+                cmd.extend(["-map", f"[v{i}]"])
+                cmd.extend(self.audio_map_args(output))
+                cmd.extend(self.video_encoder_args(output, use_nvenc))
+                cmd.extend(self.audio_encoder_args(output))
+                if output.preserve_metadata:
+                    cmd.extend(["-map_metadata", "0"])
+                cmd.extend(self.output_args(output))
+                cmd.append(output.output_path)
+            return cmd
+        
+        filter_graph = self.build_filter_graph(options)
+        
+        # Aplica filtros se houver
+        if filter_graph:
+            cmd.extend(["-filter_complex", filter_graph, "-map", "[vout]"])
+        else:
+            # Origem ja no tamanho do preset e nada a desenhar: sem grafo de filtros
+            cmd.extend(["-map", "0:v:0"])
+        
+        # Mapeamento de áudio - exatamente como no código original
+        cmd.extend(self.audio_map_args(options))
+        
+        # Encoders de vídeo e áudio
+        cmd.extend(self.video_encoder_args(options, use_nvenc))
+        cmd.extend(self.audio_encoder_args(options))
         
         # Metadados
         if options.preserve_metadata:
             cmd.extend(["-map_metadata", "0"])
         
-        cmd.extend(["-movflags", "+faststart", options.output_path])
+        cmd.extend(self.output_args(options))
+        cmd.append(options.output_path)
         
         return cmd
     
-    def convert(self, options: ConversionOptions, progress_callback=None, log_callback=None) -> int:
-        """Executa a conversão usando a lógica original. Retorna o returncode do processo."""
+    def estimate_output_size(self, options: ConversionOptions, duration: float) -> int:
+        """Tamanho esperado da saida em bytes (bitrate alvo x duracao)."""
+        video_kbps = parse_bitrate_kbps(options.custom_bitrate or options.preset.bitrate)
+        audio_kbps = parse_bitrate_kbps(options.preset.audio_bitrate)
+        return int((video_kbps + audio_kbps) * 1000 / 8 * max(duration, 0.0))
+
+    def prepare_job(self, options: ConversionOptions) -> List[str]:
+        """Faz antes do job o que nao depende do encoder: probe, extracao da legenda e
+        renderizacao do watermark (ficam em cache para o ``convert``).
+
+        Retorna o que falta no FFmpeg para as opcoes, como ``check_requirements``.
+        """
+        self.probe(options.input_path)
+        self.prepare_subtitle(options, tracked=False)
+        self.prepare_watermark(self._shared_options(options), tracked=False)
+        return self.check_requirements(options)
+
+    def result_key(self, options: ConversionOptions) -> Optional[str]:
+        """Chave do cache de resultados: impressao da entrada + comando efetivo.
+
+        Os caminhos saem do comando (entrada, saidas e, dentro do grafo, a
+        legenda, o PNG do watermark e a fonte); no lugar deles entram o
+        conteudo da legenda, os parametros do watermark com a impressao da
+        fonte e o modo de segmentacao, que muda o arquivo sem aparecer no
+        comando. Espera a legenda e o watermark ja preparados (``prepare_job``).
+        """
+        fingerprint = fast_fingerprint(options.input_path, self.probe_cache)
+        if fingerprint is None:
+            return None
+        placeholders = {options.input_path: "<input>"}
+        subtitle = ""
+        if options.subtitle_burn:
+            source = None
+            if options.subtitle_path and Path(options.subtitle_path).exists():
+                source = options.subtitle_path
+            elif options.subtitle_stream_index is not None:
+                source = self.subtitle_cache.lookup(self._source_path(options.input_path),
+                                                    options.subtitle_stream_index)
+            if source:
+                placeholders[source] = "<subtitle>"
+                subtitle = fast_fingerprint(source, self.probe_cache) or ""
+        watermark = None
+        if options.watermark_text and self.font_path:
+            key = self._watermark_key(self._shared_options(options))
+            png = self.watermark_cache.lookup(*key)
+            if png:
+                placeholders[png] = "<watermark>"
+            placeholders[self.font_path] = "<font>"
+            watermark = [key[0], fast_fingerprint(self.font_path, self.probe_cache), *key[2:]]
+        plan = self.plan_video(options)
+        segments = 0
+        if not options.renditions and not plan.copy:
+            use_nvenc = options.use_hardware_accel and self._has_nvidia_gpu()
+            segments = segment_worker_budget(options, use_nvenc)
+        outputs = {o.output_path for o in self.output_options(options)}
+        escaped = sorted(((escape_path_for_filter(path), token) for path, token in placeholders.items()),
+                         key=lambda pair: -len(pair[0]))
+        canonical = []
+        for arg in self.build_command(options):
+            if arg == options.input_path or arg in outputs:
+                continue
+            for path, token in escaped:
+                arg = arg.replace(path, token)
+            canonical.append(arg)
+        payload = json.dumps([fingerprint, subtitle, watermark, segments, canonical], ensure_ascii=False)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def cached_outputs(self, options: ConversionOptions) -> Optional[List[str]]:
+        """Saidas de uma conversao anterior identica, se ainda existirem intactas."""
+        cache = self.result_cache or shared_result_cache()
+        key = self.result_key(options) if cache is not None and self.ffmpeg_path else None
+        return cache.lookup(key) if key else None
+
+    def remember_result(self) -> None:
+        """Registra no cache as saidas da ultima conversao (com commit adiado, depois de conferidas)."""
+        if self._pending_result is None:
+            return
+        cache, key, paths = self._pending_result
+        self._pending_result = None
+        cache.store(key, paths)
+
+    def convert(self, options: ConversionOptions, progress_callback=None, log_callback=None,
+                stats_callback=None, output_callback=None, defer_commit: bool = False) -> int:
+        """Executa a conversão usando a lógica original. Retorna o returncode do processo.
+
+        ``progress_callback`` recebe o percentual inteiro (so quando muda) e
+        ``stats_callback`` recebe cada ProgressInfo do ``-progress`` do FFmpeg,
+        ja com a velocidade suavizada (``realtime``) e o ``eta`` do job.
+        Com renditions, ``output_callback(indice, percentual, bytes)`` informa
+        o andamento de cada saida (0 e a principal).
+        Ao terminar, ``self.telemetry`` guarda o JobTelemetry da conversao.
+        Com ``defer_commit``, saidas gravadas no rascunho local so vao para o
+        destino em ``commit_outputs`` (o encoder fica livre durante a copia)
+        e o resultado so entra no cache em ``remember_result``.
+        Se o cache de resultados tem uma conversao identica, as saidas sao
+        criadas a partir dela sem codificar (``cache_hit``).
+        """
+        started_at = time.time()
+        started = time.monotonic()
+        self._usage = ChildUsage()
+        self._tail = TailTimer()
+        self.telemetry = None
+        last_info: List[ProgressInfo] = []
+
+        def on_stats(info: ProgressInfo) -> None:
+            last_info[:] = [info]
+            if stats_callback:
+                stats_callback(info)
+
+        self._staged_sources = {}
+        self._is_cancelled = False
+        if self.ffmpeg_path:
+            # Antes do rascunho: a legenda e extraida e cacheada pelo video original
+            self.prepare_subtitle(options, log_callback)
+            self.prepare_watermark(self._shared_options(options), log_callback)
+            if self._is_cancelled:
+                return -2
+        if self._reuse_result(options, progress_callback, log_callback, output_callback):
+            return 0
+
+        staging = self.staging or shared_staging()
+        staged = self._stage(staging, options, log_callback) if staging and self.ffmpeg_path else options
+        returncode = self._convert(staged, progress_callback, log_callback, on_stats, output_callback)
+        if staged is not options:
+            if staged.input_path != options.input_path:
+                staging.release(staged.input_path)
+            self._pending_commit = (staging, staged, options)
+            if returncode != 0 or not defer_commit:
+                returncode = self.commit_outputs(returncode, log_callback)
+        if self.ffmpeg_path:
+            self.telemetry = self._build_telemetry(options, returncode, started_at,
+                                                   time.monotonic() - started,
+                                                   last_info[0] if last_info else None,
+                                                   staged.output_path)
+            if log_callback and returncode == 0:
+                log_callback(self._output_report(staged, self.telemetry))
+        if returncode != 0:
+            self._pending_result = None
+        elif not defer_commit:
+            self.remember_result()
+        return returncode
+
+    def _reuse_result(self, options: ConversionOptions, progress_callback=None, log_callback=None,
+                      output_callback=None) -> bool:
+        """Atende o job pelo cache de resultados; True se nao precisar codificar."""
+        self.cache_hit = None
+        self._pending_result = None
+        cache = self.result_cache or shared_result_cache()
+        if cache is None or not self.ffmpeg_path:
+            return False
+        key = self.result_key(options)
+        if key is None:
+            return False
+        targets = [o.output_path for o in self.output_options(options)]
+        if not cache.satisfy(key, targets):
+            self.cache_hit = False
+            self._pending_result = (cache, key, targets)
+            return False
+        self.cache_hit = True
+        self.output_path = options.output_path
+        if log_callback:
+            log_callback("Resultado reaproveitado (mesma entrada e mesmo comando): "
+                         + ", ".join(Path(path).name for path in targets))
+        if progress_callback:
+            progress_callback(100)
+        for index, path in enumerate(targets if output_callback else []):
+            output_callback(index, 100, _file_size(path))
+        return True
+
+    def _stage(self, staging: ScratchStaging, options: ConversionOptions, log_callback=None) -> ConversionOptions:
+        """Opcoes com a entrada e as saidas no rascunho local (as que estiverem em rede)."""
+        input_path = staging.stage_input(options.input_path, log_callback)
+        duration = self.probe(options.input_path).duration
+        finals = self.output_options(options)
+        outputs = [staging.output_path(o.output_path, self.estimate_output_size(o, duration)) for o in finals]
+        if input_path == options.input_path and outputs == [o.output_path for o in finals]:
+            return options
+        if input_path != options.input_path:
+            self._staged_sources[input_path] = options.input_path
+        if log_callback:
+            log_callback(f"Rascunho local: {staging.directory}")
+        return replace(
+            options, input_path=input_path, output_path=outputs[0],
+            renditions=[replace(r, output_path=path) for r, path in zip(options.renditions, outputs[1:])]
+        )
+
+    def commit_outputs(self, returncode: int = 0, log_callback=None) -> int:
+        """Move as saidas do rascunho para o destino (ou as descarta se o job falhou).
+
+        Sem saidas pendentes no rascunho, apenas devolve ``returncode``.
+        """
+        if self._pending_commit is None:
+            return returncode
+        staging, staged, options = self._pending_commit
+        self._pending_commit = None
+        pairs = zip([o.output_path for o in self.output_options(staged)],
+                    [o.output_path for o in self.output_options(options)])
+        for scratch, final in pairs:
+            if returncode != 0:
+                staging.discard_output(scratch, final)
+                continue
+            try:
+                staging.commit_output(scratch, final)
+            except OSError as e:
+                if log_callback:
+                    log_callback(f"ERRO ao mover {scratch} para {final}: {e}")
+                staging.discard_output(scratch, final)
+                returncode = -1
+        self.output_path = options.output_path
+        return returncode
+
+    def _output_report(self, options: ConversionOptions, telemetry: JobTelemetry) -> str:
+        """Linha de log com a estrategia de gravacao, a vazao e o tempo de finalizacao."""
+        strategy, reason = resolve_strategy(options.output_strategy, options.output_path)
+        return (f"Saida: {strategy} ({reason}) - {telemetry.output_size / 1048576:.0f} MB em "
+                f"{telemetry.wall_time:.0f}s ({telemetry.write_throughput / 1048576:.1f} MB/s), "
+                f"finalizacao {telemetry.tail_time:.1f}s")
+
+    def _build_telemetry(self, options: ConversionOptions, returncode: int, started_at: float,
+                         wall_time: float, last_info: Optional[ProgressInfo],
+                         written_path: str = "") -> JobTelemetry:
+        probe = self.probe(options.input_path)
+        # Com commit adiado, a saida ainda esta no rascunho
+        output_size = _file_size(options.output_path) or _file_size(written_path)
+        frames = last_info.frame if last_info else 0
+        if not frames and returncode == 0:
+            # A codificacao segmentada nao informa frames; estima pela taxa da origem
+            frames = int(probe.duration * probe.fps)
+        usage = self._usage or ChildUsage()
+        if self.plan_video(options).copy:
+            encoder = "copy"
+        else:
+            encoder = "h264_nvenc" if options.use_hardware_accel and self._has_nvidia_gpu() else "libx264"
+        # Com rascunho, a estrategia e a do arquivo gravado localmente
+        strategy, _ = resolve_strategy(options.output_strategy, written_path or options.output_path)
+        return JobTelemetry(
+            input_path=options.input_path,
+            output_path=options.output_path,
+            preset=options.preset.name,
+            encoder=encoder,
+            filters=filter_names(self.build_output_graph(options)),
+            returncode=returncode,
+            started_at=started_at,
+            wall_time=wall_time,
+            media_duration=probe.duration,
+            frames=frames,
+            output_size=output_size,
+            estimated_size=self.estimate_output_size(options, probe.duration),
+            cpu_user=usage.cpu_user,
+            cpu_system=usage.cpu_system,
+            peak_rss_kb=usage.peak_rss_kb,
+            output_strategy=strategy,
+            tail_time=self._tail.seconds
+        )
+
+    def _convert(self, options: ConversionOptions, progress_callback=None, log_callback=None,
+                 stats_callback=None, output_callback=None) -> int:
         if not self.ffmpeg_path:
             if log_callback:
                 log_callback("ERRO: FFmpeg não encontrado")
@@ -297,57 +796,82 @@ class FFmpegWrapper:
         self.options = options
         self.output_path = options.output_path
         self._is_cancelled = False
+
+        plan = self.plan_video(options)
+        if log_callback:
+            log_callback(plan.describe())
+
+        self.prepare_subtitle(options, log_callback)
+        self.prepare_watermark(self._shared_options(options), log_callback)
+        if self._is_cancelled:
+            return -2
+
+        missing = self.check_requirements(options)
+        if missing:
+            if log_callback:
+                log_callback(f"ERRO: o FFmpeg em {self.ffmpeg_path} nao tem: {', '.join(missing)}")
+            return -1
+
+        if log_callback and not plan.copy:
+            filter_graph = self.build_output_graph(options)
+            log_callback(f"Filtros: {filter_graph}" if filter_graph
+                         else "Filtros: nenhum (sem -filter_complex)")
+
+        if options.renditions:
+            if log_callback:
+                log_callback("Saidas: " + ", ".join(f"{o.preset.name} -> {o.output_path}"
+                                                    for o in self.output_options(options)))
+        elif options.segment_workers > 1 and not plan.copy:
+            returncode = self._convert_segmented(options, progress_callback, log_callback, stats_callback)
+            if returncode is not None:
+                return returncode
+
         cmd = self.build_command(options)
         
         if log_callback:
             log_callback(f"Comando: {' '.join(cmd)}")
         
-        total_duration = 0
+        total_duration = self.probe(options.input_path).duration
         creation_flags = 0
         
         if platform.system() == "Windows":
             creation_flags = subprocess.CREATE_NO_WINDOW
         
+        last_percent = -1
+        estimator = ThroughputEstimator(total_duration)
+        output_paths = [o.output_path for o in self.output_options(options)] if output_callback else []
+
+        def on_progress(info: ProgressInfo) -> None:
+            nonlocal last_percent
+            if not info.done:
+                self._tail.mark()
+            if stats_callback:
+                stats_callback(estimator.annotate(info))
+            if total_duration > 0:
+                percent = min(int((info.out_time / total_duration) * 100), 99)
+                # Only emit when the integer percentage changes to avoid flooding the UI thread
+                if percent != last_percent:
+                    if progress_callback:
+                        progress_callback(percent)
+                    # O -progress e do processo inteiro; o tamanho vem de cada arquivo
+                    for index, path in enumerate(output_paths):
+                        output_callback(index, percent, _file_size(path))
+                    last_percent = percent
+
         try:
             self.process = subprocess.Popen(
-                cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                with_progress_args(cmd), stdout=subprocess.PIPE, stderr=subprocess.PIPE,
                 text=True, encoding='utf-8', errors='replace', creationflags=creation_flags
             )
+            read_progress(self.process, on_progress, log_callback)
             
-            last_percent = -1
-            for line in self.process.stdout:
-                # Skip emitting progress updates to log to save UI resources
-                if "time=" not in line.strip():
-                    if log_callback:
-                        log_callback(line.strip())
-                
-                # Use string membership checks before regex to reduce CPU overhead in hot loop
-                if total_duration == 0:
-                    if "Duration:" in line.strip():
-                        d_match = DURATION_PATTERN.search(line.strip())
-                        if d_match:
-                            h, m, s = map(float, d_match.groups())
-                            total_duration = h * 3600 + m * 60 + s
-                            continue # Skip time search for the same line
-                
-                else: # total_duration > 0
-                    if "time=" in line.strip():
-                        t_match = TIME_PATTERN.search(line.strip())
-                        if t_match:
-                            h, m, s = map(float, t_match.groups())
-                            current_time = h * 3600 + m * 60 + s
-                            percent = min(int((current_time / total_duration) * 100), 99)
-                            # Optimization: Only emit signal when percentage changes to avoid flooding the UI thread
-                            if percent != last_percent:
-                                if progress_callback:
-                                    progress_callback(percent)
-                                last_percent = percent
-            
-            self.process.wait()
-            returncode = self.process.returncode
+            returncode = wait_process(self.process, self._usage)
+            self._tail.finish()
             
             if progress_callback:
                 progress_callback(100)
+            for index, path in enumerate(output_paths):
+                output_callback(index, 100, _file_size(path))
             
             return -2 if self._is_cancelled else returncode
         except Exception as e:
@@ -357,9 +881,35 @@ class FFmpegWrapper:
                 progress_callback(100)
             return -1
     
+    def _convert_segmented(self, options: ConversionOptions, progress_callback=None,
+                           log_callback=None, stats_callback=None) -> Optional[int]:
+        """Converte em trechos paralelos; None se o video nao puder ser dividido."""
+        from ffmpeg.segmenter import SegmentedEncoder
+
+        duration = self.probe(options.input_path).duration
+        self._segmenter = SegmentedEncoder(self, options.segment_workers)
+        try:
+            returncode = self._segmenter.run(options, duration, progress_callback, log_callback,
+                                             stats_callback)
+        except Exception as e:
+            if log_callback:
+                log_callback(f"ERRO na codificacao segmentada: {str(e)}")
+            returncode = -1
+        finally:
+            self._segmenter = None
+        if returncode is None:
+            if log_callback:
+                log_callback("Usando conversao normal.")
+            return None
+        if progress_callback:
+            progress_callback(100)
+        return -2 if self._is_cancelled else returncode
+    
     def stop(self):
         """Cancela a conversao - usando a logica original."""
         self._is_cancelled = True
+        if self._segmenter:
+            self._segmenter.stop()
         if self.process:
             self.process.terminate()
             try:
@@ -371,3 +921,10 @@ class FFmpegWrapper:
                     self.process.kill()
                 except Exception:
                     pass
+
+
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
@@ -0,0 +1,6 @@
+"""Configuracao dos testes: o pacote roda a partir da raiz do repositorio."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,70 @@
+"""Testes da base dos caches de arquivos (legendas, watermarks, previews)."""
+
+import os
+from pathlib import Path
+
+from ffmpeg.file_cache import configure_file_cache, shared_file_cache
+from ffmpeg.preview_cache import PreviewCache
+from ffmpeg.subtitle_cache import SubtitleCache
+from ffmpeg.watermark import WatermarkCache
+
+
+class _FakeRun:
+    """Faz as vezes do FFmpeg: grava o ultimo argumento (a saida) e conta as chamadas."""
+
+    def __init__(self, returncode: int = 0):
+        self.returncode = returncode
+        self.calls = 0
+
+    def __call__(self, cmd):
+        self.calls += 1
+        Path(cmd[-1]).write_bytes(b"gerado")
+        return self.returncode
+
+
+def test_render_once_then_reuse(tmp_path):
+    cache = PreviewCache(str(tmp_path))
+    run = _FakeRun()
+    first = cache.render(("video", 1.0), lambda out: ["ffmpeg", out], run)
+    assert first and first.endswith(".jpg") and os.path.exists(first)
+    assert cache.render(("video", 1.0), lambda out: ["ffmpeg", out], run) == first
+    assert cache.lookup(("video", 1.0)) == first
+    assert run.calls == 1
+
+
+def test_failed_command_leaves_nothing(tmp_path):
+    cache = PreviewCache(str(tmp_path))
+    assert cache.render("chave", lambda out: ["ffmpeg", out], _FakeRun(returncode=1)) is None
+    assert cache.lookup("chave") is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_prune_keeps_most_recent(tmp_path):
+    cache = PreviewCache(str(tmp_path), max_files=2)
+    run = _FakeRun()
+    paths = [cache.render(i, lambda out: ["ffmpeg", out], run) for i in range(2)]
+    os.utime(paths[0], (0, 0))
+    cache.render(2, lambda out: ["ffmpeg", out], run)
+    assert not os.path.exists(paths[0])
+    assert len(list(tmp_path.glob("*.jpg"))) == 2
+
+
+def test_subtitle_key_follows_file_identity(tmp_path):
+    video = tmp_path / "video.mkv"
+    video.write_bytes(b"x")
+    cache = SubtitleCache(str(tmp_path / "subs"))
+    run = _FakeRun()
+    extracted = cache.extract("ffmpeg", str(video), 2, run)
+    assert extracted.endswith(".ass")
+    assert cache.lookup(str(video), 3) is None
+    video.write_bytes(b"outro conteudo")
+    assert cache.lookup(str(video), 2) is None
+    assert cache.extract("ffmpeg", str(tmp_path / "sumiu.mkv"), 2, run) is None
+
+
+def test_shared_caches_are_per_class(tmp_path):
+    subs = configure_file_cache(SubtitleCache, str(tmp_path / "subs"))
+    marks = configure_file_cache(WatermarkCache, str(tmp_path / "marks"), max_files=5)
+    assert shared_file_cache(SubtitleCache) is subs
+    assert shared_file_cache(WatermarkCache) is marks
+    assert (subs.max_files, marks.max_files) == (SubtitleCache.default_max_files, 5)
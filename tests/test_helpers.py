@@ -0,0 +1,24 @@
+"""Testes da concorrencia automatica do lote e das threads por job."""
+
+import pytest
+
+from utils import helpers
+from utils.helpers import default_batch_concurrency, encoder_threads
+
+
+@pytest.mark.parametrize("cores, expected", [(1, 1), (3, 1), (4, 2), (8, 2), (12, 3), (16, 4), (64, 8)])
+def test_default_concurrency_follows_cores(monkeypatch, cores, expected):
+    monkeypatch.setattr(helpers.os, "cpu_count", lambda: cores)
+    assert default_batch_concurrency() == expected
+
+
+def test_default_concurrency_with_nvenc_ignores_cores(monkeypatch):
+    monkeypatch.setattr(helpers.os, "cpu_count", lambda: 64)
+    assert default_batch_concurrency(use_hardware_accel=True) == 2
+
+
+def test_encoder_threads_split_cores_between_jobs(monkeypatch):
+    monkeypatch.setattr(helpers.os, "cpu_count", lambda: 12)
+    assert encoder_threads(3) == 4
+    assert encoder_threads(0) == 12
+    assert encoder_threads(24) == 1
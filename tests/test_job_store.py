@@ -0,0 +1,86 @@
+"""Testes da fila persistente: retomada apos queda e limpeza de itens antigos."""
+
+import sqlite3
+from types import SimpleNamespace
+
+from config.job_store import JobStore
+
+
+def _item(**fields) -> SimpleNamespace:
+    values = dict(path="video.mkv", status="pending", output_path="", output_name="", error_msg="",
+                  subtitle_path="", subtitle_stream_index=None, subtitle_burn=False,
+                  audio_track_index=None, detected_external="", partial_paths=[])
+    values.update(fields)
+    return SimpleNamespace(**values)
+
+
+def test_load_unfinished_requeues_interrupted_and_skips_done(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    store.add(_item(path="a.mkv"))
+    store.add(_item(path="b.mkv", status="converting", output_path=str(tmp_path / "b.mp4")))
+    store.add(_item(path="c.mkv", status="done"))
+    rows = store.load_unfinished()
+    assert [(row["path"], row["status"], row["output_path"]) for row in rows] == [
+        ("a.mkv", "pending", ""), ("b.mkv", "pending", "")]
+    store.close()
+
+
+def test_load_unfinished_deletes_only_partials_the_job_created(tmp_path):
+    previous = tmp_path / "reused.mp4"
+    partial = tmp_path / "partial.mp4"
+    previous.write_bytes(b"saida completa de outra sessao")
+    partial.write_bytes(b"pela metade")
+    store = JobStore(str(tmp_path / "jobs.db"))
+    store.add(_item(status="converting", output_path=str(previous)))
+    store.add(_item(status="converting", output_path=str(partial), partial_paths=[str(partial)]))
+    store.load_unfinished()
+    assert previous.exists()
+    assert not partial.exists()
+    # Ja re-enfileirados: uma segunda abertura nao apaga mais nada
+    partial.write_bytes(b"nova")
+    store.load_unfinished()
+    assert partial.exists()
+    store.close()
+
+
+def test_old_finished_rows_are_purged_on_open(tmp_path):
+    db_path = str(tmp_path / "jobs.db")
+    store = JobStore(db_path)
+    for status in ("done", "error", "pending"):
+        store.add(_item(path=f"{status}.mkv", status=status))
+    fresh = _item(path="recent.mkv", status="done")
+    store.add(fresh)
+    with store._conn:
+        store._conn.execute("UPDATE jobs SET updated_at = 0 WHERE id != ?", (fresh.job_id,))
+    store.close()
+
+    store = JobStore(db_path, retention_days=30)
+    paths = {row[0] for row in store._conn.execute("SELECT path FROM jobs")}
+    assert paths == {"pending.mkv", "recent.mkv"}
+    store.close()
+
+
+def test_old_database_gains_partial_paths_column(tmp_path):
+    db_path = str(tmp_path / "jobs.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE jobs (id INTEGER PRIMARY KEY AUTOINCREMENT, path TEXT NOT NULL,"
+                 " status TEXT NOT NULL DEFAULT 'pending', output_path TEXT NOT NULL DEFAULT '',"
+                 " output_name TEXT NOT NULL DEFAULT '', error_msg TEXT NOT NULL DEFAULT '',"
+                 " subtitle_path TEXT NOT NULL DEFAULT '', subtitle_stream_index INTEGER,"
+                 " subtitle_burn INTEGER NOT NULL DEFAULT 0, audio_track_index INTEGER,"
+                 " detected_external TEXT NOT NULL DEFAULT '',"
+                 " created_at REAL NOT NULL, updated_at REAL NOT NULL)")
+    conn.execute("INSERT INTO jobs (path, status, output_path, created_at, updated_at)"
+                 " VALUES ('old.mkv', 'converting', 'old.mp4', 0, 0)")
+    conn.commit()
+    conn.close()
+    store = JobStore(db_path)
+    assert [row["path"] for row in store.load_unfinished()] == ["old.mkv"]
+    store.close()
+
+
+def test_commits_are_synced_to_disk(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    # 2 = FULL: o status "done" nao se perde numa queda de energia
+    assert store._conn.execute("PRAGMA synchronous").fetchone()[0] == 2
+    store.close()
@@ -0,0 +1,39 @@
+"""Testes das estrategias de gravacao do MP4."""
+
+from ffmpeg import output
+from ffmpeg.output import (OUTPUT_AUTO, OUTPUT_FASTSTART, OUTPUT_FRAGMENTED, OUTPUT_RESERVE,
+                           estimate_moov_size, movflags_args, resolve_strategy)
+from ffmpeg.probe import ProbeResult
+
+
+def test_auto_uses_faststart_on_local_disk(monkeypatch):
+    monkeypatch.setattr(output, "is_network_path", lambda path: False)
+    assert resolve_strategy(OUTPUT_AUTO, "/home/user/out.mp4") == (OUTPUT_FASTSTART, "auto, disco local")
+    assert resolve_strategy("desconhecida", "out.mp4")[0] == OUTPUT_FASTSTART
+
+
+def test_auto_writes_fragmented_to_network_share(monkeypatch):
+    monkeypatch.setattr(output, "is_network_path", lambda path: path.startswith("/mnt/share"))
+    assert resolve_strategy(OUTPUT_AUTO, "/mnt/share/out.mp4") == (OUTPUT_FRAGMENTED, "auto, destino em rede")
+
+
+def test_explicit_strategies_are_kept(monkeypatch):
+    monkeypatch.setattr(output, "is_network_path", lambda path: True)
+    for strategy in (OUTPUT_FASTSTART, OUTPUT_FRAGMENTED, OUTPUT_RESERVE):
+        assert resolve_strategy(strategy, "out.mp4") == (strategy, "escolhida")
+
+
+def test_movflags_per_strategy():
+    probe = ProbeResult(duration=60.0, fps=30.0)
+    assert movflags_args(OUTPUT_FASTSTART, probe, 1) == ["-movflags", "+faststart"]
+    assert movflags_args(OUTPUT_FRAGMENTED, probe, 1)[1].startswith("+frag_keyframe")
+    assert movflags_args(OUTPUT_RESERVE, probe, 1) == ["-moov_size", str(estimate_moov_size(probe, 1))]
+    # Sem duracao nao da para reservar: volta ao faststart
+    assert movflags_args(OUTPUT_RESERVE, ProbeResult(), 1) == ["-movflags", "+faststart"]
+
+
+def test_moov_estimate_grows_with_duration_and_tracks():
+    short = ProbeResult(duration=60.0, fps=30.0)
+    long = ProbeResult(duration=3600.0, fps=30.0)
+    assert estimate_moov_size(long, 1) > estimate_moov_size(short, 1)
+    assert estimate_moov_size(short, 2) > estimate_moov_size(short, 1)
@@ -0,0 +1,77 @@
+"""Testes da decisao de copia direta e da geometria dos filtros."""
+
+from ffmpeg.planner import STREAM_COPY_OFF, parse_resolution, plan_geometry, plan_video
+from ffmpeg.probe import ProbeResult
+from ffmpeg.wrapper import ConversionOptions, Rendition
+from presets.definitions import StreamingPresets
+
+PRESET = StreamingPresets.STREAMING
+
+
+def _options(**kwargs) -> ConversionOptions:
+    return ConversionOptions(input_path="in.mkv", output_path="out.mp4", preset=PRESET, **kwargs)
+
+
+def _copyable_probe() -> ProbeResult:
+    width, height = parse_resolution(PRESET.resolution)
+    return ProbeResult(duration=60.0, width=width, height=height, fps=30.0, video_codec="h264",
+                       video_profile="High", pix_fmt="yuv420p", video_bitrate=1_000_000)
+
+
+def test_parse_resolution():
+    assert parse_resolution("1280:720") == (1280, 720)
+    assert parse_resolution("invalida") == (0, 0)
+
+
+def test_plan_geometry_identity_has_no_filters():
+    assert plan_geometry(ProbeResult(width=1280, height=720), "1280:720") == []
+
+
+def test_plan_geometry_same_aspect_only_scales():
+    assert plan_geometry(ProbeResult(width=1920, height=1080), "1280:720") == ["scale=1280:720"]
+
+
+def test_plan_geometry_other_aspect_scales_then_pads():
+    geometry = plan_geometry(ProbeResult(width=1440, height=1080), "1280:720")
+    assert geometry == ["scale=1280:720:force_original_aspect_ratio=decrease",
+                        "pad=1280:720:(ow-iw)/2:(oh-ih)/2"]
+
+
+def test_plan_geometry_without_probe_uses_full_chain():
+    assert len(plan_geometry(ProbeResult(), "1280:720")) == 2
+
+
+def test_plan_video_copies_compliant_source():
+    plan = plan_video(_options(), _copyable_probe())
+    assert plan.copy
+
+
+def test_plan_video_reencodes_when_something_is_drawn_or_disabled():
+    probe = _copyable_probe()
+    assert not plan_video(_options(stream_copy=STREAM_COPY_OFF), probe).copy
+    assert not plan_video(_options(watermark_text="x"), probe).copy
+    assert not plan_video(_options(subtitle_burn=True, subtitle_path="a.srt"), probe).copy
+    assert not plan_video(_options(renditions=[Rendition(PRESET, "b.mp4")]), probe).copy
+
+
+def test_plan_video_reencodes_incompatible_source():
+    probe = _copyable_probe()
+    assert not plan_video(_options(), ProbeResult()).copy
+    assert not plan_video(_options(), _with(probe, video_codec="hevc")).copy
+    assert not plan_video(_options(), _with(probe, pix_fmt="yuv420p10le")).copy
+    assert not plan_video(_options(), _with(probe, video_profile="High 10")).copy
+    assert not plan_video(_options(), _with(probe, width=probe.width * 2)).copy
+    assert not plan_video(_options(), _with(probe, video_bitrate=0, bitrate=0)).copy
+    assert not plan_video(_options(custom_bitrate="500k"), probe).copy
+
+
+def test_plan_video_uses_container_bitrate_when_stream_has_none():
+    probe = _with(_copyable_probe(), video_bitrate=0, bitrate=1_000_000)
+    assert plan_video(_options(), probe).copy
+
+
+def _with(probe: ProbeResult, **changes) -> ProbeResult:
+    values = {name: getattr(probe, name) for name in ProbeResult.__slots__}
+    values.update(changes)
+    return ProbeResult(**values)
+
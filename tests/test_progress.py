@@ -0,0 +1,79 @@
+"""Testes da leitura do ``-progress`` e da estimativa de velocidade/ETA."""
+
+import pytest
+
+from ffmpeg.progress import ProgressInfo, ProgressParser, ThroughputEstimator, estimate_batch_eta
+
+
+def _feed(parser: ProgressParser, block: str):
+    results = [parser.feed(line) for line in block.strip().splitlines()]
+    return [r for r in results if r is not None]
+
+
+def test_parser_returns_one_info_per_block():
+    parser = ProgressParser()
+    infos = _feed(parser, """
+frame=120
+fps=29.97
+bitrate=4500.5kbits/s
+total_size=1048576
+out_time_us=4000000
+speed=1.5x
+progress=continue
+frame=240
+out_time_ms=8000000
+progress=end
+""")
+    assert len(infos) == 2
+    first, last = infos
+    assert (first.frame, first.fps, first.bitrate_kbps) == (120, 29.97, 4500.5)
+    assert (first.total_size, first.out_time, first.speed, first.done) == (1048576, 4.0, 1.5, False)
+    # Cada bloco comeca zerado; out_time_ms tambem vem em microssegundos
+    assert (last.frame, last.out_time, last.speed, last.done) == (240, 8.0, 0.0, True)
+
+
+def test_parser_tolerates_bad_values_and_noise():
+    parser = ProgressParser()
+    infos = _feed(parser, """
+linha sem separador
+bitrate=N/A
+speed=N/A
+out_time_us=-5
+progress=continue
+""")
+    assert len(infos) == 1
+    assert (infos[0].bitrate_kbps, infos[0].speed, infos[0].out_time_us) == (0.0, 0.0, 0)
+
+
+def test_estimator_smooths_speed_and_computes_eta():
+    estimator = ThroughputEstimator(100.0, alpha=0.5)
+    assert estimator.eta is None
+    estimator.update(0.0, now=0.0)
+    estimator.update(10.0, now=5.0)   # 2x
+    assert estimator.speed == pytest.approx(2.0)
+    estimator.update(30.0, now=10.0)  # 4x -> EWMA 3x
+    assert estimator.speed == pytest.approx(3.0)
+    assert estimator.eta == pytest.approx(70.0 / 3.0)
+
+
+def test_estimator_ignores_backwards_or_frozen_samples():
+    estimator = ThroughputEstimator(100.0)
+    estimator.update(10.0, now=1.0)
+    estimator.update(20.0, now=2.0)
+    speed = estimator.speed
+    estimator.update(5.0, now=3.0)
+    estimator.update(25.0, now=2.0)
+    assert estimator.speed == speed
+
+
+def test_estimator_annotates_info():
+    estimator = ThroughputEstimator(0.0)
+    info = ProgressInfo()
+    info.out_time_us = 1_000_000
+    assert estimator.annotate(info) is info
+    assert info.eta is None  # sem duracao total nao ha ETA
+
+
+def test_batch_eta_sums_active_speeds():
+    assert estimate_batch_eta(300.0, [1.0, 2.0, 0.0]) == pytest.approx(100.0)
+    assert estimate_batch_eta(300.0, []) is None
@@ -0,0 +1,63 @@
+"""Testes do cache de resultados enderecado pelo conteudo."""
+
+import os
+
+from ffmpeg.result_cache import ResultCache, fast_fingerprint
+
+
+def _write(path, data: bytes) -> str:
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_store_then_lookup_returns_outputs(tmp_path):
+    cache = ResultCache()
+    output = _write(tmp_path / "out.mp4", b"video")
+    cache.store("k", [output])
+    assert cache.lookup("k") == [output]
+    assert cache.lookup("outra") is None
+
+
+def test_lookup_drops_entry_when_output_changed_or_missing(tmp_path):
+    cache = ResultCache()
+    output = _write(tmp_path / "out.mp4", b"video")
+    cache.store("k", [output])
+    _write(tmp_path / "out.mp4", b"regravado com outro tamanho")
+    assert cache.lookup("k") is None
+    cache.store("k", [output])
+    os.remove(output)
+    assert cache.lookup("k") is None
+
+
+def test_store_ignores_missing_outputs(tmp_path):
+    cache = ResultCache()
+    cache.store("k", [str(tmp_path / "nao_existe.mp4")])
+    assert cache.lookup("k") is None
+
+
+def test_entries_persist_between_instances(tmp_path):
+    db_path = str(tmp_path / "results.db")
+    output = _write(tmp_path / "out.mp4", b"video")
+    ResultCache(db_path).store("k", [output])
+    assert ResultCache(db_path).lookup("k") == [output]
+
+
+def test_satisfy_links_previous_output(tmp_path):
+    cache = ResultCache()
+    source = _write(tmp_path / "out.mp4", b"video")
+    cache.store("k", [source])
+    target = str(tmp_path / "copia.mp4")
+    assert cache.satisfy("k", [target])
+    with open(target, "rb") as f:
+        assert f.read() == b"video"
+    assert not cache.satisfy("k", [target, target])
+
+
+def test_fingerprint_follows_content_not_path(tmp_path):
+    data = os.urandom(3 * 1024 * 1024)
+    a = _write(tmp_path / "a.mkv", data)
+    b = _write(tmp_path / "b.mkv", data)
+    c = _write(tmp_path / "c.mkv", data[:-1] + b"x")
+    assert fast_fingerprint(a) == fast_fingerprint(b)
+    assert fast_fingerprint(a) != fast_fingerprint(c)
+    assert fast_fingerprint(str(tmp_path / "nao_existe.mkv")) is None
@@ -0,0 +1,37 @@
+"""Testes do comando das amostras de codificacao."""
+
+from ffmpeg.sampler import SampleEstimate, TrialSampler, combine_estimates
+
+
+def _sampler() -> TrialSampler:
+    return TrialSampler(wrapper=None)
+
+
+def test_slice_keeps_original_timestamps_for_burned_subtitles():
+    cmd = ["ffmpeg", "-y", "-i", "in.mkv", "-filter_complex",
+           "[0:v]scale=1280:720,subtitles='in.ass'[vout]", "-map", "[vout]", "-c:v", "libx264", "out.mp4"]
+    sliced = _sampler()._slice_command(cmd, "in.mkv", 120.0, 4.0, "amostra.mp4")
+    assert sliced[:8] == ["ffmpeg", "-y", "-ss", "120.000", "-t", "4.000", "-copyts", "-i"]
+    assert sliced[sliced.index("-filter_complex") + 1] == (
+        "[0:v]scale=1280:720,subtitles='in.ass',setpts=PTS-STARTPTS[vout]")
+    assert sliced[-1] == "amostra.mp4"
+    assert cmd[-1] == "out.mp4"  # o comando do job nao e alterado
+
+
+def test_slice_without_filters_only_seeks():
+    cmd = ["ffmpeg", "-y", "-i", "in.mkv", "-map", "0:v:0", "-c:v", "copy", "out.mp4"]
+    sliced = _sampler()._slice_command(cmd, "in.mkv", 10.0, 4.0, "amostra.mp4")
+    assert "-copyts" not in sliced
+    assert sliced == ["ffmpeg", "-y", "-ss", "10.000", "-t", "4.000", "-i", "in.mkv",
+                      "-map", "0:v:0", "-c:v", "copy", "amostra.mp4"]
+
+
+def test_positions_spread_over_the_video():
+    sampler = TrialSampler(wrapper=None, slices=3, slice_seconds=4.0)
+    assert sampler._positions(10.0) == [0.0]
+    assert sampler._positions(400.0) == [98.0, 198.0, 298.0]
+
+
+def test_combine_skips_missing_estimates():
+    total = combine_estimates([SampleEstimate(100, 2.0, 10.0, 3), None, SampleEstimate(50, 1.0, 5.0, 1)])
+    assert (total.size_bytes, total.encode_seconds, total.media_seconds, total.slices) == (150, 3.0, 15.0, 4)
@@ -0,0 +1,65 @@
+"""Testes da divisao em trechos e do limite de trechos simultaneos."""
+
+from ffmpeg.segmenter import (MIN_SEGMENT_SECONDS, NVENC_SESSION_LIMIT, plan_segments,
+                              segment_budget_note, segment_worker_budget)
+from ffmpeg.wrapper import ConversionOptions
+from presets.definitions import StreamingPresets
+
+
+def _options(**kwargs) -> ConversionOptions:
+    return ConversionOptions(input_path="in.mkv", output_path="out.mp4",
+                             preset=StreamingPresets.STREAMING, **kwargs)
+
+
+def test_plan_segments_single_without_duration_or_workers():
+    assert plan_segments(0.0, [10.0], 4) == [(0.0, 0.0)]
+    assert plan_segments(600.0, [100.0, 200.0], 1) == [(0.0, 600.0)]
+
+
+def test_plan_segments_starts_on_keyframes_and_covers_duration():
+    keyframes = [float(k) for k in range(0, 600, 10)]
+    segments = plan_segments(600.0, keyframes, 4)
+    assert [start for start, _ in segments] == [0.0, 150.0, 300.0, 450.0]
+    assert sum(length for _, length in segments) == 600.0
+
+
+def test_plan_segments_picks_next_keyframe_after_target():
+    segments = plan_segments(400.0, [130.0, 260.0], 2)
+    assert segments == [(0.0, 260.0), (260.0, 140.0)]
+
+
+def test_plan_segments_limits_count_by_minimum_length():
+    duration = MIN_SEGMENT_SECONDS * 2.5
+    keyframes = [float(k) for k in range(1, int(duration))]
+    assert len(plan_segments(duration, keyframes, 8)) == 2
+
+
+def test_plan_segments_skips_short_tail_and_missing_keyframes():
+    # Keyframe perto demais do fim: o trecho final ficaria curto
+    assert plan_segments(100.0, [90.0], 2) == [(0.0, 100.0)]
+    # Sem keyframe depois do alvo: nao divide
+    assert plan_segments(300.0, [20.0], 2) == [(0.0, 300.0)]
+
+
+def test_segment_budget_disabled_below_two_workers():
+    assert segment_worker_budget(_options(segment_workers=1, threads=16), use_nvenc=False) == 0
+
+
+def test_segment_budget_shares_nvenc_sessions_with_batch():
+    options = _options(segment_workers=8, parallel_jobs=1)
+    assert segment_worker_budget(options, use_nvenc=True) == NVENC_SESSION_LIMIT
+    options = _options(segment_workers=8, parallel_jobs=2)
+    assert segment_worker_budget(options, use_nvenc=True) == NVENC_SESSION_LIMIT // 2
+
+
+def test_segment_budget_splits_job_threads():
+    assert segment_worker_budget(_options(segment_workers=8, threads=6), use_nvenc=False) == 3
+    assert segment_worker_budget(_options(segment_workers=2, threads=16), use_nvenc=False) == 2
+
+
+def test_budget_note_explains_disabled_segments():
+    assert segment_budget_note(_options(segment_workers=0, parallel_jobs=4), use_nvenc=True) == ""
+    assert segment_budget_note(_options(segment_workers=4, parallel_jobs=1), use_nvenc=True) == ""
+    note = segment_budget_note(_options(segment_workers=4, parallel_jobs=2), use_nvenc=True)
+    assert "NVENC" in note and "2 conversao" in note
+    assert "3 thread" in segment_budget_note(_options(segment_workers=4, threads=3), use_nvenc=False)
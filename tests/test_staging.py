@@ -0,0 +1,113 @@
+"""Testes do espaco do rascunho local (limpeza LRU e reservas)."""
+
+import os
+import time
+from pathlib import Path
+
+from ffmpeg import staging as staging_module
+from ffmpeg.probe import PROBE_CACHE_KIND, ProbeResult
+from ffmpeg.probe_cache import ProbeCache
+from ffmpeg.staging import ScratchStaging
+from ffmpeg.subtitle_cache import SubtitleCache
+from ffmpeg.wrapper import ConversionOptions, FFmpegWrapper
+from presets.definitions import StreamingPresets
+
+
+def _staging(tmp_path, max_bytes: int) -> ScratchStaging:
+    return ScratchStaging(str(tmp_path / "scratch"), max_bytes, network_only=False)
+
+
+def _source(tmp_path, name: str, size: int) -> str:
+    path = tmp_path / name
+    path.write_bytes(os.urandom(size))
+    return str(path)
+
+
+def test_make_room_evicts_least_recently_used_input(tmp_path):
+    staging = _staging(tmp_path, 2000)
+    old = staging.stage_input(_source(tmp_path, "a.mkv", 1000), pin=False)
+    os.utime(old, (time.time() - 60, time.time() - 60))
+    recent = staging.stage_input(_source(tmp_path, "b.mkv", 1000), pin=False)
+    assert staging._make_room(1000)
+    assert not os.path.exists(old)
+    assert os.path.exists(recent)
+    staging.shutdown()
+
+
+def test_make_room_keeps_pinned_inputs(tmp_path):
+    staging = _staging(tmp_path, 2000)
+    pinned = staging.stage_input(_source(tmp_path, "a.mkv", 1000), pin=True)
+    staging.stage_input(_source(tmp_path, "b.mkv", 1000), pin=True)
+    assert not staging._make_room(1000)
+    staging.release(pinned)
+    assert staging._make_room(1000)
+    assert not os.path.exists(pinned)
+    staging.shutdown()
+
+
+def test_make_room_rejects_more_than_capacity(tmp_path):
+    staging = _staging(tmp_path, 1000)
+    assert not staging._make_room(1001)
+    staging.shutdown()
+
+
+def test_reservations_count_until_released(tmp_path):
+    staging = _staging(tmp_path, 3000)
+    first = staging.output_path(str(tmp_path / "um.mp4"), 2000)
+    assert first != str(tmp_path / "um.mp4")
+    # A primeira saida ainda nao escreveu nada, mas o espaco dela esta reservado
+    assert staging.output_path(str(tmp_path / "dois.mp4"), 2000) == str(tmp_path / "dois.mp4")
+    staging.discard_output(first, str(tmp_path / "um.mp4"))
+    assert staging.output_path(str(tmp_path / "dois.mp4"), 2000) != str(tmp_path / "dois.mp4")
+    staging.shutdown()
+
+
+def test_stale_outputs_are_swept_on_init(tmp_path):
+    outputs = tmp_path / "scratch" / "outputs"
+    outputs.mkdir(parents=True)
+    stale = outputs / "abandonada.mp4"
+    live = outputs / "em_andamento.mp4"
+    stale.write_bytes(b"x")
+    live.write_bytes(b"x")
+    os.utime(stale, (0, 0))
+    _staging(tmp_path, 1000).shutdown()
+    assert not stale.exists()
+    assert live.exists()
+
+
+def test_vanished_input_falls_back_to_source(tmp_path, monkeypatch):
+    staging = _staging(tmp_path, 10_000)
+    source = _source(tmp_path, "a.mkv", 1000)
+
+    def gone(path):
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(staging_module.os.path, "getsize", gone)
+    assert staging.stage_input(source) == source
+    staging.shutdown()
+
+
+def test_staged_input_reuses_probe_and_subtitle_of_original(tmp_path):
+    staging = _staging(tmp_path, 10_000)
+    source = _source(tmp_path, "a.mkv", 1000)
+    probe_cache = ProbeCache()
+    probe_cache.put(source, PROBE_CACHE_KIND, ProbeResult(duration=42.0, width=640, height=360).to_dict())
+    subtitles = SubtitleCache(str(tmp_path / "subs"))
+
+    def fake_ffmpeg(cmd):
+        Path(cmd[-1]).write_text("legenda")
+        return 0
+
+    extracted = subtitles.extract("ffmpeg", source, 2, fake_ffmpeg)
+    wrapper = FFmpegWrapper(probe_cache=probe_cache, subtitle_cache=subtitles)
+    wrapper.ffmpeg_path, wrapper.ffprobe_path = "ffmpeg", "ffprobe"
+    options = ConversionOptions(input_path=source, output_path=str(tmp_path / "out.mp4"),
+                                preset=StreamingPresets.STREAMING, subtitle_burn=True, subtitle_stream_index=2)
+    staged = wrapper._stage(staging, options)
+    assert staged.input_path != source
+    # Sem ffprobe de verdade: so passa se vier do cache do original
+    assert wrapper.probe(staged.input_path).duration == 42.0
+    assert wrapper.prepare_subtitle(staged)
+    assert extracted in wrapper.build_filter_graph(staged)
+    staging.release(staged.input_path)
+    staging.shutdown()
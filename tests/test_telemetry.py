@@ -0,0 +1,28 @@
+"""Testes da extracao dos nomes de filtro do grafo (requisitos e historico)."""
+
+from ffmpeg.telemetry import filter_names
+from ffmpeg.wrapper import ConversionOptions, FFmpegWrapper
+from presets.definitions import StreamingPresets
+
+
+def test_filter_names_in_chain_and_labels():
+    graph = "movie='/tmp/wm.png'[wm];[0:v]scale=1280:720[base];[base][wm]overlay=0:0,split=2[s0][s1]"
+    assert filter_names(graph) == "movie,scale,overlay,split"
+
+
+def test_filter_names_ignore_commas_inside_quotes():
+    assert filter_names("[0:v]subtitles='/data/ep01,ep02,final.srt'[vout]") == "subtitles"
+    assert filter_names("[0:v]drawtext=text='a,b,c':fontsize=24,pad=1280:720[vout]") == "drawtext,pad"
+    assert filter_names("[0:v]drawtext=text='it\\'s,ok\\:x'[vout]") == "drawtext"
+
+
+def test_requirements_ignore_commas_in_subtitle_path_and_watermark(tmp_path):
+    subtitle = tmp_path / "ep01,ep02,final.srt"
+    subtitle.write_text("1\n00:00:00,000 --> 00:00:01,000\nola\n", encoding="utf-8")
+    wrapper = FFmpegWrapper()
+    wrapper.font_path = str(tmp_path / "fonte,negrito.ttf")
+    options = ConversionOptions(input_path="in.mkv", output_path="out.mp4", preset=StreamingPresets.STREAMING,
+                                subtitle_path=str(subtitle), subtitle_burn=True, watermark_text="a,b,c")
+    names = filter_names(wrapper.build_output_graph(options)).split(",")
+    assert "subtitles" in names and "drawtext" in names
+    assert not {"ep02", "final", "b", "c", "negrito"} & set(names)
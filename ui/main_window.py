@@ -6,19 +6,37 @@ from typing import Optional, List
 from PySide6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                                 QLabel, QComboBox, QTextEdit, QCheckBox,
                                 QSpinBox, QLineEdit, QFileDialog, QMessageBox,
-                                QSystemTrayIcon, QMenu, QProgressBar, QPushButton,
-                                QApplication, QScrollArea, QSlider, QDialog)
+                                QSystemTrayIcon, QMenu, QProgressBar,
+                                QApplication, QScrollArea, QSlider)
 from PySide6.QtCore import Qt, Signal, Slot, QUrl, QThread, QTimer, QPoint
-from PySide6.QtGui import QIcon, QDesktopServices, QMouseEvent, QPixmap
+from PySide6.QtGui import QIcon, QDesktopServices, QMouseEvent
 
 from config.config_manager import ConfigManager
+from config.job_store import JobStore
+from config.history import HistoryStore
 from presets.definitions import StreamingPresets, CustomPreset
-from ffmpeg.wrapper import FFmpegWrapper, ConversionOptions
-from workers.converter import ConversionWorker, ProbeWorker
-from ui.widgets import ModernButton, DropArea, AddPresetDialog, SectionCard, StatusPill, ButtonVariant, BatchItem, BatchQueueCard
+from ffmpeg.wrapper import FFmpegWrapper, ConversionOptions, Rendition
+from ffmpeg.probe import ProbeResult
+from ffmpeg.probe_cache import configure_probe_cache
+from ffmpeg.file_cache import configure_file_cache
+from ffmpeg.subtitle_cache import SubtitleCache
+from ffmpeg.watermark import WatermarkCache
+from ffmpeg.preview_cache import PreviewCache
+from ffmpeg.readahead import configure_readahead
+from ffmpeg.result_cache import configure_result_cache
+from ffmpeg.staging import configure_staging
+from workers.converter import ConversionWorker, LogPump
+from workers.probe_service import ProbeService
+from workers.preview_service import PreviewService
+from workers.sample_service import SampleService
+from workers.scheduler import BatchScheduler
+from ui.widgets import (ModernButton, DropArea, AddPresetDialog, SectionCard, StatusPill, ButtonVariant,
+                        BatchItem, BatchQueueCard, HistoryDialog, PreviewDialog)
 from ui.styles import Color, Spacing, Radius
 from ui.theme import apply_dark_theme, apply_light_theme
-from utils.helpers import check_nvidia_gpu, get_ffmpeg_binary, is_text_subtitle
+from utils.helpers import (get_ffmpeg_binary, default_batch_concurrency,
+                           find_external_subtitle, format_duration,
+                           sanitize_filename)
 
 
 class MainWindow(QMainWindow):
@@ -38,12 +56,35 @@ class MainWindow(QMainWindow):
         self.output_path = ""
         self.output_filename = ""
 
+        if self.config.get("probe_cache_persistent", True):
+            configure_probe_cache(self.config.get("probe_cache_db") or str(self.config.data_path("probe_cache.db")))
+        for cache_class, key, folder in ((SubtitleCache, "subtitle_cache_dir", "subtitle_cache"),
+                                         (WatermarkCache, "watermark_cache_dir", "watermark_cache"),
+                                         (PreviewCache, "preview_cache_dir", "preview_cache")):
+            configure_file_cache(cache_class, self.config.get(key) or str(self.config.data_path(folder)))
+        configure_staging(self.config.get("scratch_dir"), self.config.get("scratch_max_gb", 50),
+                          self.config.get("scratch_network_only", True))
+        configure_readahead(self.config.get("readahead_mb", 256))
+        configure_result_cache(self.config.get("result_cache_db") or str(self.config.data_path("results.db")),
+                               self.config.get("result_cache", True))
         self.ffmpeg_wrapper = FFmpegWrapper(self.config.get("ffmpeg_path"))
         self._worker = None
         self._worker_thread = None
-        self._probe_worker = None
-        self._probe_thread = None
-        self.has_nvidia = check_nvidia_gpu()
+        self._missing_requirements = []
+        self._log_pump = LogPump(parent=self)
+        self._log_pump.lines_ready.connect(self._log_lines)
+        self._probe_service = ProbeService(self.ffmpeg_wrapper, parent=self)
+        self._probe_service.probed.connect(self._on_probe_ready)
+        self._preview_service = PreviewService(self.ffmpeg_wrapper, parent=self)
+        self._preview_service.ready.connect(self._on_preview_ready)
+        self._preview_service.failed.connect(self._on_preview_failed)
+        self._sample_service = SampleService(self.ffmpeg_wrapper, parent=self)
+        self._sample_service.item_ready.connect(self._on_sample_item)
+        self._sample_service.finished.connect(self._on_sample_finished)
+        self._preview_dialog: Optional[PreviewDialog] = None
+        self._preview_frames = 1
+        self._sample_jobs = 0
+        self.has_nvidia = self.ffmpeg_wrapper.capabilities.nvenc
 
         self._autoscroll_active = False
         self._autoscroll_start = QPoint()
@@ -55,11 +96,26 @@ class MainWindow(QMainWindow):
         self.batch_queue: List[BatchItem] = []
         self._batch_selected_index: int = -1
         self._batch_processing: bool = False
-        self._probe_generation: int = 0
+        self._scheduler: Optional[BatchScheduler] = None
+        self._current_probe: Optional[ProbeResult] = None
+        self._current_probe_path = ""
+
+        self._estimate_timer = QTimer(self)
+        self._estimate_timer.setSingleShot(True)
+        self._estimate_timer.setInterval(150)
+        self._estimate_timer.timeout.connect(self._refresh_estimated_size)
+        self._preview_timer = QTimer(self)
+        self._preview_timer.setSingleShot(True)
+        self._preview_timer.setInterval(300)
+        self._preview_timer.timeout.connect(self._request_preview)
         self._batch_card = None
+        self.job_store = self._open_job_store()
+        self.history_store = self._open_history_store()
 
         self._setup_ui()
+        self._connect_preview_refresh()
         self._load_settings()
+        self._restore_batch_queue()
         self._setup_tray_icon()
         self._update_status_ui()
 
@@ -136,6 +192,13 @@ class MainWindow(QMainWindow):
         self._btn_theme.clicked.connect(self._toggle_theme)
         title_row.addWidget(self._btn_theme)
 
+        btn_history = ModernButton("🕘", variant=ButtonVariant.MINIMAL,
+                                   color=Color.TEXT_SECONDARY, hover_color=Color.PRIMARY)
+        btn_history.setFixedSize(36, 36)
+        btn_history.setToolTip("Historico de conversoes")
+        btn_history.clicked.connect(self._show_history)
+        title_row.addWidget(btn_history)
+
         layout.addLayout(title_row)
 
         version = QLabel(f"v{self.APP_VERSION} — Reencode com legendas hardcoded")
@@ -272,9 +335,16 @@ class MainWindow(QMainWindow):
         btn_preview = ModernButton("Preview", variant=ButtonVariant.MINIMAL,
                                     color=Color.INFO, hover_color=Color.PRIMARY_HOVER)
         btn_preview.setFixedHeight(30)
-        btn_preview.clicked.connect(self._generate_preview)
+        btn_preview.clicked.connect(lambda: self._generate_preview(1))
         pos_row.addWidget(btn_preview)
 
+        btn_sheet = ModernButton("Folha", variant=ButtonVariant.MINIMAL,
+                                 color=Color.INFO, hover_color=Color.PRIMARY_HOVER)
+        btn_sheet.setFixedHeight(30)
+        btn_sheet.setToolTip("Folha de contato com 6 quadros espalhados pelo video")
+        btn_sheet.clicked.connect(lambda: self._generate_preview(6))
+        pos_row.addWidget(btn_sheet)
+
         card.layout().addLayout(pos_row)
 
         return card
@@ -287,6 +357,7 @@ class MainWindow(QMainWindow):
 
         self.combo_preset = QComboBox()
         self.combo_preset.setMinimumWidth(200)
+        self.combo_extra_preset = QComboBox()
         self._load_presets()
         self.combo_preset.currentIndexChanged.connect(self._on_preset_changed)
         row.addWidget(self.combo_preset, stretch=1)
@@ -305,6 +376,16 @@ class MainWindow(QMainWindow):
 
         card.layout().addLayout(row)
 
+        extra_row = QHBoxLayout()
+        extra_row.setSpacing(Spacing.SM)
+        extra_lbl = QLabel("Tambem gerar:")
+        extra_lbl.setStyleSheet(f"color: {Color.TEXT_MUTED}; background-color: transparent; font-size: 12px;")
+        extra_row.addWidget(extra_lbl)
+        self.combo_extra_preset.setToolTip("Segunda saida no mesmo job: o video e decodificado e a "
+                                           "legenda/watermark desenhados uma unica vez")
+        extra_row.addWidget(self.combo_extra_preset, stretch=1)
+        card.layout().addLayout(extra_row)
+
         bitrate_lbl = QLabel("Bitrate Medio (kbps):")
         bitrate_lbl.setStyleSheet(f"color: {Color.TEXT_MUTED}; font-weight: bold; background-color: transparent; font-size: 12px; padding-top: 8px;")
         card.layout().addWidget(bitrate_lbl)
@@ -355,9 +436,21 @@ class MainWindow(QMainWindow):
         self._lbl_bitrate_info.setStyleSheet(f"color: {Color.TEXT_MUTED}; background-color: transparent; font-size: 11px;")
         card.layout().addWidget(self._lbl_bitrate_info)
 
+        estimate_row = QHBoxLayout()
+        estimate_row.setSpacing(Spacing.SM)
         self._lbl_estimated_size = QLabel("")
+        self._lbl_estimated_size.setWordWrap(True)
         self._lbl_estimated_size.setStyleSheet(f"color: {Color.INFO}; background-color: transparent; font-size: 11px; font-weight: bold;")
-        card.layout().addWidget(self._lbl_estimated_size)
+        estimate_row.addWidget(self._lbl_estimated_size, stretch=1)
+
+        btn_sample = ModernButton("Medir", variant=ButtonVariant.MINIMAL,
+                                  color=Color.INFO, hover_color=Color.PRIMARY_HOVER)
+        btn_sample.setFixedHeight(26)
+        btn_sample.setToolTip("Codifica trechos curtos com as opcoes atuais para prever tamanho e tempo "
+                              "(do video ou de toda a fila)")
+        btn_sample.clicked.connect(self._start_sampling)
+        estimate_row.addWidget(btn_sample)
+        card.layout().addLayout(estimate_row)
 
         self._update_bitrate_info()
         return card
@@ -405,10 +498,62 @@ class MainWindow(QMainWindow):
         self.chk_copy_audio.setChecked(False)
         card.layout().addWidget(self.chk_copy_audio)
 
+        self.chk_stream_copy = QCheckBox("Copiar video sem reencode quando ja atender o preset")
+        self.chk_stream_copy.setChecked(True)
+        self.chk_stream_copy.setToolTip("H.264 dentro da resolucao/bitrate do preset, sem legenda "
+                                        "queimada nem watermark, e apenas remuxado")
+        card.layout().addWidget(self.chk_stream_copy)
+
         self.chk_metadata = QCheckBox("Preservar metadados do video original")
         self.chk_metadata.setChecked(True)
         card.layout().addWidget(self.chk_metadata)
 
+        strategy_row = QHBoxLayout()
+        strategy_row.setSpacing(Spacing.SM)
+        strategy_label = QLabel("Gravacao do MP4:")
+        strategy_label.setStyleSheet(f"color: {Color.TEXT_SECONDARY}; background-color: transparent;")
+        strategy_row.addWidget(strategy_label)
+        self.combo_output_strategy = QComboBox()
+        self.combo_output_strategy.addItem("Automatico (faststart local, fragmentado em rede)", "auto")
+        self.combo_output_strategy.addItem("Faststart (regrava o arquivo no fim)", "faststart")
+        self.combo_output_strategy.addItem("Fragmentado (sem regravacao)", "fragmented")
+        self.combo_output_strategy.addItem("Reservar indice no inicio", "reserve")
+        self.combo_output_strategy.setToolTip("Em pastas de rede o faststart dobra a escrita; no automatico essas "
+                                              "saidas sao gravadas fragmentadas. O tempo de finalizacao "
+                                              "de cada estrategia aparece no log e no historico")
+        strategy_row.addWidget(self.combo_output_strategy)
+        strategy_row.addStretch()
+        card.layout().addLayout(strategy_row)
+
+        conc_row = QHBoxLayout()
+        conc_row.setSpacing(Spacing.SM)
+        conc_label = QLabel("Conversoes simultaneas no lote:")
+        conc_label.setStyleSheet(f"color: {Color.TEXT_SECONDARY}; background-color: transparent;")
+        conc_row.addWidget(conc_label)
+        self.spin_concurrency = QSpinBox()
+        self.spin_concurrency.setRange(0, 64)
+        self.spin_concurrency.setToolTip("0 = automatico, de acordo com os nucleos da CPU "
+                                         "(com NVENC, as sessoes do encoder)")
+        self._update_concurrency_label()
+        self.chk_hw_accel.toggled.connect(self._update_concurrency_label)
+        self.combo_preset.currentIndexChanged.connect(self._update_concurrency_label)
+        conc_row.addWidget(self.spin_concurrency)
+        conc_row.addStretch()
+        card.layout().addLayout(conc_row)
+
+        seg_row = QHBoxLayout()
+        seg_row.setSpacing(Spacing.SM)
+        seg_label = QLabel("Trechos paralelos por video (arquivos longos):")
+        seg_label.setStyleSheet(f"color: {Color.TEXT_SECONDARY}; background-color: transparent;")
+        seg_row.addWidget(seg_label)
+        self.spin_segments = QSpinBox()
+        self.spin_segments.setRange(0, 32)
+        self.spin_segments.setSpecialValueText("Desligado")
+        self.spin_segments.setToolTip("Divide o video em keyframes e codifica os trechos em paralelo")
+        seg_row.addWidget(self.spin_segments)
+        seg_row.addStretch()
+        card.layout().addLayout(seg_row)
+
         return card
 
     def _create_progress_bar(self) -> None:
@@ -482,6 +627,14 @@ class MainWindow(QMainWindow):
             self.tray_icon.setIcon(QIcon(str(icon_path)))
         self.tray_icon.show()
 
+    def _batch_uses_nvenc(self) -> bool:
+        return self.chk_hw_accel.isChecked() and self.has_nvidia
+
+    def _update_concurrency_label(self) -> None:
+        """Mostra no 0 do spin o mesmo valor automatico que o BatchScheduler vai usar."""
+        self.spin_concurrency.setSpecialValueText(
+            f"Automatico ({default_batch_concurrency(self._batch_uses_nvenc())})")
+
     def _update_status_ui(self) -> None:
         if self.ffmpeg_wrapper.ffmpeg_path:
             self._pill_ffmpeg.set_status("FFmpeg: OK", Color.SUCCESS, Color.SUCCESS_BG)
@@ -504,7 +657,12 @@ class MainWindow(QMainWindow):
 
         self.chk_hw_accel.setChecked(self.config.get("use_hardware_accel", True))
         self.chk_copy_audio.setChecked(self.config.get("copy_audio", False))
+        self.chk_stream_copy.setChecked(self.config.get("stream_copy", "auto") != "off")
         self.chk_metadata.setChecked(self.config.get("preserve_metadata", True))
+        idx = self.combo_output_strategy.findData(self.config.get("output_strategy", "auto"))
+        self.combo_output_strategy.setCurrentIndex(max(idx, 0))
+        self.spin_concurrency.setValue(self.config.get("batch_concurrency", 0))
+        self.spin_segments.setValue(self.config.get("segment_workers", 0))
 
         last_output = self.config.get("last_output_dir", "")
         if last_output:
@@ -514,6 +672,9 @@ class MainWindow(QMainWindow):
         idx = self.combo_preset.findText(last_preset)
         if idx >= 0:
             self.combo_preset.setCurrentIndex(idx)
+        idx = self.combo_extra_preset.findText(self.config.get("extra_preset", ""))
+        if idx >= 0:
+            self.combo_extra_preset.setCurrentIndex(idx)
 
         last_bitrate = self.config.get("last_bitrate", 4500)
         self._spin_bitrate.setValue(last_bitrate)
@@ -532,8 +693,14 @@ class MainWindow(QMainWindow):
 
         self.config.set("use_hardware_accel", self.chk_hw_accel.isChecked())
         self.config.set("copy_audio", self.chk_copy_audio.isChecked())
+        self.config.set("stream_copy", "auto" if self.chk_stream_copy.isChecked() else "off")
         self.config.set("preserve_metadata", self.chk_metadata.isChecked())
+        self.config.set("output_strategy", self.combo_output_strategy.currentData())
+        self.config.set("batch_concurrency", self.spin_concurrency.value())
+        self.config.set("segment_workers", self.spin_segments.value())
         self.config.set("last_preset", self.combo_preset.currentText())
+        self.config.set("extra_preset", self.combo_extra_preset.currentText()
+                        if self.combo_extra_preset.currentData() else "")
         self.config.set("last_bitrate", self._spin_bitrate.value())
 
         if self.output_path:
@@ -546,10 +713,16 @@ class MainWindow(QMainWindow):
     def _load_presets(self) -> None:
         self.combo_preset.blockSignals(True)
         self.combo_preset.clear()
+        extra = self.combo_extra_preset.currentText()
+        self.combo_extra_preset.clear()
+        self.combo_extra_preset.addItem("Nenhum", None)
         for preset in StreamingPresets.get_all():
             self.combo_preset.addItem(f"🎬 {preset.name}", preset)
+            self.combo_extra_preset.addItem(f"🎬 {preset.name}", preset)
         for preset in self.config.get_custom_presets():
             self.combo_preset.addItem(f"⚙️ {preset.name}", preset)
+            self.combo_extra_preset.addItem(f"⚙️ {preset.name}", preset)
+        self.combo_extra_preset.setCurrentIndex(max(self.combo_extra_preset.findText(extra), 0))
         self.combo_preset.blockSignals(False)
 
     # ------------------------------------------------------------------
@@ -567,6 +740,8 @@ class MainWindow(QMainWindow):
                 self._add_file_to_queue(f)
             self._refresh_batch_ui()
             self._batch_card.show()
+            if self._scheduler:
+                self._scheduler.dispatch()
             if not self._batch_processing:
                 self._select_batch_item(len(self.batch_queue) - 1)
 
@@ -589,6 +764,8 @@ class MainWindow(QMainWindow):
                     self._add_file_to_queue(f)
                 self._refresh_batch_ui()
                 self._batch_card.show()
+                if self._scheduler:
+                    self._scheduler.dispatch()
                 if not self._batch_processing:
                     self._select_batch_item(len(self.batch_queue) - 1)
 
@@ -599,7 +776,7 @@ class MainWindow(QMainWindow):
 
         self._detect_subtitle(path)
         self._probe_audio_and_subtitles(path)
-        QTimer.singleShot(500, self._update_estimated_size)
+        self._update_estimated_size()
 
         if not self.entry_output_name.text():
             self.entry_output_name.setText(Path(path).stem + "_converted")
@@ -657,13 +834,76 @@ class MainWindow(QMainWindow):
     # ------------------------------------------------------------------
 
     def _auto_detect_subtitle_for(self, video_path: str) -> str:
-        video_dir = Path(video_path).parent
-        video_name = Path(video_path).stem
-        for ext in ['.srt', '.ass', '.ssa']:
-            sub_path = video_dir / (video_name + ext)
-            if sub_path.exists():
-                return str(sub_path)
-        return ""
+        return find_external_subtitle(video_path)
+
+    def _open_job_store(self) -> Optional[JobStore]:
+        db_path = self.config.get("job_queue_db") or str(self.config.data_path("jobs.db"))
+        try:
+            return JobStore(db_path, self.config.get("job_queue_retention_days", 30))
+        except Exception as e:
+            print(f"Erro ao abrir fila persistente: {e}")
+            return None
+
+    def _open_history_store(self) -> Optional[HistoryStore]:
+        db_path = self.config.get("history_db") or str(self.config.data_path("history.db"))
+        try:
+            return HistoryStore(db_path)
+        except Exception as e:
+            print(f"Erro ao abrir historico: {e}")
+            return None
+
+    @Slot(object)
+    def _record_telemetry(self, telemetry) -> None:
+        if telemetry.returncode == 0:
+            self._log(f"📊 {Path(telemetry.input_path).name}: {telemetry.summary()}")
+        if not self.history_store:
+            return
+        try:
+            self.history_store.record(telemetry)
+        except Exception as e:
+            print(f"Erro ao gravar historico: {e}")
+
+    @Slot()
+    def _show_history(self) -> None:
+        if not self.history_store:
+            QMessageBox.warning(self, "Aviso", "Historico de conversoes indisponivel.")
+            return
+        HistoryDialog(self.history_store, self).exec()
+
+    def _persist_item(self, item: BatchItem) -> None:
+        if not self.job_store:
+            return
+        try:
+            if item.job_id is None:
+                self.job_store.add(item)
+            else:
+                self.job_store.update(item)
+        except Exception as e:
+            print(f"Erro ao salvar fila: {e}")
+
+    def _restore_batch_queue(self) -> None:
+        if not self.job_store:
+            return
+        try:
+            rows = self.job_store.load_unfinished()
+        except Exception as e:
+            print(f"Erro ao carregar fila: {e}")
+            return
+        if not rows:
+            return
+        for row in rows:
+            item = BatchItem(path=row["path"], job_id=row["id"])
+            item.output_name = row["output_name"]
+            item.subtitle_path = row["subtitle_path"]
+            item.subtitle_stream_index = row["subtitle_stream_index"]
+            item.subtitle_burn = bool(row["subtitle_burn"])
+            item.audio_track_index = row["audio_track_index"]
+            item.detected_external = row["detected_external"]
+            self.batch_queue.append(item)
+            self._request_probe(item)
+        self._refresh_batch_ui()
+        self._batch_card.show()
+        self._log(f"Fila restaurada: {len(rows)} arquivo(s) pendente(s) da sessao anterior.")
 
     def _add_file_to_queue(self, file_path: str) -> BatchItem:
         item = BatchItem(path=file_path)
@@ -673,6 +913,8 @@ class MainWindow(QMainWindow):
             item.subtitle_path = sub
         item.output_name = Path(file_path).stem + "_converted"
         self.batch_queue.append(item)
+        self._persist_item(item)
+        self._request_probe(item)
         return item
 
     def _add_current_to_queue(self) -> None:
@@ -693,9 +935,13 @@ class MainWindow(QMainWindow):
         sub = self._auto_detect_subtitle_for(self.video_path)
         item.detected_external = sub
         self.batch_queue.append(item)
+        self._persist_item(item)
+        self._request_probe(item)
         self._refresh_batch_ui()
         self._batch_card.show()
         self._log(f"Adicionado a fila: {item.filename}")
+        if self._scheduler:
+            self._scheduler.dispatch()
 
     def _sync_batch_item_from_ui(self) -> None:
         if self._batch_selected_index < 0 or self._batch_selected_index >= len(self.batch_queue):
@@ -706,6 +952,11 @@ class MainWindow(QMainWindow):
         item.subtitle_burn = self.chk_subtitle_burn.isChecked()
         item.audio_track_index = self.combo_audio.currentData()
         item.output_name = self.entry_output_name.text() or (Path(item.path).stem + "_converted")
+        self._persist_item(item)
+        if self._scheduler:
+            # Opcoes ja preparadas para o item ficaram velhas
+            self._scheduler.invalidate(self._batch_selected_index)
+            self._scheduler.dispatch()
 
     @Slot(int)
     def _select_batch_item(self, index: int) -> None:
@@ -726,7 +977,10 @@ class MainWindow(QMainWindow):
             self.lbl_subtitle.setStyleSheet(f"color: {Color.TEXT_MUTED}; background-color: transparent;")
         self.chk_subtitle_burn.setChecked(item.subtitle_burn)
         self.entry_output_name.setText(item.output_name)
-        self._probe_audio_and_subtitles(item.path)
+        if item.probe is not None:
+            self._apply_probe(item.path, item.probe)
+        else:
+            self._probe_audio_and_subtitles(item.path)
 
     @Slot(int)
     def _remove_batch_item(self, index: int) -> None:
@@ -734,6 +988,9 @@ class MainWindow(QMainWindow):
             return
         if 0 <= index < len(self.batch_queue):
             removed = self.batch_queue.pop(index)
+            if self.job_store:
+                self.job_store.remove(removed.job_id)
+            self._cancel_probe(removed.path)
             if self._batch_selected_index == index:
                 self._batch_selected_index = -1
             elif self._batch_selected_index > index:
@@ -757,7 +1014,12 @@ class MainWindow(QMainWindow):
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
         )
         if reply == QMessageBox.StandardButton.Yes:
+            if self.job_store:
+                self.job_store.clear()
+            paths = {i.path for i in self.batch_queue}
             self.batch_queue.clear()
+            for path in paths:
+                self._cancel_probe(path)
             self._batch_selected_index = -1
             self._batch_card.hide()
             self._refresh_batch_ui()
@@ -777,42 +1039,34 @@ class MainWindow(QMainWindow):
     # ------------------------------------------------------------------
 
     def _probe_audio_and_subtitles(self, video_path: str) -> None:
-        self._cleanup_probe()
-        self._probe_generation += 1
-        gen = self._probe_generation
-
-        self._probe_thread = QThread()
-        self._probe_worker = ProbeWorker(self.ffmpeg_wrapper, video_path)
-        self._probe_worker._generation = gen
-        self._probe_worker.moveToThread(self._probe_thread)
-
-        self._probe_thread.started.connect(self._probe_worker.run)
-        self._probe_worker.finished_signal.connect(self._on_audio_probed)
-        self._probe_worker.finished_signal.connect(self._probe_thread.quit)
-        self._probe_worker.finished_signal.connect(self._probe_worker.deleteLater)
-        self._probe_thread.finished.connect(self._probe_thread.deleteLater)
-        self._probe_thread.finished.connect(self._on_probe_thread_done)
+        cached = self._probe_service.peek(video_path)
+        if cached is not None:
+            self._on_probe_ready(video_path, cached)
+        else:
+            self._probe_service.request(video_path, priority=1)
 
-        self._probe_thread.start()
+    def _request_probe(self, item: BatchItem) -> None:
+        if item.probe is None:
+            self._probe_service.request(item.path)
 
-    def _cleanup_probe(self) -> None:
-        if self._probe_thread and self._probe_thread.isRunning():
-            self._probe_thread.quit()
-            self._probe_thread.wait(3000)
+    def _cancel_probe(self, path: str) -> None:
+        if not any(i.path == path for i in self.batch_queue) and path != self.video_path:
+            self._probe_service.cancel(path)
 
-    @Slot()
-    def _on_probe_thread_done(self) -> None:
-        self._probe_thread = None
-        self._probe_worker = None
-
-    @Slot(dict)
-    def _on_audio_probed(self, streams: dict) -> None:
-        worker = self.sender()
-        if hasattr(worker, '_generation') and worker._generation != self._probe_generation:
-            return
-
-        audio = streams.get("audio", [])
-        subtitles = streams.get("subtitles", [])
+    @Slot(str, object)
+    def _on_probe_ready(self, path: str, result: ProbeResult) -> None:
+        for i, item in enumerate(self.batch_queue):
+            if item.path == path:
+                item.probe = result
+                self._batch_card.update_item_summary(i)
+        if path == self.video_path:
+            self._apply_probe(path, result)
+
+    def _apply_probe(self, path: str, result: ProbeResult) -> None:
+        self._current_probe = result
+        self._current_probe_path = path
+        self._update_estimated_size()
+        audio = result.audio
 
         self.combo_audio.clear()
         self.combo_audio.addItem("Padrao (Todas as faixas)", None)
@@ -820,8 +1074,8 @@ class MainWindow(QMainWindow):
         if audio:
             self.lbl_audio.setText("Audio:")
             self.combo_audio.setEnabled(True)
-            for s in audio:
-                self.combo_audio.addItem(s['title'], s['index'])
+            for track in audio:
+                self.combo_audio.addItem(track.title, track.index)
         else:
             self.lbl_audio.setText("Audio: Nenhuma faixa detectada")
             self.combo_audio.setEnabled(False)
@@ -829,13 +1083,12 @@ class MainWindow(QMainWindow):
         self.combo_subtitle_embedded.clear()
         self.combo_subtitle_embedded.addItem("Nenhuma (nao usar legenda)", None)
 
-        text_subs = [s for s in subtitles if is_text_subtitle(s.get('codec', ''))]
-        unsupported = [s for s in subtitles if not is_text_subtitle(s.get('codec', ''))]
+        text_subs = result.text_subtitles
 
         if text_subs:
             self.combo_subtitle_embedded.setEnabled(True)
-            for s in text_subs:
-                self.combo_subtitle_embedded.addItem(s['title'], s['index'])
+            for track in text_subs:
+                self.combo_subtitle_embedded.addItem(track.title, track.index)
         else:
             self.combo_subtitle_embedded.setEnabled(False)
 
@@ -920,22 +1173,88 @@ class MainWindow(QMainWindow):
             self._update_estimated_size()
 
     def _update_estimated_size(self) -> None:
+        """Agenda o recalculo (debounce): arrastar o slider gera um unico calculo."""
+        self._estimate_timer.start()
+
+    @Slot()
+    def _refresh_estimated_size(self) -> None:
         if not self.video_path or not self.ffmpeg_wrapper.ffprobe_path:
             self._lbl_estimated_size.setText("")
             return
 
+        # Nunca sonda na thread da GUI: usa o probe ja conhecido ou pede ao ProbeService,
+        # que chama _apply_probe -> _update_estimated_size quando o resultado chegar.
+        if self._current_probe_path != self.video_path or self._current_probe is None:
+            self._lbl_estimated_size.setText("Tamanho estimado: calculando...")
+            self._probe_service.request(self.video_path, priority=1)
+            return
+
         bitrate_kbps = self._spin_bitrate.value()
-        duration = self.ffmpeg_wrapper.get_duration(self.video_path)
-        if duration <= 0:
+        duration = self._current_probe.duration
+        if duration <= 0 or self.combo_preset.currentData() is None:
             self._lbl_estimated_size.setText("")
             return
 
-        size_mb = (bitrate_kbps * duration) / 8 / 1024
-        audio_kbps = 128
-        audio_mb = (audio_kbps * duration) / 8 / 1024
-        total_mb = size_mb + audio_mb
-        self._lbl_estimated_size.setText(
-            f"Tamanho estimado: ~{total_mb:.0f} MB  ({duration:.0f}s @ {bitrate_kbps}kbps)")
+        options = self._estimate_options(self.video_path, self.subtitle_path,
+                                         self.combo_subtitle_embedded.currentData(),
+                                         self.chk_subtitle_burn.isChecked(), self.combo_audio.currentData())
+        total_mb = self.ffmpeg_wrapper.estimate_output_size(options, duration) / 1048576
+        text = f"Tamanho estimado: ~{total_mb:.0f} MB  ({duration:.0f}s @ {bitrate_kbps}kbps)"
+        sample = self._sample_service.cached(options)
+        if sample is not None:
+            text += (f"\nMedido em amostras: ~{sample.size_bytes / 1048576:.0f} MB, "
+                     f"~{format_duration(sample.encode_seconds)} de codificacao "
+                     f"({sample.realtime_factor:.1f}x)")
+        self._lbl_estimated_size.setText(text)
+
+    def _estimate_options(self, input_path: str, subtitle_path, subtitle_stream_index,
+                          subtitle_burn: bool, audio_track_index) -> ConversionOptions:
+        """Opcoes da conversao sem saida definida (estimativa e amostragem)."""
+        return self._build_options(input_path, "", subtitle_path or None, subtitle_stream_index,
+                                   subtitle_burn, audio_track_index)
+
+    @Slot()
+    def _start_sampling(self) -> None:
+        """Mede tamanho e tempo codificando amostras do video atual ou da fila pendente."""
+        if not self.ffmpeg_wrapper.ffmpeg_path or self.combo_preset.currentData() is None:
+            return
+        if self.batch_queue:
+            self._sync_batch_item_from_ui()
+            jobs = [self._estimate_options(item.path, item.subtitle_path, item.subtitle_stream_index,
+                                           item.subtitle_burn, item.audio_track_index)
+                    for item in self.batch_queue if item.status == "pending"]
+        elif self.video_path:
+            jobs = [self._estimate_options(self.video_path, self.subtitle_path,
+                                           self.combo_subtitle_embedded.currentData(),
+                                           self.chk_subtitle_burn.isChecked(), self.combo_audio.currentData())]
+        else:
+            QMessageBox.warning(self, "Aviso", "Selecione um arquivo de video primeiro.")
+            return
+        if not jobs:
+            return
+        self._sample_jobs = len(jobs)
+        self._log(f"📏 Medindo amostras de {len(jobs)} arquivo(s)...")
+        self._lbl_estimated_size.setText("Medindo amostras...")
+        self._sample_service.request(jobs)
+
+    @Slot(str, object)
+    def _on_sample_item(self, path: str, estimate) -> None:
+        if estimate is None:
+            self._log(f"📏 {Path(path).name}: nao foi possivel medir")
+            return
+        self._log(f"📏 {Path(path).name}: ~{estimate.size_bytes / 1048576:.0f} MB, "
+                  f"~{format_duration(estimate.encode_seconds)} de codificacao ({estimate.realtime_factor:.1f}x)")
+
+    @Slot(object, int)
+    def _on_sample_finished(self, total, measured: int) -> None:
+        if self._sample_jobs > 1 and measured:
+            summary = (f"Fila: ~{total.size_bytes / 1073741824:.2f} GB, "
+                       f"~{format_duration(total.encode_seconds)} de codificacao em sequencia "
+                       f"({measured}/{self._sample_jobs} medidos)")
+            self._log(f"📏 {summary}")
+            self._lbl_estimated_size.setText(summary)
+        else:
+            self._update_estimated_size()
 
     # ------------------------------------------------------------------
     # Conversion
@@ -971,6 +1290,13 @@ class MainWindow(QMainWindow):
                        audio_track_index) -> ConversionOptions:
         preset_data = self.combo_preset.currentData()
         pos_map = {"Topo": "top", "Centro": "center", "Rodape": "bottom"}
+        renditions = []
+        extra = self.combo_extra_preset.currentData()
+        if extra and extra.name != preset_data.name and output_path:
+            # Segunda saida ao lado da principal, com o nome do preset
+            output = Path(output_path)
+            renditions.append(Rendition(extra, str(output.with_name(
+                f"{output.stem}_{sanitize_filename(extra.name)}{output.suffix}"))))
         return ConversionOptions(
             input_path=input_path,
             output_path=output_path,
@@ -985,19 +1311,28 @@ class MainWindow(QMainWindow):
             audio_track_index=audio_track_index,
             use_hardware_accel=self.chk_hw_accel.isChecked(),
             copy_audio=self.chk_copy_audio.isChecked(),
-            preserve_metadata=self.chk_metadata.isChecked()
+            stream_copy="auto" if self.chk_stream_copy.isChecked() else "off",
+            preserve_metadata=self.chk_metadata.isChecked(),
+            segment_workers=self.spin_segments.value(),
+            renditions=renditions,
+            output_strategy=self.combo_output_strategy.currentData()
         )
 
     def _start_worker(self, options: ConversionOptions) -> None:
+        self._sample_service.cancel()
         self.btn_convert.setEnabled(False)
         self.btn_cancel.setEnabled(True)
         self._progress_bar.setValue(0)
+        self._missing_requirements = []
         self._worker_thread = QThread()
-        self._worker = ConversionWorker(options, self.ffmpeg_wrapper)
+        self._worker = ConversionWorker(options, self.ffmpeg_wrapper, self._log_pump)
         self._worker.moveToThread(self._worker_thread)
         self._worker_thread.started.connect(self._worker.run)
         self._worker.progress_signal.connect(self._progress_bar.setValue)
+        self._worker.stats_signal.connect(self._on_conversion_stats)
         self._worker.log_signal.connect(self._log)
+        self._worker.telemetry_signal.connect(self._record_telemetry)
+        self._worker.requirements_missing.connect(self._on_requirements_missing)
         self._worker.finished_signal.connect(self._on_conversion_finished)
         self._worker.finished_signal.connect(self._worker_thread.quit)
         self._worker.finished_signal.connect(self._worker.deleteLater)
@@ -1006,54 +1341,77 @@ class MainWindow(QMainWindow):
         self._worker_thread.start()
 
     def _start_batch(self) -> None:
+        self._sample_service.cancel()
         self._batch_processing = True
-        self._batch_completed = 0
-        self._batch_errors = 0
         self._save_settings()
-        self._log(f"Iniciando lote com {len(self.batch_queue)} arquivo(s)...")
-        self._process_next_batch()
+        pending = sum(1 for i in self.batch_queue if i.status == "pending")
+        self._log(f"Iniciando lote com {pending} arquivo(s)...")
+        self.btn_convert.setEnabled(False)
+        self.btn_cancel.setEnabled(True)
+        self._progress_bar.setValue(0)
 
-    def _process_next_batch(self) -> None:
-        for i, item in enumerate(self.batch_queue):
-            if item.status == "pending":
-                self._batch_selected_index = i
-                item.status = "converting"
-                self._batch_card.update_item_status(i, "converting")
-                self._batch_card.select_row(i)
-                self._log(f"[{i + 1}/{len(self.batch_queue)}] Iniciando: {item.filename}")
-                self.btn_convert.setText(f"Processando {i + 1}/{len(self.batch_queue)}...")
-                self.btn_convert.setEnabled(False)
-                self.btn_cancel.setEnabled(True)
-
-                output_dir = self.entry_output_path.text() or str(Path(item.path).parent)
-                output_name = item.output_name or (Path(item.path).stem + "_converted")
-                output_full = self._unique_output_path(output_dir, output_name)
-
-                if not item.subtitle_path:
-                    sub = self._auto_detect_subtitle_for(item.path)
-                    if sub:
-                        item.subtitle_path = sub
-
-                options = self._build_options(item.path, output_full,
-                                               item.subtitle_path,
-                                               item.subtitle_stream_index,
-                                               item.subtitle_burn,
-                                               item.audio_track_index)
-                item.output_path = output_full
-                self._start_worker(options)
-                return
+        self._scheduler = BatchScheduler(
+            self.batch_queue, self._prepare_batch_item, self.ffmpeg_wrapper.ffmpeg_path,
+            max_workers=self.spin_concurrency.value(),
+            on_error=self.config.get("batch_on_error", "continue"),
+            use_hardware_accel=self._batch_uses_nvenc(),
+            prepare_ahead=self.config.get("batch_prepare_ahead", 2),
+            prepare_workers=self.config.get("batch_prepare_workers", 2),
+            finalize_workers=self.config.get("batch_finalize_workers", 1),
+            parent=self
+        )
+        self._scheduler.item_started.connect(self._on_batch_item_started)
+        self._scheduler.item_progress.connect(self._batch_card.update_item_progress)
+        self._scheduler.item_eta.connect(self._batch_card.update_item_eta)
+        self._scheduler.batch_eta.connect(self._on_batch_eta)
+        self._scheduler.item_finished.connect(self._on_batch_item_finished)
+        self._scheduler.progress_signal.connect(self._progress_bar.setValue)
+        self._scheduler.log_signal.connect(self._log)
+        self._scheduler.log_batch_signal.connect(self._log_lines)
+        self._scheduler.telemetry_signal.connect(self._record_telemetry)
+        self._scheduler.finished_signal.connect(self._finish_batch)
+        self._scheduler.start()
+
+    def _prepare_batch_item(self, index: int, item: BatchItem) -> Optional[ConversionOptions]:
+        """Opcoes do item a partir da interface (so le widgets; roda na thread da GUI).
+
+        O caminho de saida ainda e o desejado: a legenda externa, o nome livre
+        (``_2``, ``_3``...) e os requisitos do FFmpeg ficam com o PrepareTask.
+        """
+        output_dir = self.entry_output_path.text() or str(Path(item.path).parent)
+        output_name = item.output_name or (Path(item.path).stem + "_converted")
+        return self._build_options(item.path, str(Path(output_dir) / f"{output_name}.mp4"),
+                                   item.subtitle_path,
+                                   item.subtitle_stream_index,
+                                   item.subtitle_burn,
+                                   item.audio_track_index)
+
+    @Slot(int)
+    def _on_batch_item_started(self, index: int) -> None:
+        item = self.batch_queue[index]
+        self._persist_item(item)
+        self._batch_card.update_item_status(index, "converting")
+        self._log(f"[{index + 1}/{len(self.batch_queue)}] Iniciando: {item.filename}")
+        self._update_batch_button()
 
-        self._finish_batch()
+    @Slot(int, int, str)
+    def _on_batch_item_finished(self, index: int, returncode: int, output_path: str) -> None:
+        item = self.batch_queue[index]
+        self._persist_item(item)
+        if item.status == "done":
+            self._log(f"✅ [{index + 1}/{len(self.batch_queue)}] Concluido: {item.filename}")
+        else:
+            self._log(f"❌ [{index + 1}/{len(self.batch_queue)}] Erro: {item.filename} ({item.error_msg})")
+        self._batch_card.update_item_status(index, item.status)
+        self._update_batch_button()
 
-    def _unique_output_path(self, directory: str, name: str) -> str:
-        base = Path(directory) / f"{name}.mp4"
-        if not base.exists():
-            return str(base)
-        for n in range(2, 100):
-            alt = Path(directory) / f"{name}_{n}.mp4"
-            if not alt.exists():
-                return str(alt)
-        return str(base)
+    def _update_batch_button(self) -> None:
+        if not self._scheduler:
+            return
+        finished = self._scheduler.completed + self._scheduler.errors
+        active = len(self._scheduler.active_indices)
+        pending = sum(1 for i in self.batch_queue if i.status == "pending")
+        self.btn_convert.setText(f"Processando {finished + active}/{finished + active + pending}...")
 
     @Slot()
     def _on_thread_done(self) -> None:
@@ -1063,9 +1421,9 @@ class MainWindow(QMainWindow):
 
     @Slot()
     def _cancel_conversion(self) -> None:
-        if not self._worker:
+        if not self._worker and not self._scheduler:
             return
-        if self._batch_processing:
+        if self._batch_processing and self._scheduler:
             remaining = sum(1 for i in self.batch_queue if i.status == "pending")
             msg = QMessageBox(self)
             msg.setIcon(QMessageBox.Icon.Question)
@@ -1080,71 +1438,80 @@ class MainWindow(QMainWindow):
             if clicked == btn_no:
                 return
             if clicked == btn_all:
-                for i, item in enumerate(self.batch_queue):
-                    if item.status == "pending":
-                        item.status = "error"
-                        item.error_msg = "cancelado"
-                        self._batch_card.update_item_status(i, "error")
                 self._log("Lote cancelado pelo usuario.")
-            if clicked == btn_current or clicked == btn_all:
-                self._log("Cancelando conversao...")
-                self._worker.stop()
-            if clicked == btn_current:
-                return
-        else:
+                self._scheduler.cancel_all()
+            elif clicked == btn_current:
+                active = self._scheduler.active_indices
+                if not active:
+                    return
+                target = self._batch_selected_index if self._batch_selected_index in active else active[0]
+                self._log(f"Cancelando conversao: {self.batch_queue[target].filename}")
+                self._scheduler.cancel_item(target)
+        elif self._worker:
             self._log("Cancelando conversao...")
             self._worker.stop()
 
+    @Slot(object)
+    def _on_conversion_stats(self, info) -> None:
+        if info.eta is not None and info.realtime > 0:
+            self._progress_bar.setFormat(f"%p% · {info.realtime:.1f}x · restante {format_duration(info.eta)}")
+
+    @Slot(float)
+    def _on_batch_eta(self, eta: float) -> None:
+        if eta >= 0:
+            self._progress_bar.setFormat(f"%p% · lote: restante {format_duration(eta)}")
+
     @Slot(int, str)
+    @Slot(list)
+    def _on_requirements_missing(self, missing: list) -> None:
+        self._missing_requirements = missing
+
     def _on_conversion_finished(self, returncode: int, output_path: str) -> None:
-        if self._batch_processing:
-            idx = self._batch_selected_index
-            if 0 <= idx < len(self.batch_queue):
-                item = self.batch_queue[idx]
-                if returncode == 0:
-                    item.status = "done"
-                    self._batch_completed += 1
-                    self._log(f"✅ [{idx + 1}/{len(self.batch_queue)}] Concluido: {item.filename}")
-                else:
-                    item.status = "error"
-                    item.error_msg = f"codigo {returncode}"
-                    self._batch_errors += 1
-                    self._log(f"❌ [{idx + 1}/{len(self.batch_queue)}] Erro: {item.filename} (codigo {returncode})")
-                self._batch_card.update_item_status(idx, item.status)
-            self._process_next_batch()
-        else:
-            self.btn_convert.setEnabled(True)
-            self.btn_cancel.setEnabled(False)
-            if returncode == 0:
-                self._progress_bar.setValue(100)
-                self._log(f"✅ Conversao concluida com sucesso!")
-                self._log(f"📁 Arquivo salvo: {output_path}")
-                reply = QMessageBox.question(
-                    self, "Conversao Concluida",
-                    f"Conversao finalizada!\n\nArquivo: {Path(output_path).name}\n\nDeseja abrir a pasta do arquivo?",
-                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        self._log_pump.drain()
+        self.btn_convert.setEnabled(True)
+        self.btn_cancel.setEnabled(False)
+        self._progress_bar.setFormat("%p%")
+        if returncode == 0:
+            self._progress_bar.setValue(100)
+            self._log(f"✅ Conversao concluida com sucesso!")
+            self._log(f"📁 Arquivo salvo: {output_path}")
+            reply = QMessageBox.question(
+                self, "Conversao Concluida",
+                f"Conversao finalizada!\n\nArquivo: {Path(output_path).name}\n\nDeseja abrir a pasta do arquivo?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            )
+            if reply == QMessageBox.StandardButton.Yes:
+                QDesktopServices.openUrl(QUrl.fromLocalFile(str(Path(output_path).parent)))
+            if self.tray_icon.isVisible():
+                self.tray_icon.showMessage(
+                    "HardSubForge",
+                    "Conversao finalizada!",
+                    QSystemTrayIcon.MessageIcon.Information,
+                    3000
                 )
-                if reply == QMessageBox.StandardButton.Yes:
-                    QDesktopServices.openUrl(QUrl.fromLocalFile(str(Path(output_path).parent)))
-                if self.tray_icon.isVisible():
-                    self.tray_icon.showMessage(
-                        "HardSubForge",
-                        "Conversao finalizada!",
-                        QSystemTrayIcon.MessageIcon.Information,
-                        3000
-                    )
-            else:
-                self._log(f"❌ Erro na conversao (codigo {returncode})")
-                QMessageBox.critical(self, "Erro", f"Erro na conversao (codigo {returncode})")
+        elif self._missing_requirements:
+            self._log(f"❌ FFmpeg sem: {', '.join(self._missing_requirements)}")
+            QMessageBox.critical(self, "Erro", "O FFmpeg configurado nao tem recursos necessarios "
+                                 f"para esta conversao:\n\n{', '.join(self._missing_requirements)}")
+        else:
+            self._log(f"❌ Erro na conversao (codigo {returncode})")
+            QMessageBox.critical(self, "Erro", f"Erro na conversao (codigo {returncode})")
 
+    @Slot()
     def _finish_batch(self) -> None:
         self._batch_processing = False
-        total = len(self.batch_queue)
-        self.btn_convert.setText("INICIAR CONVERSAO")
+        self._progress_bar.setFormat("%p%")
+        completed, errors = self._scheduler.completed, self._scheduler.errors
+        hits, misses = self._scheduler.cache_hits, self._scheduler.cache_misses
+        self._scheduler = None
+        total = completed + errors
         self.btn_convert.setEnabled(True)
         self.btn_cancel.setEnabled(False)
-        summary = f"Lote concluido: {self._batch_completed} ok, {self._batch_errors} erro(s) de {total}"
+        self._refresh_batch_ui()
+        summary = f"Lote concluido: {completed} ok, {errors} erro(s) de {total}"
         self._log(f"📦 {summary}")
+        if hits or misses:
+            self._log(f"♻️ Cache de resultados: {hits} reaproveitado(s), {misses} codificado(s)")
         if self.tray_icon.isVisible():
             self.tray_icon.showMessage(
                 "HardSubForge",
@@ -1169,6 +1536,11 @@ class MainWindow(QMainWindow):
         self.txt_log.verticalScrollBar().setValue(
             self.txt_log.verticalScrollBar().maximum())
 
+    @Slot(list)
+    def _log_lines(self, lines: list) -> None:
+        """Anexa um lote de linhas do FFmpeg com um unico append/rolagem."""
+        self._log("\n".join(lines))
+
     # ------------------------------------------------------------------
     # FFmpeg Setup
     # ------------------------------------------------------------------
@@ -1214,6 +1586,11 @@ class MainWindow(QMainWindow):
             self.config.set("ffmpeg_path", path)
             self.config.save()
             self.ffmpeg_wrapper = FFmpegWrapper(path)
+            self._probe_service.ffmpeg_wrapper = self.ffmpeg_wrapper
+            self._preview_service.ffmpeg_wrapper = self.ffmpeg_wrapper
+            self._sample_service.ffmpeg_wrapper = self.ffmpeg_wrapper
+            self.has_nvidia = self.ffmpeg_wrapper.capabilities.nvenc
+            self._update_concurrency_label()
             self._update_status_ui()
             QMessageBox.information(self, "Sucesso", "FFmpeg configurado com sucesso!")
 
@@ -1296,7 +1673,7 @@ class MainWindow(QMainWindow):
         self.config.save()
 
     @Slot()
-    def _generate_preview(self) -> None:
+    def _generate_preview(self, frames: int = 1) -> None:
         if not self.video_path:
             QMessageBox.warning(self, "Aviso", "Selecione um video primeiro.")
             return
@@ -1304,16 +1681,19 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Aviso", "FFmpeg nao encontrado.")
             return
 
-        import tempfile
-        preview_path = Path(tempfile.gettempdir()) / "hardsubforge_preview.jpg"
+        self._preview_frames = frames
+        if self._preview_dialog is None:
+            self._preview_dialog = PreviewDialog(self)
+        self._preview_dialog.show()
+        self._preview_dialog.raise_()
+        self._request_preview()
 
-        preset_data = self.combo_preset.currentData()
+    def _preview_options(self) -> ConversionOptions:
         pos_map = {"Topo": "top", "Centro": "center", "Rodape": "bottom"}
-
-        options = ConversionOptions(
+        return ConversionOptions(
             input_path=self.video_path,
             output_path="",
-            preset=preset_data,
+            preset=self.combo_preset.currentData(),
             subtitle_path=self.subtitle_path,
             subtitle_stream_index=self.combo_subtitle_embedded.currentData(),
             subtitle_burn=self.chk_subtitle_burn.isChecked(),
@@ -1323,29 +1703,37 @@ class MainWindow(QMainWindow):
             watermark_size=self.spin_watermark_size.value(),
         )
 
-        duration = self.ffmpeg_wrapper.get_duration(self.video_path)
-        seek_time = min(duration * 0.15, 30) if duration > 0 else 10
-
-        self._log(f"Gerando preview em {seek_time:.0f}s...")
-        success = self.ffmpeg_wrapper.generate_preview(options, str(preview_path), seek_time)
-
-        if success and preview_path.exists():
-            pixmap = QPixmap(str(preview_path))
-            if not pixmap.isNull():
-                scaled = pixmap.scaledToWidth(640, Qt.TransformationMode.SmoothTransformation)
-                dialog = QDialog(self)
-                dialog.setWindowTitle("Preview — Legenda & Watermark")
-                layout = QVBoxLayout(dialog)
-                lbl = QLabel()
-                lbl.setPixmap(scaled)
-                lbl.setAlignment(Qt.AlignmentFlag.AlignCenter)
-                layout.addWidget(lbl)
-                close_btn = QPushButton("Fechar")
-                close_btn.clicked.connect(dialog.accept)
-                layout.addWidget(close_btn)
-                self._log("Preview gerado com sucesso!")
-                dialog.exec()
-            else:
-                self._log("Erro: nao foi possivel carregar o preview.")
-        else:
-            self._log("Erro ao gerar preview. Verifique se o FFmpeg esta funcionando.")
+    def _connect_preview_refresh(self) -> None:
+        """Com o preview aberto, mudancas na legenda/watermark/preset geram um novo."""
+        self.entry_watermark.textChanged.connect(self._schedule_preview_refresh)
+        self.spin_watermark_size.valueChanged.connect(self._schedule_preview_refresh)
+        self.combo_watermark_pos.currentIndexChanged.connect(self._schedule_preview_refresh)
+        self.chk_subtitle_burn.toggled.connect(self._schedule_preview_refresh)
+        self.combo_subtitle_embedded.currentIndexChanged.connect(self._schedule_preview_refresh)
+        self.combo_preset.currentIndexChanged.connect(self._schedule_preview_refresh)
+
+    @Slot()
+    def _schedule_preview_refresh(self) -> None:
+        if self._preview_dialog is not None and self._preview_dialog.isVisible() and self.video_path:
+            self._preview_timer.start()
+
+    @Slot()
+    def _request_preview(self) -> None:
+        """Pede o preview ao PreviewService (em cache, sai quase na hora)."""
+        if not self.video_path or self._preview_dialog is None:
+            return
+        self._preview_dialog.set_status("Gerando preview...")
+        self._preview_service.request(self._preview_options(), self._preview_frames)
+
+    @Slot(str, int)
+    def _on_preview_ready(self, path: str, frames: int) -> None:
+        if self._preview_dialog is None:
+            return
+        if not self._preview_dialog.set_image(path, frames):
+            self._log("Erro: nao foi possivel carregar o preview.")
+
+    @Slot()
+    def _on_preview_failed(self) -> None:
+        if self._preview_dialog is not None:
+            self._preview_dialog.set_status("Falha ao gerar o preview.")
+        self._log("Erro ao gerar preview. Verifique se o FFmpeg esta funcionando.")
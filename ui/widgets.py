@@ -9,11 +9,14 @@ from PySide6.QtWidgets import (QLabel, QPushButton, QMessageBox, QDialog,
                                 QVBoxLayout, QHBoxLayout, QFormLayout,
                                 QLineEdit, QComboBox, QDialogButtonBox,
                                 QFileDialog, QWidget, QListWidget, QListWidgetItem,
-                                QSizePolicy, QScrollArea)
+                                QSizePolicy, QScrollArea, QTableWidget, QTableWidgetItem,
+                                QHeaderView)
 from PySide6.QtCore import Qt, Signal, Slot
-from PySide6.QtGui import QColor, QFont
+from PySide6.QtGui import QColor, QFont, QPixmap
 
 from ui.styles import Color, Spacing, Radius
+from ffmpeg.probe import ProbeResult
+from utils.helpers import format_duration
 
 
 class ButtonVariant(Enum):
@@ -291,6 +294,112 @@ class AddPresetDialog(QDialog):
         return self.preset_data
 
 
+class HistoryDialog(QDialog):
+    """Dialogo com o historico de conversoes e as medias por preset/encoder."""
+
+    COLUMNS = ["Data", "Arquivo", "Preset", "Encoder", "Status", "Duracao", "Tempo",
+               "Velocidade", "FPS", "Tamanho", "Estimado", "CPU", "Pico RAM", "Gravacao", "Finalizacao"]
+
+    def __init__(self, history_store, parent: Optional[QWidget] = None):
+        super().__init__(parent)
+        self.setWindowTitle("Historico de Conversoes")
+        self.setMinimumSize(900, 460)
+        self._store = history_store
+        self._setup_ui()
+
+    def _setup_ui(self) -> None:
+        layout = QVBoxLayout(self)
+        layout.setSpacing(Spacing.MD)
+        layout.setContentsMargins(Spacing.LG, Spacing.LG, Spacing.LG, Spacing.LG)
+
+        self._summary = QLabel()
+        self._summary.setWordWrap(True)
+        self._summary.setStyleSheet(f"color: {Color.TEXT_SECONDARY}; background-color: transparent;")
+        layout.addWidget(self._summary)
+
+        self._table = QTableWidget(0, len(self.COLUMNS))
+        self._table.setHorizontalHeaderLabels(self.COLUMNS)
+        self._table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self._table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self._table.verticalHeader().setVisible(False)
+        self._table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self._table)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Close)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+        self._populate()
+
+    def _populate(self) -> None:
+        from datetime import datetime
+
+        lines = []
+        for row in self._store.summary():
+            strategy = f" / {row['output_strategy']}" if row['output_strategy'] else ""
+            lines.append(f"{row['preset']} / {row['encoder']}{strategy}: {row['jobs']} job(s), "
+                         f"{row['realtime_factor'] or 0:.2f}x tempo real, {row['avg_fps'] or 0:.0f} fps, "
+                         f"{(row['write_throughput'] or 0) / 1048576:.1f} MB/s, "
+                         f"finalizacao media {row['avg_tail_time'] or 0:.1f}s")
+        self._summary.setText("\n".join(lines) or "Nenhuma conversao registrada ainda.")
+
+        records = self._store.recent(200)
+        self._table.setRowCount(len(records))
+        for r, t in enumerate(records):
+            values = [
+                datetime.fromtimestamp(t.started_at).strftime("%d/%m/%Y %H:%M"),
+                Path(t.input_path).name, t.preset, t.encoder,
+                "OK" if t.returncode == 0 else f"Erro ({t.returncode})",
+                format_duration(t.media_duration), format_duration(t.wall_time),
+                f"{t.realtime_factor:.2f}x", f"{t.avg_fps:.0f}",
+                f"{t.output_size / 1048576:.0f} MB", f"{t.estimated_size / 1048576:.0f} MB",
+                f"{t.cpu_time:.0f}s" if t.cpu_time else "--",
+                f"{t.peak_rss_kb // 1024} MB" if t.peak_rss_kb else "--",
+                t.output_strategy or "--",
+                f"{t.tail_time:.1f}s" if t.output_strategy else "--",
+            ]
+            for c, value in enumerate(values):
+                self._table.setItem(r, c, QTableWidgetItem(value))
+        self._table.resizeColumnsToContents()
+
+
+class PreviewDialog(QDialog):
+    """Janela nao modal do preview, atualizada a cada novo preview gerado."""
+
+    def __init__(self, parent: Optional[QWidget] = None):
+        super().__init__(parent)
+        self.setWindowTitle("Preview — Legenda & Watermark")
+        self.setMinimumSize(660, 420)
+        layout = QVBoxLayout(self)
+        layout.setSpacing(Spacing.MD)
+
+        self._image = QLabel()
+        self._image.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(self._image, stretch=1)
+
+        self._status = QLabel("")
+        self._status.setStyleSheet(f"color: {Color.TEXT_MUTED}; background-color: transparent; font-size: 11px;")
+        layout.addWidget(self._status)
+
+        close_btn = QPushButton("Fechar")
+        close_btn.clicked.connect(self.close)
+        layout.addWidget(close_btn)
+
+    def set_status(self, text: str) -> None:
+        self._status.setText(text)
+
+    def set_image(self, path: str, frames: int) -> bool:
+        """Mostra o JPEG (folhas de contato ficam mais largas); False se nao abrir."""
+        pixmap = QPixmap(path)
+        if pixmap.isNull():
+            return False
+        width = 960 if frames > 1 else 640
+        self._image.setPixmap(pixmap.scaledToWidth(min(width, pixmap.width()),
+                                                   Qt.TransformationMode.SmoothTransformation))
+        self._status.setText(f"Folha de contato com {frames} quadros" if frames > 1 else "")
+        return True
+
+
 @dataclass
 class BatchItem:
     """Item da fila de processamento em lote."""
@@ -304,6 +413,9 @@ class BatchItem:
     subtitle_burn: bool = False
     audio_track_index: Optional[int] = None
     detected_external: str = ""
+    partial_paths: List[str] = field(default_factory=list)
+    job_id: Optional[int] = None
+    probe: Optional[ProbeResult] = field(default=None, repr=False, compare=False)
 
     @property
     def filename(self) -> str:
@@ -321,6 +433,9 @@ class BatchItemRow(QWidget):
         self.item = item
         self._index = index
         self._pill = None
+        self._summary_label = None
+        self._percent = 0
+        self._eta_text = ""
         self._setup()
 
     def _setup(self) -> None:
@@ -339,14 +454,13 @@ class BatchItemRow(QWidget):
         """)
         layout.addWidget(name, stretch=1)
 
-        summary = self._build_summary()
-        summary_label = QLabel(summary)
-        summary_label.setStyleSheet(f"""
+        self._summary_label = QLabel(self._build_summary())
+        self._summary_label.setStyleSheet(f"""
             font-size: 11px;
             color: {Color.TEXT_SECONDARY};
             background-color: transparent;
         """)
-        layout.addWidget(summary_label)
+        layout.addWidget(self._summary_label)
 
         btn = ModernButton("\u2715", variant=ButtonVariant.MINIMAL,
                            color=Color.TEXT_MUTED, hover_color=Color.DANGER)
@@ -359,6 +473,10 @@ class BatchItemRow(QWidget):
 
     def _build_summary(self) -> str:
         parts = []
+        probe = self.item.probe
+        if probe is not None and probe.duration > 0:
+            parts.append(format_duration(probe.duration))
+            parts.append(f"{len(probe.audio)}A/{len(probe.text_subtitles)}L")
         if self.item.subtitle_path:
             parts.append(f"Leg: ext")
         elif self.item.subtitle_stream_index is not None:
@@ -381,6 +499,22 @@ class BatchItemRow(QWidget):
         text, color, bg = status_config.get(self.item.status, ("--", Color.TEXT_MUTED, Color.BG_MEDIUM))
         self._pill.set_status(text, color, bg)
 
+    def refresh_summary(self) -> None:
+        self._summary_label.setText(self._build_summary())
+
+    def set_progress(self, percent: int) -> None:
+        self._percent = percent
+        self._show_progress()
+
+    def set_eta(self, speed: float, eta: float) -> None:
+        """Mostra a velocidade suavizada (x tempo real) e o tempo restante."""
+        self._eta_text = f" · {speed:.1f}x · {format_duration(eta)}" if speed > 0 and eta >= 0 else ""
+        self._show_progress()
+
+    def _show_progress(self) -> None:
+        if self.item.status == "converting":
+            self._pill.set_status(f"Convertendo {self._percent}%{self._eta_text}", Color.INFO, Color.INFO_BG)
+
     def mousePressEvent(self, event) -> None:
         self.clicked.emit()
         super().mousePressEvent(event)
@@ -459,6 +593,18 @@ class BatchQueueCard(SectionCard):
                 self._rows[index].item.status = status
                 self._rows[index]._update_status()
 
+    def update_item_summary(self, index: int) -> None:
+        if 0 <= index < len(self._rows):
+            self._rows[index].refresh_summary()
+
+    def update_item_progress(self, index: int, percent: int) -> None:
+        if 0 <= index < len(self._rows):
+            self._rows[index].set_progress(percent)
+
+    def update_item_eta(self, index: int, speed: float, eta: float) -> None:
+        if 0 <= index < len(self._rows):
+            self._rows[index].set_eta(speed, eta)
+
     def select_row(self, index: int) -> None:
         if 0 <= index < self._list.count():
             self._list.setCurrentRow(index)
@@ -1,13 +1,16 @@
 """Funções auxiliares."""
 
+import os
 import re
 import shutil
 import subprocess
 import sys
 import platform
 import functools
+import threading
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, List, Optional, Tuple
 
 
 LANGUAGE_NAMES = {
@@ -17,6 +20,10 @@ LANGUAGE_NAMES = {
     "und": "Desconhecido"
 }
 
+SUBTITLE_EXTENSIONS = ('.srt', '.ass', '.ssa')
+
+VIDEO_EXTENSIONS = ('.mkv', '.mp4', '.avi', '.mov', '.wmv', '.flv', '.webm')
+
 TEXT_SUBTITLE_CODECS = frozenset({
     'srt', 'subrip', 'ass', 'ssa', 'mov_text', 'webvtt', 'text', 'stl', 'vtt'
 })
@@ -94,8 +101,9 @@ def get_font_path() -> Optional[str]:
     return None
 
 
+@functools.lru_cache(maxsize=1)
 def check_nvidia_gpu() -> bool:
-    """Verifica se ha uma GPU NVIDIA disponivel."""
+    """Verifica se ha uma GPU NVIDIA disponivel (nvidia-smi roda uma vez por processo)."""
     try:
         creationflags = subprocess.CREATE_NO_WINDOW if platform.system() == "Windows" else 0
         result = subprocess.run(
@@ -109,6 +117,48 @@ def check_nvidia_gpu() -> bool:
         return False
 
 
+def default_batch_concurrency(use_hardware_accel: bool = False) -> int:
+    """Retorna quantas conversoes simultaneas o hardware comporta.
+
+    Cada job fica com ~4 nucleos (ver ``encoder_threads``): o libx264 escala
+    mal com muitas threads e o decode, os filtros e o mux de um job sozinho
+    nao ocupam a maquina. A partir de 4 nucleos sao ao menos 2 jobs, ate 8.
+    Com NVENC o limite e a quantidade de sessoes do encoder da GPU.
+    """
+    if use_hardware_accel:
+        return 2
+    cores = os.cpu_count() or 1
+    if cores < 4:
+        return 1
+    return max(2, min(8, cores // 4))
+
+
+def encoder_threads(concurrency: int) -> int:
+    """Threads do libx264 por job para ``concurrency`` jobs simultaneos dividirem os nucleos."""
+    return max(1, (os.cpu_count() or 1) // max(concurrency, 1))
+
+
+def format_duration(seconds: float) -> str:
+    """Formata segundos como H:MM:SS (ou M:SS abaixo de uma hora)."""
+    minutes, secs = divmod(int(max(seconds, 0)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes}:{secs:02d}"
+
+
+def parse_bitrate_kbps(value: str) -> int:
+    """Converte '4500k' / '5M' / '128000' em kbps (0 se invalido)."""
+    match = re.match(r'^\s*(\d+(?:\.\d+)?)\s*([kKmM]?)', value or "")
+    if not match:
+        return 0
+    number = float(match.group(1))
+    unit = match.group(2).lower()
+    if unit == "m":
+        return int(number * 1000)
+    if unit == "k":
+        return int(number)
+    return int(number / 1000)
+
+
 def escape_filter_text(text: str) -> str:
     """Escapa caracteres especiais para filtros do FFmpeg."""
     text = text.replace("\\", "\\\\\\\\")
@@ -136,3 +186,98 @@ def sanitize_filename(filename: str) -> str:
 def is_text_subtitle(codec: str) -> bool:
     """Verifica se o codec de legenda e baseado em texto (queimavel via filtro subtitles)."""
     return codec.lower() in TEXT_SUBTITLE_CODECS
+
+
+def file_identity(path: str) -> Optional[Tuple[str, int, int]]:
+    """Retorna (caminho absoluto, tamanho, mtime_ns) ou None se o arquivo nao existir."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+
+
+NETWORK_FILESYSTEMS = frozenset({
+    'nfs', 'nfs4', 'cifs', 'smb3', 'smbfs', 'afpfs', '9p', 'ceph', 'glusterfs',
+    'fuse.sshfs', 'fuse.rclone', 'davfs', 'webdav'
+})
+
+# A tabela de montagens e relida no maximo a cada tantos segundos
+_MOUNT_TABLE_TTL = 30.0
+_mount_cache: Tuple[float, List[Tuple[str, str]]] = (0.0, [])
+_mount_lock = threading.Lock()
+
+
+def _mount_table() -> List[Tuple[str, str]]:
+    """Tabela de montagens em cache: ``is_network_path`` roda varias vezes por job."""
+    global _mount_cache
+    with _mount_lock:
+        read_at, mounts = _mount_cache
+        if not mounts or time.monotonic() - read_at > _MOUNT_TABLE_TTL:
+            mounts = _read_mount_table()
+            _mount_cache = (time.monotonic(), mounts)
+        return mounts
+
+
+def _read_mount_table() -> List[Tuple[str, str]]:
+    """Lista (ponto de montagem, tipo do sistema de arquivos) no Linux e no macOS."""
+    mounts = []
+    try:
+        if platform.system() == "Darwin":
+            output = subprocess.run(["mount"], capture_output=True, text=True, timeout=5).stdout
+            for line in output.splitlines():
+                match = re.match(r"^.* on (.*) \(([^,)]+)", line)
+                if match:
+                    mounts.append((match.group(1), match.group(2)))
+        else:
+            with open("/proc/mounts", encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) >= 3:
+                        # Espacos no caminho vem como \040
+                        mounts.append((parts[1].replace("\\040", " "), parts[2]))
+    except (OSError, subprocess.SubprocessError):
+        pass
+    return mounts
+
+
+def is_network_path(path: str) -> bool:
+    """Verifica se o caminho fica em um compartilhamento de rede (SMB/NFS/...)."""
+    path = os.path.realpath(path or ".")
+    if platform.system() == "Windows":
+        if path.startswith("\\\\"):
+            return True
+        try:
+            import ctypes
+            drive = os.path.splitdrive(path)[0] + "\\"
+            return ctypes.windll.kernel32.GetDriveTypeW(drive) == 4  # DRIVE_REMOTE
+        except Exception:
+            return False
+    best, fstype = "", ""
+    for point, kind in _mount_table():
+        if (path == point or path.startswith(point.rstrip("/") + "/")) and len(point) > len(best):
+            best, fstype = point, kind
+    return fstype.lower() in NETWORK_FILESYSTEMS
+
+
+def find_external_subtitle(video_path: str) -> str:
+    """Procura uma legenda externa com o mesmo nome do video."""
+    video = Path(video_path)
+    for ext in SUBTITLE_EXTENSIONS:
+        sub_path = video.parent / (video.stem + ext)
+        if sub_path.exists():
+            return str(sub_path)
+    return ""
+
+
+def unique_output_path(directory: str, name: str, reserved: Iterable[str] = ()) -> str:
+    """Retorna um caminho .mp4 livre, ignorando tambem os caminhos reservados."""
+    reserved = set(reserved)
+    base = Path(directory) / f"{name}.mp4"
+    if not base.exists() and str(base) not in reserved:
+        return str(base)
+    for n in range(2, 100):
+        alt = Path(directory) / f"{name}_{n}.mp4"
+        if not alt.exists() and str(alt) not in reserved:
+            return str(alt)
+    return str(base)
@@ -1,5 +1,6 @@
 """Workers de processamento com thread-safety."""
 
+from collections import deque
 from typing import List, Dict, Optional, Callable, Any
 
 from PySide6.QtCore import QObject, Signal, Slot, QMutex, QMutexLocker, QThread, QTimer
@@ -7,31 +8,135 @@ from PySide6.QtCore import QObject, Signal, Slot, QMutex, QMutexLocker, QThread,
 from ffmpeg.wrapper import FFmpegWrapper, ConversionOptions
 
 
+class LogBuffer:
+    """Buffer circular das linhas de log de um worker, esvaziado pelo LogPump.
+
+    As linhas chegam da thread que le o stderr do FFmpeg; ``take`` devolve o
+    lote pendente. Se o FFmpeg falar mais do que o buffer comporta, as linhas
+    mais antigas sao descartadas e o lote informa quantas foram omitidas.
+    ``close`` marca o fim do worker: o pump entrega o resto e larga o buffer.
+    """
+
+    def __init__(self, max_lines: int = 500):
+        self._lines: deque = deque(maxlen=max_lines)
+        self._dropped = 0
+        self._closed = False
+        self._mutex = QMutex()
+
+    def append(self, line: str) -> None:
+        with QMutexLocker(self._mutex):
+            if len(self._lines) == self._lines.maxlen:
+                self._dropped += 1
+            self._lines.append(line)
+
+    def take(self) -> List[str]:
+        with QMutexLocker(self._mutex):
+            lines = list(self._lines)
+            if self._dropped:
+                lines.insert(0, f"... {self._dropped} linha(s) de log omitida(s)")
+            self._lines.clear()
+            self._dropped = 0
+            return lines
+
+    def close(self) -> None:
+        with QMutexLocker(self._mutex):
+            self._closed = True
+
+    @property
+    def closed(self) -> bool:
+        with QMutexLocker(self._mutex):
+            return self._closed
+
+
+class LogPump(QObject):
+    """Um unico QTimer na thread da GUI que esvazia os LogBuffer de todos os workers.
+
+    Com N conversoes simultaneas, cada worker emitindo seus proprios lotes
+    multiplicava os eventos na fila da GUI; aqui sai no maximo um
+    ``lines_ready`` por intervalo (~13 Hz), com as linhas de todos os buffers.
+    O timer so roda enquanto houver buffers registrados.
+    """
+
+    lines_ready = Signal(list)
+
+    def __init__(self, interval_ms: int = 75, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self._buffers: List[LogBuffer] = []
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self.drain)
+
+    def add(self, buffer: LogBuffer) -> None:
+        """Registra o buffer de um worker (chamado na thread da GUI)."""
+        self._buffers.append(buffer)
+        if not self._timer.isActive():
+            self._timer.start()
+
+    @Slot()
+    def drain(self) -> None:
+        """Entrega o que estiver pendente e solta os buffers ja fechados."""
+        lines: List[str] = []
+        for buffer in list(self._buffers):
+            closed = buffer.closed
+            lines.extend(buffer.take())
+            if closed:
+                self._buffers.remove(buffer)
+        if lines:
+            self.lines_ready.emit(lines)
+        if not self._buffers:
+            self._timer.stop()
+
+
 class ConversionWorker(QObject):
-    """Worker para conversao de video (padrao QObject + moveToThread)."""
+    """Worker para conversao de video (padrao QObject + moveToThread).
+
+    As linhas do FFmpeg vao para um LogBuffer entregue pelo ``log_pump``
+    (criado na thread da GUI); ``log_signal`` fica para mensagens avulsas.
+    Os requisitos do FFmpeg (que podem sondar o video) sao conferidos aqui;
+    se faltar algo, ``requirements_missing`` chega antes do ``finished_signal``.
+    """
 
     progress_signal = Signal(int)
+    stats_signal = Signal(object)
     log_signal = Signal(str)
+    telemetry_signal = Signal(object)
+    requirements_missing = Signal(list)
     finished_signal = Signal(int, str)
 
-    def __init__(self, options: ConversionOptions, ffmpeg_wrapper: FFmpegWrapper):
+    def __init__(self, options: ConversionOptions, ffmpeg_wrapper: FFmpegWrapper,
+                 log_pump: LogPump, defer_commit: bool = False):
         super().__init__()
         self.options = options
         self.ffmpeg_wrapper = ffmpeg_wrapper
+        self.defer_commit = defer_commit
         self._mutex = QMutex()
         self._cancelled = False
+        self._log_buffer = LogBuffer()
+        log_pump.add(self._log_buffer)
 
     @Slot()
     def run(self) -> None:
         """Executa a conversao."""
         try:
+            missing = self.ffmpeg_wrapper.check_requirements(self.options)
+            if missing:
+                self._log_buffer.close()
+                self.requirements_missing.emit(missing)
+                self.finished_signal.emit(-1, "")
+                return
             returncode = self.ffmpeg_wrapper.convert(
                 self.options,
                 progress_callback=self._on_progress,
-                log_callback=self._on_log
+                log_callback=self._on_log,
+                stats_callback=self._on_stats,
+                defer_commit=self.defer_commit
             )
+            self._log_buffer.close()
+            if self.ffmpeg_wrapper.telemetry is not None:
+                self.telemetry_signal.emit(self.ffmpeg_wrapper.telemetry)
             self.finished_signal.emit(returncode, self.options.output_path)
         except Exception as e:
+            self._log_buffer.close()
             self.log_signal.emit(f"ERRO CRITICO: {str(e)}")
             import traceback
             traceback.print_exc()
@@ -44,12 +149,19 @@ class ConversionWorker(QObject):
                 return
         self.progress_signal.emit(percent)
 
+    def _on_stats(self, info) -> None:
+        """Callback de estatisticas do -progress (ProgressInfo, via signal)."""
+        with QMutexLocker(self._mutex):
+            if self._cancelled:
+                return
+        self.stats_signal.emit(info)
+
     def _on_log(self, message: str) -> None:
-        """Callback de log (thread-safe via signal)."""
+        """Callback de log: acumula no buffer (o LogPump entrega em lote na GUI)."""
         with QMutexLocker(self._mutex):
             if self._cancelled:
                 return
-        self.log_signal.emit(message)
+        self._log_buffer.append(message)
 
     @Slot()
     def stop(self) -> None:
@@ -58,23 +170,3 @@ class ConversionWorker(QObject):
             self._cancelled = True
         if self.ffmpeg_wrapper:
             self.ffmpeg_wrapper.stop()
-
-
-class ProbeWorker(QObject):
-    """Worker para obter informacoes do video."""
-
-    finished_signal = Signal(dict)
-
-    def __init__(self, ffmpeg_wrapper: FFmpegWrapper, video_path: str):
-        super().__init__()
-        self.ffmpeg_wrapper = ffmpeg_wrapper
-        self.video_path = video_path
-
-    @Slot()
-    def run(self) -> None:
-        """Executa a sondagem do video."""
-        try:
-            streams = self.ffmpeg_wrapper.get_streams(self.video_path)
-            self.finished_signal.emit(streams)
-        except Exception as e:
-            self.finished_signal.emit({"audio": [], "subtitles": []})
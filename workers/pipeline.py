@@ -0,0 +1,153 @@
+"""Estagios de preparacao e finalizacao do lote (fora da thread da GUI)."""
+
+import os
+import threading
+from dataclasses import replace
+from pathlib import Path
+from typing import Iterable, List, Set
+
+from PySide6.QtCore import QObject, QRunnable, Signal
+
+from ffmpeg.staging import shared_staging
+from ffmpeg.wrapper import FFmpegWrapper, ConversionOptions
+from utils.helpers import find_external_subtitle, unique_output_path
+
+
+class OutputReservations:
+    """Caminhos de saida ja prometidos a itens do lote (preparados ou em conversao).
+
+    ``unique_output_path`` so enxerga arquivos que ja existem; com varios itens
+    preparados antes de comecar, dois deles poderiam escolher o mesmo nome.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._paths: Set[str] = set()
+
+    def reserve(self, path: str) -> str:
+        """Caminho livre com o mesmo nome base de ``path``, ja reservado."""
+        target = Path(path)
+        with self._lock:
+            unique = unique_output_path(str(target.parent), target.stem, self._paths)
+            self._paths.add(unique)
+        return unique
+
+    def claim(self, paths: List[str]) -> bool:
+        """Reserva exatamente estes caminhos; False se algum ja estiver reservado."""
+        with self._lock:
+            if self._paths.intersection(paths):
+                return False
+            self._paths.update(paths)
+            return True
+
+    def release(self, paths: Iterable[str]) -> None:
+        with self._lock:
+            self._paths.difference_update(paths)
+
+
+class StageSignals(QObject):
+    prepared = Signal(int, int, object, str, str)
+    finalized = Signal(int, int, str, list)
+
+
+class PrepareTask(QRunnable):
+    """Prepara um item antes da vaga do encoder: legenda externa, nome de saida livre,
+    probe, extracao da legenda embutida, watermark, requisitos do FFmpeg e a
+    copia da entrada em rede para o rascunho local.
+
+    Emite ``prepared(indice, token, opcoes, legenda detectada, erro)``; se algo
+    falhou, as opcoes vem None e ``erro`` traz o motivo. Cada tarefa recebe
+    um FFmpegWrapper so dela, ja que o pool roda varias ao mesmo tempo.
+    """
+
+    def __init__(self, wrapper: FFmpegWrapper, index: int, token: int, options: ConversionOptions,
+                 reservations: OutputReservations, signals: StageSignals):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.wrapper = wrapper
+        self.index = index
+        self.token = token
+        self.options = options
+        self.reservations = reservations
+        self.signals = signals
+
+    def run(self) -> None:
+        options = self.options
+        detected = ""
+        reserved: List[str] = []
+        try:
+            if not options.subtitle_path:
+                detected = find_external_subtitle(options.input_path)
+                if detected:
+                    options = replace(options, subtitle_path=detected)
+            missing = self.wrapper.prepare_job(options)
+            error = f"FFmpeg sem {', '.join(missing)}" if missing else ""
+            if not error:
+                desired = [o.output_path for o in self.wrapper.output_options(options)]
+                cached = self.wrapper.cached_outputs(options)
+                # Saida identica ja no lugar (lote repetido): reaproveita o mesmo nome, sem _2
+                if (cached == [os.path.abspath(path) for path in desired]
+                        and self.reservations.claim(desired)):
+                    reserved = desired
+                else:
+                    reserved = [self.reservations.reserve(path) for path in desired]
+                staging = shared_staging()
+                if cached is None and staging is not None:
+                    # A copia acontece aqui, nao na vaga do encoder; o convert so a reencontra
+                    staging.stage_input(options.input_path, pin=False)
+                options = replace(options, output_path=reserved[0],
+                                  renditions=[replace(r, output_path=path)
+                                              for r, path in zip(options.renditions, reserved[1:])])
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        if error:
+            self.reservations.release(reserved)
+            self.signals.prepared.emit(self.index, self.token, None, detected, error)
+            return
+        self.signals.prepared.emit(self.index, self.token, options, detected, "")
+
+
+class FinalizeTask(QRunnable):
+    """Finaliza um item ja codificado: move as saidas do rascunho e confere cada uma.
+
+    A saida precisa existir, ter bytes e, quando o ffprobe le as duas, durar
+    quase o mesmo que a entrada (um MP4 truncado costuma ficar legivel).
+    """
+
+    def __init__(self, wrapper: FFmpegWrapper, index: int, options: ConversionOptions,
+                 signals: StageSignals):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.wrapper = wrapper
+        self.index = index
+        self.options = options
+        self.signals = signals
+
+    def run(self) -> None:
+        lines: List[str] = []
+        try:
+            returncode = self.wrapper.commit_outputs(0, lines.append)
+            error = "" if returncode == 0 else "falha ao mover a saida"
+            if not error:
+                error = self._verify(lines)
+            if not error:
+                self.wrapper.remember_result()
+        except Exception as e:
+            returncode, error = -1, str(e)
+        self.signals.finalized.emit(self.index, returncode if not error else -1, error, lines)
+
+    def _verify(self, lines: List[str]) -> str:
+        source = self.wrapper.probe(self.options.input_path).duration
+        for output in self.wrapper.output_options(self.options):
+            path = Path(output.output_path)
+            size = path.stat().st_size if path.exists() else 0
+            if not size:
+                return f"saida vazia: {path.name}"
+            duration = self.wrapper.probe(str(path)).duration
+            if source > 0 and duration <= 0:
+                return f"saida ilegivel: {path.name}"
+            if source > 0 and duration < source - max(2.0, source * 0.02):
+                return f"saida incompleta: {path.name} ({duration:.0f}s de {source:.0f}s)"
+            lines.append(f"Verificado: {path.name} ({size / 1048576:.1f} MB, {duration:.0f}s)")
+        return ""
+
@@ -0,0 +1,85 @@
+"""Geracao de previews em segundo plano, sempre do pedido mais recente."""
+
+from typing import Optional
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal, Slot
+
+from ffmpeg.wrapper import FFmpegWrapper, ConversionOptions
+
+
+class _PreviewSignals(QObject):
+    done = Signal(int, object)
+
+
+class _PreviewTask(QRunnable):
+    """Gera (ou busca no cache) um preview em uma thread do pool."""
+
+    def __init__(self, wrapper: FFmpegWrapper, options: ConversionOptions, frames: int,
+                 token: int, signals: _PreviewSignals):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.wrapper = wrapper
+        self.options = options
+        self.frames = frames
+        self.token = token
+        self.signals = signals
+
+    def run(self) -> None:
+        try:
+            path = self.wrapper.render_preview(self.options, self.frames)
+        except Exception as e:
+            print(f"Erro ao gerar preview: {e}")
+            path = None
+        self.signals.done.emit(self.token, path)
+
+
+class PreviewService(QObject):
+    """Gera previews fora da thread da GUI.
+
+    Uma unica thread: cada novo pedido substitui o pendente e o resultado
+    de um pedido antigo e descartado, entao digitar o texto do watermark
+    nunca enfileira previews velhos. ``ready`` recebe o caminho do JPEG e o
+    numero de quadros; ``failed`` e emitido se o FFmpeg nao gerar a imagem.
+    """
+
+    ready = Signal(str, int)
+    failed = Signal()
+
+    def __init__(self, ffmpeg_wrapper: FFmpegWrapper, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.ffmpeg_wrapper = ffmpeg_wrapper
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+        self._signals = _PreviewSignals(self)
+        self._signals.done.connect(self._on_task_done)
+        self._pending: Optional[_PreviewTask] = None
+        self._token = 0
+
+    @property
+    def busy(self) -> bool:
+        return self._pending is not None
+
+    def request(self, options: ConversionOptions, frames: int = 1) -> None:
+        """Agenda o preview; um pedido ainda nao iniciado e substituido."""
+        if self._pending is not None:
+            self._pool.tryTake(self._pending)
+        self._token += 1
+        self._pending = _PreviewTask(self.ffmpeg_wrapper, options, frames, self._token, self._signals)
+        self._pool.start(self._pending)
+
+    def shutdown(self, timeout_ms: int = 3000) -> None:
+        if self._pending is not None:
+            self._pool.tryTake(self._pending)
+            self._pending = None
+        self._pool.waitForDone(timeout_ms)
+
+    @Slot(int, object)
+    def _on_task_done(self, token: int, path: Optional[str]) -> None:
+        task = self._pending
+        if task is None or task.token != token:
+            return
+        self._pending = None
+        if path:
+            self.ready.emit(path, task.frames)
+        else:
+            self.failed.emit()
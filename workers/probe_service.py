@@ -0,0 +1,95 @@
+"""Servico de sondagem em lote com pool de threads limitado."""
+
+import os
+from typing import Dict, Optional
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal, Slot
+
+from ffmpeg.wrapper import FFmpegWrapper
+from ffmpeg.probe import ProbeResult, PROBE_CACHE_KIND
+
+
+class _ProbeSignals(QObject):
+    done = Signal(str, int, object)
+
+
+class _ProbeTask(QRunnable):
+    """Tarefa de sondagem de um arquivo (roda em uma thread do pool)."""
+
+    def __init__(self, wrapper: FFmpegWrapper, path: str, token: int, signals: _ProbeSignals):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.wrapper = wrapper
+        self.path = path
+        self.token = token
+        self.signals = signals
+
+    def run(self) -> None:
+        try:
+            result = self.wrapper.probe(self.path)
+        except Exception:
+            result = ProbeResult()
+        self.signals.done.emit(self.path, self.token, result)
+
+
+class ProbeService(QObject):
+    """Sonda os arquivos da fila em segundo plano assim que sao adicionados.
+
+    Usa um QThreadPool com poucas threads (o ffprobe e limitado por I/O) em
+    vez de criar uma QThread por sondagem. Cada caminho tem no maximo uma
+    tarefa pendente; ``cancel`` descarta a tarefa (ou o resultado, se ja
+    estiver rodando) quando o item sai da fila.
+    """
+
+    probed = Signal(str, object)
+
+    def __init__(self, ffmpeg_wrapper: FFmpegWrapper, max_threads: int = 0,
+                 parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.ffmpeg_wrapper = ffmpeg_wrapper
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(max_threads or min(4, os.cpu_count() or 2))
+        self._signals = _ProbeSignals(self)
+        self._signals.done.connect(self._on_task_done)
+        self._tasks: Dict[str, _ProbeTask] = {}
+        self._token = 0
+
+    def peek(self, path: str) -> Optional[ProbeResult]:
+        """Retorna o resultado em cache, sem sondar."""
+        cached = self.ffmpeg_wrapper.probe_cache.get(path, PROBE_CACHE_KIND)
+        return ProbeResult.from_dict(cached) if cached is not None else None
+
+    def request(self, path: str, priority: int = 0) -> None:
+        """Agenda a sondagem do arquivo; prioridades maiores passam na frente."""
+        task = self._tasks.get(path)
+        if task is not None:
+            if priority > 0 and self._pool.tryTake(task):
+                self._pool.start(task, priority)
+            return
+        self._token += 1
+        task = _ProbeTask(self.ffmpeg_wrapper, path, self._token, self._signals)
+        self._tasks[path] = task
+        self._pool.start(task, priority)
+
+    def cancel(self, path: str) -> None:
+        """Cancela a sondagem pendente do arquivo."""
+        task = self._tasks.pop(path, None)
+        if task is not None:
+            self._pool.tryTake(task)
+
+    def cancel_all(self) -> None:
+        for path in list(self._tasks):
+            self.cancel(path)
+
+    def shutdown(self, timeout_ms: int = 3000) -> None:
+        """Cancela as tarefas pendentes e espera as que estao rodando."""
+        self.cancel_all()
+        self._pool.waitForDone(timeout_ms)
+
+    @Slot(str, int, object)
+    def _on_task_done(self, path: str, token: int, result: ProbeResult) -> None:
+        task = self._tasks.get(path)
+        if task is None or task.token != token:
+            return
+        del self._tasks[path]
+        self.probed.emit(path, result)
@@ -0,0 +1,97 @@
+"""Amostragem (estimativa de tamanho e tempo) em segundo plano."""
+
+from typing import List, Optional
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal, Slot
+
+from ffmpeg.sampler import TrialSampler, combine_estimates
+from ffmpeg.wrapper import FFmpegWrapper, ConversionOptions
+
+
+class _SampleSignals(QObject):
+    item_done = Signal(int, str, object)
+    done = Signal(int, object, int)
+
+
+class _SampleTask(QRunnable):
+    """Amostra os arquivos em sequencia (uma amostragem por vez usa a CPU toda)."""
+
+    def __init__(self, wrapper: FFmpegWrapper, jobs: List[ConversionOptions], token: int,
+                 signals: _SampleSignals):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.sampler = TrialSampler(wrapper)
+        self.jobs = jobs
+        self.token = token
+        self.signals = signals
+
+    def run(self) -> None:
+        estimates = []
+        for options in self.jobs:
+            if self.sampler.cancelled:
+                break
+            try:
+                estimate = self.sampler.estimate(options)
+            except Exception as e:
+                print(f"Erro ao amostrar {options.input_path}: {e}")
+                estimate = None
+            estimates.append(estimate)
+            self.signals.item_done.emit(self.token, options.input_path, estimate)
+        measured = sum(1 for e in estimates if e is not None)
+        self.signals.done.emit(self.token, combine_estimates(estimates), measured)
+
+
+class SampleService(QObject):
+    """Executa o TrialSampler fora da thread da GUI para um arquivo ou um lote.
+
+    Um novo pedido cancela o anterior. ``item_ready`` traz a previsao de cada
+    arquivo (None se a amostragem falhou) e ``finished`` a soma do lote e
+    quantos arquivos foram medidos.
+    """
+
+    item_ready = Signal(str, object)
+    finished = Signal(object, int)
+
+    def __init__(self, ffmpeg_wrapper: FFmpegWrapper, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.ffmpeg_wrapper = ffmpeg_wrapper
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+        self._signals = _SampleSignals(self)
+        self._signals.item_done.connect(self._on_item_done)
+        self._signals.done.connect(self._on_done)
+        self._current: Optional[_SampleTask] = None
+        self._token = 0
+
+    @property
+    def busy(self) -> bool:
+        return self._current is not None
+
+    def cached(self, options: ConversionOptions):
+        """Previsao ja em cache para as opcoes (rapido, sem codificar)."""
+        return TrialSampler(self.ffmpeg_wrapper).cached(options)
+
+    def request(self, jobs: List[ConversionOptions]) -> None:
+        self.cancel()
+        self._token += 1
+        self._current = _SampleTask(self.ffmpeg_wrapper, jobs, self._token, self._signals)
+        self._pool.start(self._current)
+
+    def cancel(self) -> None:
+        """Interrompe a amostragem em andamento (o resultado e descartado)."""
+        if self._current is not None:
+            if not self._pool.tryTake(self._current):
+                self._current.sampler.stop()
+            self._current = None
+
+    @Slot(int, str, object)
+    def _on_item_done(self, token: int, path: str, estimate) -> None:
+        if self._current is not None and self._current.token == token:
+            self.item_ready.emit(path, estimate)
+
+    @Slot(int, object, int)
+    def _on_done(self, token: int, total, measured: int) -> None:
+        if self._current is None or self._current.token != token:
+            return
+        self._current = None
+        self.finished.emit(total, measured)
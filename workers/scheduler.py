@@ -0,0 +1,416 @@
+"""Agendador do lote com conversoes simultaneas."""
+
+import os
+from dataclasses import replace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from PySide6.QtCore import QObject, Signal, Slot, QThread, QThreadPool
+
+from ffmpeg.wrapper import FFmpegWrapper, ConversionOptions
+from ffmpeg.progress import ProgressInfo, estimate_batch_eta
+from ffmpeg.readahead import shared_readahead
+from ffmpeg.segmenter import segment_budget_note
+from ffmpeg.staging import shared_staging
+from workers.converter import ConversionWorker, LogPump
+from workers.pipeline import FinalizeTask, OutputReservations, PrepareTask, StageSignals
+from utils.helpers import default_batch_concurrency, encoder_threads
+
+
+class BatchScheduler(QObject):
+    """Executa os itens pendentes da fila com ate N ConversionWorkers ao mesmo tempo.
+
+    O agendador vive na thread da GUI. Cada item roda em sua propria QThread
+    com um FFmpegWrapper dedicado, ja que o wrapper guarda o processo em
+    andamento. Os itens sao os BatchItem da fila (status/error_msg/output_path)
+    e a lista e lida ao vivo, entao itens adicionados durante o lote entram
+    na proxima vaga livre.
+
+    O lote e um pipeline de tres estagios, cada um com seu pool limitado:
+    ``prepare`` (na thread da GUI, so le a interface) gera as opcoes e um
+    PrepareTask faz o I/O (legenda externa, nome de saida livre, probe,
+    extracao de legenda, watermark, copia para o rascunho local) dos
+    proximos itens enquanto os atuais codificam, ate ``prepare_ahead`` alem
+    das vagas; ao fim da codificacao a vaga do encoder e liberada e um
+    FinalizeTask move as saidas do rascunho e as confere.
+    """
+
+    item_started = Signal(int)
+    item_progress = Signal(int, int)
+    item_eta = Signal(int, float, float)
+    batch_eta = Signal(float)
+    item_finished = Signal(int, int, str)
+    progress_signal = Signal(int)
+    log_signal = Signal(str)
+    log_batch_signal = Signal(list)
+    telemetry_signal = Signal(object)
+    finished_signal = Signal()
+
+    def __init__(self, items: List[Any],
+                 prepare: Callable[[int, Any], Optional[ConversionOptions]],
+                 ffmpeg_path: Optional[str], max_workers: int = 0,
+                 on_error: str = "continue", use_hardware_accel: bool = False,
+                 prepare_ahead: int = 2, prepare_workers: int = 2, finalize_workers: int = 1,
+                 parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.items = items
+        self._prepare = prepare
+        self._ffmpeg_path = ffmpeg_path
+        self.max_workers = max_workers if max_workers > 0 else default_batch_concurrency(use_hardware_accel)
+        self.threads_per_job = encoder_threads(self.max_workers)
+        self.use_hardware_accel = use_hardware_accel
+        self._segment_note = ""
+        self.on_error = on_error
+        self.prepare_ahead = max(prepare_ahead, 0)
+        self._stage_wrapper = FFmpegWrapper(ffmpeg_path)
+        self._prepare_pool = QThreadPool(self)
+        self._prepare_pool.setMaxThreadCount(max(prepare_workers, 1))
+        self._finalize_pool = QThreadPool(self)
+        self._finalize_pool.setMaxThreadCount(max(finalize_workers, 1))
+        self._log_pump = LogPump(parent=self)
+        self._log_pump.lines_ready.connect(self.log_batch_signal)
+        self._stage_signals = StageSignals(self)
+        self._stage_signals.prepared.connect(self._on_prepared)
+        self._stage_signals.finalized.connect(self._on_finalized)
+        self._reservations = OutputReservations()
+        self._preparing: Dict[int, PrepareTask] = {}
+        self._prepared: Dict[int, ConversionOptions] = {}
+        self._finalizing: Dict[int, FinalizeTask] = {}
+        self._jobs: Dict[int, Tuple[FFmpegWrapper, ConversionOptions]] = {}
+        self._token = 0
+        self._active: Dict[int, ConversionWorker] = {}
+        self._threads: List[QThread] = []
+        self._progress: Dict[int, int] = {}
+        self._stats: Dict[int, ProgressInfo] = {}
+        self._cancelled: set = set()
+        self._halted = False
+        self._running = False
+        self.completed = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @property
+    def active_indices(self) -> List[int]:
+        """Indices dos itens em conversao."""
+        return sorted(self._active)
+
+    def is_running(self) -> bool:
+        return self._running
+
+    def start(self) -> None:
+        """Inicia o lote."""
+        self._running = True
+        self.log_signal.emit(f"Conversoes simultaneas: {self.max_workers} "
+                             f"(libx264 com {self.threads_per_job} threads cada)")
+        self.dispatch()
+
+    def dispatch(self) -> None:
+        """Preenche as vagas livres com os proximos itens pendentes ja preparados.
+
+        A ordem da fila e mantida: se o proximo ainda esta em preparacao, a
+        vaga espera por ele (``_on_prepared`` chama ``dispatch`` de novo).
+        """
+        if not self._running:
+            return
+        while not self._halted and len(self._active) < self.max_workers:
+            index = self._next_pending()
+            if index < 0:
+                break
+            options = self._prepared.pop(index, None)
+            if options is None:
+                self._request_prepare(index)
+                if self.items[index].status == "pending":
+                    break
+                continue
+            self._start_item(index, options)
+        if not self._halted:
+            self._prepare_next()
+        self._prefetch_next()
+        self._emit_progress()
+        if not self._active and not self._finalizing and (self._halted or self._next_pending() < 0):
+            self._running = False
+            self._release_prepared()
+            self.finished_signal.emit()
+
+    def _next_pending(self) -> int:
+        for i, item in enumerate(self.items):
+            if item.status == "pending" and i not in self._active:
+                return i
+        return -1
+
+    def _prepare_next(self) -> None:
+        """Prepara os pendentes que ocupam as vagas livres e os ``prepare_ahead`` seguintes."""
+        budget = self.max_workers - len(self._active) + self.prepare_ahead
+        for i, item in enumerate(self.items):
+            if budget <= 0:
+                break
+            if item.status != "pending" or i in self._active:
+                continue
+            self._request_prepare(i)
+            budget -= 1
+
+    def _request_prepare(self, index: int) -> None:
+        if index in self._preparing or index in self._prepared:
+            return
+        item = self.items[index]
+        try:
+            options = self._prepare(index, item)
+        except Exception as e:
+            options = None
+            self.log_signal.emit(f"ERRO ao preparar {item.path}: {e}")
+        if options is None:
+            self._fail_pending(index, item.error_msg or "falha ao preparar")
+            return
+        if not options.threads:
+            options = replace(options, threads=self.threads_per_job, parallel_jobs=self._batch_slots())
+        self._token += 1
+        # Wrapper proprio: o prepare guarda estado (_is_cancelled, process) e roda em paralelo
+        task = PrepareTask(FFmpegWrapper(self._ffmpeg_path), index, self._token, options,
+                           self._reservations, self._stage_signals)
+        self._preparing[index] = task
+        self._prepare_pool.start(task)
+
+    def _batch_slots(self) -> int:
+        """Jobs que vao codificar ao mesmo tempo: as vagas, limitadas ao que ainda falta no lote.
+
+        Um lote curto (ou o fim de um longo) deixa sessoes do NVENC livres
+        para os trechos paralelos de quem ainda esta na fila.
+        """
+        remaining = sum(1 for i, item in enumerate(self.items)
+                        if item.status == "pending" or i in self._active)
+        return max(1, min(self.max_workers, remaining))
+
+    def _fail_pending(self, index: int, message: str) -> None:
+        item = self.items[index]
+        item.status = "error"
+        item.error_msg = message
+        self.errors += 1
+        self.item_finished.emit(index, -1, "")
+
+    def invalidate(self, index: int) -> None:
+        """Descarta a preparacao de um item pendente (ex.: editado durante o lote)."""
+        task = self._preparing.pop(index, None)
+        if task is not None:
+            self._prepare_pool.tryTake(task)
+        options = self._prepared.pop(index, None)
+        if options is not None:
+            self._reservations.release(self._output_paths(options))
+
+    def _release_prepared(self) -> None:
+        for index in list(self._preparing) + list(self._prepared):
+            self.invalidate(index)
+
+    def _output_paths(self, options: ConversionOptions) -> List[str]:
+        return [o.output_path for o in self._stage_wrapper.output_options(options)]
+
+    @Slot(int, int, object, str, str)
+    def _on_prepared(self, index: int, token: int, options, detected: str, error: str) -> None:
+        task = self._preparing.get(index)
+        if task is None or task.token != token:
+            # Descartado enquanto preparava: so devolve os nomes reservados
+            if options is not None:
+                self._reservations.release(self._output_paths(options))
+            return
+        del self._preparing[index]
+        item = self.items[index]
+        if detected and not item.subtitle_path:
+            item.subtitle_path = detected
+        if options is None:
+            self._fail_pending(index, error)
+        elif self._running and item.status == "pending":
+            self._prepared[index] = options
+        else:
+            self._reservations.release(self._output_paths(options))
+        self.dispatch()
+
+    def _prefetch_next(self) -> None:
+        """Aquece o cache de paginas com o proximo pendente enquanto os atuais codificam.
+
+        Arquivos que passam pelo rascunho local ja sao copiados no PrepareTask.
+        """
+        index = self._next_pending()
+        if index < 0 or self._halted:
+            return
+        path = self.items[index].path
+        staging = shared_staging()
+        if staging is not None and staging.wants(path):
+            return
+        readahead = shared_readahead()
+        if readahead is not None:
+            readahead.warm(path)
+
+    def _start_item(self, index: int, options: ConversionOptions) -> None:
+        item = self.items[index]
+        item.status = "converting"
+        item.output_path = options.output_path
+        # So o que este job vai criar pode ser apagado se a sessao cair no meio
+        wrapper = FFmpegWrapper(self._ffmpeg_path)
+        item.partial_paths = [o.output_path for o in wrapper.output_options(options)
+                              if not os.path.exists(o.output_path)]
+
+        readahead = shared_readahead()
+        if readahead is not None:
+            readahead.forget(item.path)
+        note = segment_budget_note(options, self.use_hardware_accel)
+        if note and note != self._segment_note:
+            # Uma vez por lote (ou quando muda), nao a cada item
+            self._segment_note = note
+            self.log_signal.emit(note)
+
+        thread = QThread()
+        self._jobs[index] = (wrapper, options)
+        worker = ConversionWorker(options, wrapper, self._log_pump, defer_commit=True)
+        worker._batch_index = index
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        worker.progress_signal.connect(self._on_worker_progress)
+        worker.stats_signal.connect(self._on_worker_stats)
+        worker.log_signal.connect(self.log_signal)
+        worker.telemetry_signal.connect(self.telemetry_signal)
+        worker.finished_signal.connect(self._on_worker_finished)
+        worker.finished_signal.connect(thread.quit)
+        worker.finished_signal.connect(worker.deleteLater)
+        thread.finished.connect(self._on_thread_done)
+        thread.finished.connect(thread.deleteLater)
+
+        self._active[index] = worker
+        self._progress[index] = 0
+        self._threads.append(thread)
+        self.item_started.emit(index)
+        thread.start()
+
+    @Slot(int)
+    def _on_worker_progress(self, percent: int) -> None:
+        index = getattr(self.sender(), "_batch_index", -1)
+        if index not in self._active:
+            return
+        self._progress[index] = percent
+        self.item_progress.emit(index, percent)
+        self._emit_progress()
+
+    @Slot(object)
+    def _on_worker_stats(self, info: ProgressInfo) -> None:
+        index = getattr(self.sender(), "_batch_index", -1)
+        if index not in self._active:
+            return
+        self._stats[index] = info
+        self.item_eta.emit(index, info.realtime, info.eta if info.eta is not None else -1.0)
+        eta = self.estimate_eta()
+        self.batch_eta.emit(eta if eta is not None else -1.0)
+
+    def estimate_eta(self) -> Optional[float]:
+        """ETA do lote a partir das duracoes sondadas e da vazao dos jobs ativos.
+
+        Itens ainda sem sondagem contam com a duracao media dos conhecidos.
+        """
+        known = [item.probe.duration for item in self.items
+                 if getattr(item, "probe", None) is not None and item.probe.duration > 0]
+        fallback = sum(known) / len(known) if known else 0.0
+        remaining = 0.0
+        for i, item in enumerate(self.items):
+            probe = getattr(item, "probe", None)
+            duration = probe.duration if probe is not None and probe.duration > 0 else fallback
+            if i in self._active:
+                info = self._stats.get(i)
+                remaining += max(duration - (info.out_time if info else 0.0), 0.0)
+            elif item.status == "pending" and not self._halted:
+                remaining += duration
+        return estimate_batch_eta(remaining, (info.realtime for info in self._stats.values()))
+
+    @Slot(int, str)
+    def _on_worker_finished(self, returncode: int, output_path: str) -> None:
+        index = getattr(self.sender(), "_batch_index", -1)
+        if self._active.pop(index, None) is None:
+            return
+        self._log_pump.drain()  # as ultimas linhas do job antes do resultado
+        self._progress.pop(index, None)
+        self._stats.pop(index, None)
+        wrapper, options = self._jobs.pop(index)
+        if returncode == 0 and wrapper.cache_hit is not None:
+            if wrapper.cache_hit:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+        if returncode == 0:
+            # A vaga do encoder ja esta livre; mover e conferir fica no pool de finalizacao
+            task = FinalizeTask(wrapper, index, options, self._stage_signals)
+            self._finalizing[index] = task
+            self._finalize_pool.start(task)
+        else:
+            self._reservations.release(self._output_paths(options))
+            self._finish_item(index, returncode, output_path,
+                              "cancelado" if index in self._cancelled else f"codigo {returncode}")
+        self.dispatch()
+
+    @Slot(int, int, str, list)
+    def _on_finalized(self, index: int, returncode: int, error: str, lines: list) -> None:
+        task = self._finalizing.pop(index, None)
+        if task is None:
+            return
+        if lines:
+            self.log_batch_signal.emit(lines)
+        self._reservations.release(self._output_paths(task.options))
+        self._finish_item(index, returncode, task.options.output_path, error)
+        self.dispatch()
+
+    def _finish_item(self, index: int, returncode: int, output_path: str, error: str) -> None:
+        item = self.items[index]
+        item.partial_paths = []
+        if returncode == 0:
+            item.status = "done"
+            self.completed += 1
+        else:
+            item.status = "error"
+            item.error_msg = error
+            self.errors += 1
+            if index not in self._cancelled and self.on_error == "stop" and not self._halted:
+                self._halted = True
+                self.log_signal.emit("Lote interrompido apos erro (batch_on_error = stop). "
+                                     "Itens pendentes permanecem na fila.")
+        self.item_finished.emit(index, returncode, output_path)
+
+    @Slot()
+    def _on_thread_done(self) -> None:
+        thread = self.sender()
+        if thread in self._threads:
+            self._threads.remove(thread)
+
+    def _emit_progress(self) -> None:
+        pending = sum(1 for i, item in enumerate(self.items)
+                      if item.status == "pending" and i not in self._active)
+        if self._halted:
+            pending = 0
+        finished = self.completed + self.errors
+        total = finished + len(self._active) + len(self._finalizing) + pending
+        if total <= 0:
+            return
+        done = (finished + len(self._finalizing)) * 100 + sum(self._progress.values())
+        self.progress_signal.emit(min(int(done / total), 100))
+
+    def cancel_item(self, index: int) -> None:
+        """Cancela um item em conversao ou remove um pendente do lote."""
+        worker = self._active.get(index)
+        if worker is not None:
+            self._cancelled.add(index)
+            worker.stop()
+        elif 0 <= index < len(self.items) and self.items[index].status == "pending":
+            self.invalidate(index)
+            self.items[index].status = "error"
+            self.items[index].error_msg = "cancelado"
+            self.errors += 1
+            self.item_finished.emit(index, -2, "")
+
+    def cancel_all(self) -> None:
+        """Cancela os itens pendentes e interrompe as conversoes em andamento."""
+        self._halted = True
+        self._release_prepared()
+        for i, item in enumerate(self.items):
+            if item.status == "pending" and i not in self._active:
+                item.status = "error"
+                item.error_msg = "cancelado"
+                self.errors += 1
+                self.item_finished.emit(i, -2, "")
+        for index in list(self._active):
+            self.cancel_item(index)
+        if not self._active and not self._finalizing:
+            self.dispatch()